@@ -2,9 +2,15 @@ import re
 
 from rest_framework import serializers
 
+from bot.doi import normalize_doi
+
 
 DOI_REGEX = re.compile(r'^10\.\d{4,9}/[-._;()/:A-Za-z0-9]+$')
 
+MAX_BULK_ITEMS = 5000
+
+MAX_ENTITLEMENT_IDS = 10000
+
 
 class RequestSerializer(serializers.Serializer):
     chat_id = serializers.IntegerField()
@@ -13,8 +19,21 @@ class RequestSerializer(serializers.Serializer):
 
     def validate_doi(self, value):
         """
-        Проверяет формат DOI.
+        Нормализует DOI и проверяет его формат.
         """
+        value = normalize_doi(value)
         if not DOI_REGEX.match(value):
             raise serializers.ValidationError("Invalid format DOI")
         return value
+
+
+class BulkRequestSerializer(serializers.Serializer):
+    items = RequestSerializer(many=True, allow_empty=False, max_length=MAX_BULK_ITEMS)
+
+
+class EntitlementSerializer(serializers.Serializer):
+    telegram_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=MAX_ENTITLEMENT_IDS
+    )
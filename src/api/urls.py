@@ -1,7 +1,14 @@
 from django.urls import path
 
-from .views import RequestAPIView
+from .views import BulkRequestAPIView, EntitlementAPIView, RequestAPIView, RequestStatusAPIView
 
 urlpatterns = [
     path('request-pdf/', RequestAPIView.as_view(), name='request-pdf'),
+    path(
+        'request-pdf/status/<str:token>/',
+        RequestStatusAPIView.as_view(),
+        name='request-pdf-status'
+    ),
+    path('request-pdf/bulk/', BulkRequestAPIView.as_view(), name='request-pdf-bulk'),
+    path('entitlements/', EntitlementAPIView.as_view(), name='entitlements'),
 ]
@@ -1,8 +1,11 @@
+from celery.result import AsyncResult
+from django.utils.http import parse_etags, quote_etag
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
-from .serializers import RequestSerializer
+from .serializers import BulkRequestSerializer, EntitlementSerializer, RequestSerializer
+from bot.services import bulk_create_requests, get_entitlements
 from bot.tasks import request_pdf_task
 
 import logging
@@ -11,7 +14,7 @@ logger = logging.getLogger(__name__)
 
 
 class RequestAPIView(APIView):
-    """Получение Post-запроса по chat_id, message_id, doi"""
+    """Получение Post-запроса по chat_id, message_id, doi и постановка его в очередь Celery"""
     def post(self, request):
         serializer = RequestSerializer(data=request.data)
         if serializer.is_valid():
@@ -23,6 +26,49 @@ class RequestAPIView(APIView):
                 f"Request received: for article doi={doi} from chat_id={chat_id}"
             )
 
-            request_pdf_task(chat_id, message_id, doi)
-            return Response(status=status.HTTP_201_CREATED)
+            result = request_pdf_task.delay(chat_id, message_id, doi)
+            return Response({'token': result.id}, status=status.HTTP_202_ACCEPTED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RequestStatusAPIView(APIView):
+    """Статус обработки запроса по токену, выданному RequestAPIView"""
+    def get(self, request, token):
+        result = AsyncResult(token)
+        data = {'token': token, 'state': result.state}
+        if result.successful():
+            data['result'] = result.result
+        elif result.failed():
+            data['error'] = 'Request processing failed'
+        return Response(data)
+
+
+class BulkRequestAPIView(APIView):
+    """Получение пачки запросов {chat_id, message_id, doi} одним Post-запросом"""
+    def post(self, request):
+        serializer = BulkRequestSerializer(data=request.data)
+        if serializer.is_valid():
+            items = serializer.validated_data['items']
+            logger.info(f"Bulk request received: {len(items)} items")
+
+            results = bulk_create_requests(items)
+            return Response({'results': results}, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class EntitlementAPIView(APIView):
+    """Активные подписки для пачки telegram_id одним Post-запросом.
+
+    Поддерживает If-None-Match: если набор подписок не изменился с прошлой
+    синхронизации, возвращает 304 без тела.
+    """
+    def post(self, request):
+        serializer = EntitlementSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        entitlements, etag = get_entitlements(serializer.validated_data['telegram_ids'])
+        etag = quote_etag(etag)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response({'entitlements': entitlements}, headers={'ETag': etag})
@@ -1,7 +1,19 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 
-from bot.models import ChatUser, Config, Notification, PDFUpload, Request, Subscription, Validation
+from bot.models import (
+    Article,
+    ChatUser,
+    Config,
+    Notification,
+    OutboxMessage,
+    PDFUpload,
+    Request,
+    Subscription,
+    TelegramUser,
+    Validation,
+)
 
 
 @admin.register(Config)
@@ -17,6 +29,14 @@ class ConfigAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         return False
 
+@admin.register(Article)
+class ArticleAdmin(admin.ModelAdmin):
+    """Админка для модели Article."""
+
+    list_display = ['doi', 'created_at']
+    search_fields = ['doi']
+    readonly_fields = ['doi_hash', 'created_at']
+
 @admin.register(Request)
 class RequestAdmin(admin.ModelAdmin):
     """Админка для модели Request."""
@@ -46,22 +66,22 @@ class ValidationAdmin(admin.ModelAdmin):
     readonly_fields = ['voted_at']
 
 @admin.register(ChatUser)
-class ChatUserAdmin(admin.ModelAdmin):
-    """Админка для модели ChatUser."""
+class ChatUserAdmin(UserAdmin):
+    """Админка для модели ChatUser (сотрудники)."""
 
-    list_display = ['telegram_id', 'username', 'is_in_bot', 'upload_count', 'validation_count', 'date_joined']
-    list_filter = ['is_in_bot', 'date_joined']
-    search_fields = ['telegram_id', 'username']
-    readonly_fields = ['date_joined']
-    fieldsets = [
-        ("Основная информация", {"fields": ["username", "telegram_id", "password"]}),
-        ("Статистика", {"fields": ["upload_count", "validation_count", "is_in_bot"]}),
-        (
-            "Права доступа",
-            {"fields": ["is_active", "is_staff", "is_superuser", "groups", "user_permissions"]},
-        ),
-        ("Даты", {"fields": ["date_joined", "last_login"]}),
+    list_display = ['username', 'email', 'is_staff', 'is_superuser', 'date_joined']
+
+@admin.register(TelegramUser)
+class TelegramUserAdmin(admin.ModelAdmin):
+    """Админка для модели TelegramUser."""
+
+    list_display = [
+        'telegram_id', 'username', 'is_in_bot', 'upload_count', 'validation_count',
+        'subscription_until', 'join_date'
     ]
+    list_filter = ['is_in_bot', 'join_date']
+    search_fields = ['telegram_id', 'username']
+    readonly_fields = ['join_date', 'subscription_until']
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -92,6 +112,15 @@ class SubscriptionAdmin(admin.ModelAdmin):
         )
     is_active.short_description = 'Статус'
 
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Админка для модели OutboxMessage."""
+
+    list_display = ['idempotency_key', 'method', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'method']
+    search_fields = ['idempotency_key']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+
 admin.site.site_header = 'Управление научными статьями'
 admin.site.site_title = 'Административная панель'
 admin.site.index_title = 'Панель управления'
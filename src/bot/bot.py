@@ -3,13 +3,13 @@ import os
 import sys
 
 import django
-from asgiref.sync import sync_to_async
 from telegram import Update
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sciarticle.settings")
 django.setup()
 
+from django.conf import settings
 from telegram.ext import (
     Application,
     CallbackQueryHandler,
@@ -19,9 +19,11 @@ from telegram.ext import (
     filters,
 )
 
+from bot.db import db_async
 from bot.handlers.callback_handlers import handle_vote_callback
 from bot.handlers.file_handlers import handle_pdf_upload
-from bot.models import ChatUser, Config, Subscription
+from bot.services import get_user_stats
+from bot.users import register_bot_user
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -31,38 +33,16 @@ logger = logging.getLogger(__name__)
 
 TELEGRAM_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
 
-get_or_create_user = sync_to_async(
-    ChatUser.objects.get_or_create,
-    thread_sensitive=True
-)
+register_user = db_async(register_bot_user)
 
-get_user = sync_to_async(ChatUser.objects.get, thread_sensitive=True)
-get_active_subs = sync_to_async(
-    lambda user: list(
-        Subscription.objects.filter(
-            user=user, end_date__gt=django.utils.timezone.now()
-        ).order_by('-end_date')
-    ),
-    thread_sensitive=True
-)
-get_config = sync_to_async(Config.get_instance, thread_sensitive=True)
+get_stats = db_async(get_user_stats)
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start command handler - registers user and sends welcome message."""
     user = update.effective_user
 
-    chat_user, created = await get_or_create_user(
-        telegram_id=user.id,
-        defaults={
-            'username': user.username or user.first_name,
-            'is_in_bot': True
-        }
-    )
-
-    if not chat_user.is_in_bot:
-        chat_user.is_in_bot = True
-        await sync_to_async(chat_user.save, thread_sensitive=True)()
+    await register_user(user.id, user.username or user.first_name)
 
     welcome_message = (
         f"Привет, {user.first_name}! Я SciArticleBot.\n\n"
@@ -77,42 +57,38 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler for the /stats command - shows user statistics."""
-    user_id = update.effective_user.id
-
-    try:
-        user = await get_user(telegram_id=user_id)
-
-        active_subs = await get_active_subs(user)
-
-        sub_status = "Нет активных подписок"
-        if active_subs:
-            sub = active_subs[0]
-            days_left = (sub.end_date - django.utils.timezone.now()).days
-            sub_status = f"Активная подписка до {sub.end_date.strftime('%d.%m.%Y')} ({days_left} дней)"
-
-        config = await get_config()
-
-        uploads = user.upload_count
-        validations = user.validation_count
-        uploads_needed = config.uploads_for_subscription - (uploads % config.uploads_for_subscription)
-        validations_needed = config.validations_for_subscription - (validations % config.validations_for_subscription)
-
-        stats_text = (
-            f"📊 Ваша статистика:\n\n"
-            f"Загружено PDF: {uploads}\n"
-            f"Проверено PDF: {validations}\n\n"
-            f"Статус подписки: {sub_status}\n\n"
-            f"До следующей подписки осталось:\n"
-            f"- Загрузить еще {uploads_needed} PDF\n"
-            f"- ИЛИ проверить еще {validations_needed} PDF"
-        )
-
-        await update.message.reply_text(stats_text)
-
-    except ChatUser.DoesNotExist:
+    stats = await get_stats(update.effective_user.id)
+    if stats is None:
         await update.message.reply_text(
             "Вы еще не зарегистрированы. Используйте /start для начала работы."
         )
+        return
+
+    now = django.utils.timezone.now()
+    sub_end = stats['subscription_until']
+    sub_status = "Нет активных подписок"
+    if sub_end and sub_end > now:
+        days_left = (sub_end - now).days
+        sub_status = f"Активная подписка до {sub_end.strftime('%d.%m.%Y')} ({days_left} дней)"
+
+    uploads = stats['upload_count']
+    validations = stats['validation_count']
+    uploads_threshold = stats['uploads_for_subscription']
+    validations_threshold = stats['validations_for_subscription']
+    uploads_needed = uploads_threshold - (uploads % uploads_threshold)
+    validations_needed = validations_threshold - (validations % validations_threshold)
+
+    stats_text = (
+        f"📊 Ваша статистика:\n\n"
+        f"Загружено PDF: {uploads}\n"
+        f"Проверено PDF: {validations}\n\n"
+        f"Статус подписки: {sub_status}\n\n"
+        f"До следующей подписки осталось:\n"
+        f"- Загрузить еще {uploads_needed} PDF\n"
+        f"- ИЛИ проверить еще {validations_needed} PDF"
+    )
+
+    await update.message.reply_text(stats_text)
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -132,13 +108,16 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(help_text, parse_mode="Markdown")
 
 
-def main():
-    """Main function to start the bot."""
-    if not TELEGRAM_TOKEN:
-        logger.error("No TELEGRAM_BOT_TOKEN provided")
-        return
+def build_application(token, polling=True):
+    """Build the bot Application with all handlers.
 
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    With polling=False the Application has no Updater and only processes
+    updates passed to it, which is how the webhook view uses it.
+    """
+    builder = Application.builder().token(token)
+    if not polling:
+        builder = builder.updater(None)
+    application = builder.build()
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("stats", stats_command))
@@ -159,7 +138,25 @@ def main():
         )
 
     application.add_error_handler(error_handler)
+    return application
+
+
+def main():
+    """Main function to start the bot.
+
+    If TELEGRAM_WEBHOOK_URL is set, updates are received by the web app
+    (bot.webhook) and the webhook is registered once with
+    `manage.py set_webhook`, so there is nothing to run here.
+    """
+    if not TELEGRAM_TOKEN:
+        logger.error("No TELEGRAM_BOT_TOKEN provided")
+        return
+
+    if settings.TELEGRAM_WEBHOOK_URL:
+        logger.info("Webhook mode: updates are served by the web app, polling is disabled")
+        return
 
+    application = build_application(TELEGRAM_TOKEN)
     application.run_polling()
 
     logger.info("Bot started")
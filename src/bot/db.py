@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BOT_DB_POOL_SIZE,
+            thread_name_prefix='bot-db'
+        )
+    return _executor
+
+
+async def run_in_db_pool(func, *args, **kwargs):
+    """Выполняет синхронный ORM-вызов в ограниченном пуле потоков бота.
+
+    В отличие от sync_to_async(thread_sensitive=True) (на нём же построены
+    aget/aget_or_create), запросы разных апдейтов не выстраиваются в очередь
+    к одному потоку: одновременно выполняется до BOT_DB_POOL_SIZE запросов,
+    у каждого потока пула своё соединение с БД.
+    """
+    return await sync_to_async(func, thread_sensitive=False, executor=_get_executor())(
+        *args, **kwargs
+    )
+
+
+def db_async(func):
+    """Оборачивает синхронную функцию для вызова через run_in_db_pool."""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_db_pool(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,47 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DEDUP_KEY = 'task-dedup:{}'
+
+
+def claim_once(key):
+    """Атомарно занимает ключ события на TASK_DEDUP_TTL секунд.
+
+    cache.add — это SET NX в Redis: True получает только первый вызов
+    с данным ключом, повторы стоят одну операцию Redis.
+    """
+    return cache.add(DEDUP_KEY.format(key), 1, settings.TASK_DEDUP_TTL)
+
+
+def release_claim(key):
+    """Снимает отметку claim_once, чтобы повтор события снова был обработан."""
+    cache.delete(DEDUP_KEY.format(key))
+
+
+def run_once(key, func, *args, **kwargs):
+    """Вызывает func, только если событие key ещё не обрабатывалось.
+
+    Если вызов упал (например, недоступен Redis или брокер), отметка
+    снимается, чтобы повтор события не был отброшен как дубликат.
+    Возвращает результат func или None для повтора.
+    """
+    if not claim_once(key):
+        logger.info(f"Duplicate event {key} skipped")
+        return None
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        release_claim(key)
+        raise
+
+
+def enqueue_once(task, key, *args, **kwargs):
+    """Ставит задачу в очередь, только если событие key ещё не обрабатывалось.
+
+    Возвращает AsyncResult или None для повтора.
+    """
+    return run_once(key, task.delay, *args, **kwargs)
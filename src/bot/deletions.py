@@ -0,0 +1,81 @@
+import time
+
+import redis
+from django.conf import settings
+
+DELETION_QUEUE_KEY = 'telegram:deletions'
+
+# Атомарно забирает из очереди до ARGV[2] сообщений со сроком удаления <= ARGV[1]
+# и переносит их срок на ARGV[3]: параллельные проходы sweeper'а их не возьмут,
+# а сообщения упавшего прохода вернутся в работу после истечения аренды.
+CLAIM_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[3], member)
+end
+return due
+"""
+
+_queue = None
+
+
+class DeletionQueue:
+    """Очередь отложенных удалений сообщений в sorted set Redis.
+
+    Член множества — "chat_id:message_id", score — unix-время удаления.
+    Вместо ETA-задачи на каждое сообщение очередь разбирается
+    периодической задачей sweep_due_deletions_task.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.claim_due_script = client.register_script(CLAIM_DUE_SCRIPT)
+
+    def schedule(self, chat_id, message_id, delay):
+        """Ставит сообщение на удаление через delay секунд."""
+        self.client.zadd(DELETION_QUEUE_KEY, {f'{chat_id}:{message_id}': time.time() + delay})
+
+    def claim_due(self, limit):
+        """Берёт в работу до limit сообщений, срок удаления которых наступил.
+
+        Сообщения остаются в очереди со сроком, сдвинутым на
+        DELETION_SWEEP_LEASE секунд, пока их не уберёт remove.
+        Возвращает [(chat_id, message_id)].
+        """
+        now = time.time()
+        due = self.claim_due_script(
+            keys=[DELETION_QUEUE_KEY], args=[now, limit, now + settings.DELETION_SWEEP_LEASE]
+        )
+        return [tuple(int(part) for part in member.split(b':')) for member in due]
+
+    def defer(self, delays):
+        """Переносит срок удаления сообщений {(chat_id, message_id): через сколько секунд}.
+
+        ZADD XX: сообщение, которое уже убрали из очереди, не вернётся.
+        """
+        if delays:
+            now = time.time()
+            scores = {
+                f'{chat_id}:{message_id}': now + delay
+                for (chat_id, message_id), delay in delays.items()
+            }
+            self.client.zadd(DELETION_QUEUE_KEY, scores, xx=True)
+
+    def remove(self, messages):
+        """Убирает из очереди обработанные сообщения [(chat_id, message_id)]."""
+        if messages:
+            self.client.zrem(
+                DELETION_QUEUE_KEY,
+                *(f'{chat_id}:{message_id}' for chat_id, message_id in messages)
+            )
+
+    def __len__(self):
+        return self.client.zcard(DELETION_QUEUE_KEY)
+
+
+def get_deletion_queue():
+    """Возвращает общую для процесса DeletionQueue."""
+    global _queue
+    if _queue is None:
+        _queue = DeletionQueue(redis.Redis.from_url(settings.TELEGRAM_DELETION_QUEUE_REDIS_URL))
+    return _queue
@@ -0,0 +1,24 @@
+import hashlib
+import re
+from urllib.parse import unquote
+
+DOI_PREFIX_REGEX = re.compile(
+    r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)',
+    re.IGNORECASE
+)
+
+
+def normalize_doi(value):
+    """Приводит DOI к каноническому виду.
+
+    Убирает пробелы, URL-кодирование и префиксы https://doi.org/ и doi:,
+    приводит к нижнему регистру (DOI нечувствительны к регистру).
+    """
+    doi = unquote(value.strip())
+    doi = DOI_PREFIX_REGEX.sub('', doi)
+    return doi.strip().lower()
+
+
+def doi_hash(value):
+    """Возвращает sha256 нормализованного DOI, ключ модели Article."""
+    return hashlib.sha256(normalize_doi(value).encode()).hexdigest()
@@ -1,9 +1,28 @@
-from bot.tasks import handle_vote_callback_task
+from bot.db import run_in_db_pool
+from bot.dedup import run_once
+from bot.tasks import submit_vote
+
 
 async def handle_vote_callback(update, context):
-    data = update.callback_query.data
-    user = update.callback_query.from_user
+    """Передаёт голос на пакетную обработку; повтор того же голоса отсекается.
+
+    Ключ — PDF и голосующий, поэтому им покрываются и повторная доставка
+    callback query Telegram'ом, и двойное нажатие кнопки. Если голос
+    не удалось поставить в буфер, ключ снимается и голос можно повторить.
+    """
+    query = update.callback_query
+    user = query.from_user
+    pdf_id = query.data.split(":")[-1]
 
-    handle_vote_callback_task.delay(data, user.id, user.username or user.full_name)
+    # Отметка и постановка в буфер — один переход в пул потоков бота
+    await run_in_db_pool(
+        run_once,
+        f"vote:{pdf_id}:{user.id}",
+        submit_vote,
+        query.id,
+        query.data,
+        user.id,
+        user.username or user.full_name
+    )
 
-    await update.callback_query.answer("Голос принят!")
\ No newline at end of file
+    await query.answer("Голос принят!")
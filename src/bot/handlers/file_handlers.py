@@ -1,17 +1,29 @@
+from bot.db import run_in_db_pool
+from bot.dedup import enqueue_once
 from bot.models import Request
 from bot.tasks import handle_pdf_upload_task
 
 
 async def handle_pdf_upload(update, context):
+    """Ставит PDF, присланный ответом на сообщение запроса, в очередь на загрузку.
+
+    Сам файл здесь не скачивается: его потоково забирает handle_pdf_upload_task.
+    """
     msg = update.message
     if not msg.reply_to_message:
-     return
-    f = await context.bot.get_file(msg.document.file_id)
-    tmp_path = f"/tmp/{msg.document.file_id}"
-    await f.download_to_drive(tmp_path)
+        return
     req_msg_id = msg.reply_to_message.message_id
-    req = Request.objects.get(request_message_id=req_msg_id)
-    handle_pdf_upload_task.delay(
+    try:
+        req = await run_in_db_pool(
+            Request.objects.get, chat_id=msg.chat_id, message_id=req_msg_id
+        )
+    except Request.DoesNotExist:
+        return
+    # SET NX в Redis и публикация в брокер блокируют, поэтому не в цикле событий
+    await run_in_db_pool(
+        enqueue_once,
+        handle_pdf_upload_task,
+        f"upload:{msg.chat_id}:{msg.message_id}",
         req_msg_id,
         req.id,
         msg.document.file_id,
@@ -0,0 +1,67 @@
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from bot.telegram_client import get_telegram_client
+
+PDF_MAGIC = b'%PDF-'
+CHUNK_SIZE = 64 * 1024
+
+
+class PDFRejected(Exception):
+    """Файл отклонён при загрузке: не PDF или слишком большой."""
+
+
+def pdf_storage_path(sha256):
+    """Путь файла в хранилище по его хешу: pdfs/ab/cd/abcd....pdf."""
+    return f'pdfs/{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf'
+
+
+def store_pdf_stream(chunks):
+    """Сохраняет PDF из потока байтов, адресуя его по SHA-256 содержимого.
+
+    Проверяет сигнатуру %PDF- по первым байтам и размер по мере чтения,
+    поэтому мусор и слишком большие файлы отбрасываются, не дочитываясь.
+    Данные буферизуются во временном файле, в памяти — не больше
+    PDF_SPOOL_MAX_MEMORY. Одинаковые PDF хранятся в одном экземпляре.
+    Возвращает (путь в хранилище, sha256).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    header = b''
+    with tempfile.SpooledTemporaryFile(max_size=settings.PDF_SPOOL_MAX_MEMORY) as tmp:
+        for chunk in chunks:
+            if len(header) < len(PDF_MAGIC):
+                header += chunk[:len(PDF_MAGIC) - len(header)]
+                if not PDF_MAGIC.startswith(header):
+                    raise PDFRejected("File is not a PDF")
+            size += len(chunk)
+            if size > settings.PDF_MAX_SIZE:
+                raise PDFRejected(f"File is larger than {settings.PDF_MAX_SIZE} bytes")
+            digest.update(chunk)
+            tmp.write(chunk)
+        if header != PDF_MAGIC:
+            raise PDFRejected("File is not a PDF")
+
+        sha256 = digest.hexdigest()
+        name = pdf_storage_path(sha256)
+        if not default_storage.exists(name):
+            tmp.seek(0)
+            saved = default_storage.save(name, File(tmp))
+            if saved != name:
+                # Параллельная загрузка того же файла успела раньше
+                default_storage.delete(saved)
+    return name, sha256
+
+
+def ingest_telegram_pdf(file_id):
+    """Скачивает документ из Telegram потоком и сохраняет его через store_pdf_stream."""
+    client = get_telegram_client()
+    file_info = client.get_file(file_id)
+    if file_info.get('file_size', 0) > settings.PDF_MAX_SIZE:
+        raise PDFRejected(f"File is larger than {settings.PDF_MAX_SIZE} bytes")
+    with client.download_file(file_info['file_path']) as response:
+        return store_pdf_stream(response.iter_content(CHUNK_SIZE))
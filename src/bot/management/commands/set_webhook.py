@@ -0,0 +1,38 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from telegram import Bot, Update
+
+
+class Command(BaseCommand):
+    help = (
+        "Регистрирует webhook бота на TELEGRAM_WEBHOOK_URL; с --delete "
+        "удаляет его, чтобы бот снова мог работать через polling."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help="Удалить webhook")
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            asyncio.run(self._delete_webhook())
+            self.stdout.write("Webhook deleted")
+            return
+
+        if not settings.TELEGRAM_WEBHOOK_URL or not settings.TELEGRAM_WEBHOOK_SECRET:
+            raise CommandError("TELEGRAM_WEBHOOK_URL and TELEGRAM_WEBHOOK_SECRET must be set")
+        asyncio.run(self._set_webhook())
+        self.stdout.write(f"Webhook set to {settings.TELEGRAM_WEBHOOK_URL}")
+
+    async def _set_webhook(self):
+        async with Bot(token=settings.TELEGRAM_BOT_TOKEN) as bot:
+            await bot.set_webhook(
+                url=settings.TELEGRAM_WEBHOOK_URL,
+                secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+                allowed_updates=Update.ALL_TYPES
+            )
+
+    async def _delete_webhook(self):
+        async with Bot(token=settings.TELEGRAM_BOT_TOKEN) as bot:
+            await bot.delete_webhook()
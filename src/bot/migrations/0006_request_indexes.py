@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+def remove_duplicate_active_requests(apps, schema_editor):
+    """Помечает как removed все активные дубли (chat_id, doi), кроме самого раннего."""
+    Request = apps.get_model('bot', 'Request')
+    seen = set()
+    duplicates = []
+    active = Request.objects.filter(status__in=('pending', 'completed')).order_by('id')
+    for pk, chat_id, doi in active.values_list('id', 'chat_id', 'doi').iterator():
+        if (chat_id, doi) in seen:
+            duplicates.append(pk)
+        else:
+            seen.add((chat_id, doi))
+    Request.objects.filter(pk__in=duplicates).update(status='removed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0005_remove_request_request_message_id_request_message_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['chat_id', 'doi', 'status'], name='request_chat_doi_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['chat_id', 'message_id'], name='request_chat_message_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_active_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='request',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'completed'))), fields=('chat_id', 'doi'), name='unique_active_request'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from bot.doi import doi_hash, normalize_doi
+
+
+ACTIVE_STATUSES = ('pending', 'completed')
+
+
+def normalize_request_dois(apps, schema_editor):
+    """Приводит DOI существующих запросов к каноническому виду.
+
+    Иначе старые записи в смешанном регистре или в виде URL не совпадают
+    ни с новыми поисками, ни с индексом unique_active_request. Если у чата
+    уже есть активный запрос того же DOI, запрос со старым написанием
+    помечается removed.
+    """
+    Request = apps.get_model('bot', 'Request')
+    for request in Request.objects.order_by('id').iterator():
+        doi = normalize_doi(request.doi)
+        if doi == request.doi:
+            continue
+        request.doi = doi
+        fields = ['doi']
+        if request.status in ACTIVE_STATUSES and Request.objects.filter(
+            chat_id=request.chat_id, doi=doi, status__in=ACTIVE_STATUSES
+        ).exclude(pk=request.pk).exists():
+            request.status = 'removed'
+            fields.append('status')
+        request.save(update_fields=fields)
+
+
+def link_requests_to_articles(apps, schema_editor):
+    """Создаёт статьи для существующих запросов и привязывает к ним запросы и загрузки."""
+    Article = apps.get_model('bot', 'Article')
+    Request = apps.get_model('bot', 'Request')
+    PDFUpload = apps.get_model('bot', 'PDFUpload')
+    for request in Request.objects.filter(article__isnull=True).iterator():
+        article, _ = Article.objects.get_or_create(
+            doi_hash=doi_hash(request.doi),
+            defaults={'doi': normalize_doi(request.doi)}
+        )
+        request.article = article
+        request.save(update_fields=['article'])
+        PDFUpload.objects.filter(request=request).update(article=article)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0006_request_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Article',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doi', models.CharField(max_length=256)),
+                ('doi_hash', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'статья',
+                'verbose_name_plural': 'Статьи',
+            },
+        ),
+        migrations.AddField(
+            model_name='pdfupload',
+            name='article',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='uploads', to='bot.article'),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='article',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='requests', to='bot.article'),
+        ),
+        migrations.RunPython(normalize_request_dois, migrations.RunPython.noop),
+        migrations.RunPython(link_requests_to_articles, migrations.RunPython.noop),
+    ]
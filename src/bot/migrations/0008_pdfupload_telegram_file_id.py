@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0007_article'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfupload',
+            name='telegram_file_id',
+            field=models.CharField(blank=True, default='', max_length=256),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_vote_counters(apps, schema_editor):
+    """Заполняет счётчики голосов по уже существующим валидациям."""
+    PDFUpload = apps.get_model('bot', 'PDFUpload')
+    Validation = apps.get_model('bot', 'Validation')
+    votes = (
+        Validation.objects
+        .filter(pdf_upload=OuterRef('pk'))
+        .values('pdf_upload')
+    )
+    PDFUpload.objects.update(
+        votes_total=Coalesce(Subquery(votes.annotate(c=Count('pk')).values('c')), 0),
+        votes_valid=Coalesce(
+            Subquery(votes.annotate(c=Count('pk', filter=Q(vote=True))).values('c')), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0008_pdfupload_telegram_file_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfupload',
+            name='votes_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pdfupload',
+            name='votes_valid',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_vote_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0009_pdfupload_vote_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['expires_at'], name='request_pending_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0011_pdfupload_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfupload',
+            name='prevalidation_reason',
+            field=models.CharField(blank=True, default='', help_text='Why the upload was decided automatically before voting', max_length=256),
+        ),
+    ]
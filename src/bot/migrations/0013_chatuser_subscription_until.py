@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:30
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def fill_subscription_until(apps, schema_editor):
+    """Заполняет subscription_until концом последней подписки пользователя."""
+    ChatUser = apps.get_model('bot', 'ChatUser')
+    Subscription = apps.get_model('bot', 'Subscription')
+    latest = (
+        Subscription.objects
+        .filter(user=OuterRef('pk'))
+        .values('user')
+        .annotate(end=Max('end_date'))
+        .values('end')
+    )
+    ChatUser.objects.update(subscription_until=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0012_pdfupload_prevalidation_reason'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatuser',
+            name='subscription_until',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='End of the latest subscription, maintained by Subscription.save', null=True),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='start_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['user', 'end_date'], name='subscription_user_end_idx'),
+        ),
+        migrations.RunPython(fill_subscription_until, migrations.RunPython.noop),
+    ]
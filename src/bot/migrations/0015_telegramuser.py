@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+USER_FK_MODELS = ('Request', 'PDFUpload', 'Validation', 'Notification', 'Subscription')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0014_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramUser',
+            fields=[
+                ('telegram_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('username', models.CharField(blank=True, default='', max_length=255)),
+                ('join_date', models.DateTimeField(auto_now_add=True)),
+                ('is_in_bot', models.BooleanField(default=False, help_text='Whether user has interacted with the bot directly')),
+                ('upload_count', models.BigIntegerField(default=0)),
+                ('validation_count', models.BigIntegerField(default=0)),
+                ('subscription_until', models.DateTimeField(blank=True, db_index=True, help_text='End of the latest subscription, maintained by Subscription.save', null=True)),
+            ],
+            options={
+                'verbose_name': 'пользователь',
+                'verbose_name_plural': 'Пользователи',
+            },
+        ),
+        *[
+            migrations.AddField(
+                model_name=name.lower(),
+                name='telegram_user',
+                field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bot.telegramuser'),
+            )
+            for name in USER_FK_MODELS
+        ],
+    ]
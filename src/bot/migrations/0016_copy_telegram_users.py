@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# Request.user допускает NULL, поэтому запросы без пользователя Telegram
+# остаются без пользователя; строки остальных моделей без него не перенести
+REQUIRED_USER_MODELS = ('PDFUpload', 'Validation', 'Notification', 'Subscription')
+USER_FK_MODELS = ('Request', *REQUIRED_USER_MODELS)
+ORPHANS_SHOWN = 20
+
+
+def check_orphans(apps, schema_editor):
+    """Останавливает миграцию, если есть строки пользователей без telegram_id.
+
+    Это строки сотрудников, не писавших боту: TelegramUser для них нет,
+    а удалять загрузки, голоса и подписки миграция не должна. Перед
+    повторным запуском им нужно задать ChatUser.telegram_id или удалить их.
+    """
+    orphans = []
+    for name in REQUIRED_USER_MODELS:
+        model = apps.get_model('bot', name)
+        rows = model.objects.filter(user__isnull=False, user__telegram_id__isnull=True)
+        count = rows.count()
+        if count:
+            pks = list(rows.order_by('pk').values_list('pk', flat=True)[:ORPHANS_SHOWN])
+            more = f" and {count - len(pks)} more" if count > len(pks) else ""
+            orphans.append(f"{name} pk={pks}{more}")
+    if orphans:
+        raise RuntimeError(
+            "Rows owned by ChatUser without telegram_id cannot be moved to TelegramUser: "
+            + "; ".join(orphans)
+            + ". Set ChatUser.telegram_id for their owners or delete the rows, then migrate again."
+        )
+
+
+def copy_telegram_users(apps, schema_editor):
+    """Переносит пользователей Telegram из ChatUser в TelegramUser.
+
+    INSERT ... SELECT, а не bulk_create: таблица может быть большой,
+    а auto_now_add перезаписал бы join_date.
+    """
+    ChatUser = apps.get_model('bot', 'ChatUser')
+    TelegramUser = apps.get_model('bot', 'TelegramUser')
+    qn = schema_editor.quote_name
+    columns = 'telegram_id, join_date, is_in_bot, upload_count, validation_count, subscription_until'
+    schema_editor.execute(
+        f"INSERT INTO {qn(TelegramUser._meta.db_table)} (username, {columns})"
+        f" SELECT COALESCE(username, ''), {columns} FROM {qn(ChatUser._meta.db_table)}"
+        f" WHERE telegram_id IS NOT NULL"
+    )
+
+
+def fill_telegram_user(apps, schema_editor):
+    """Заполняет telegram_user по старой ссылке на ChatUser."""
+    ChatUser = apps.get_model('bot', 'ChatUser')
+    for name in USER_FK_MODELS:
+        model = apps.get_model('bot', name)
+        telegram_id = ChatUser.objects.filter(pk=OuterRef('user_id')).values('telegram_id')[:1]
+        model.objects.filter(user__isnull=False).update(telegram_user_id=Subquery(telegram_id))
+
+
+class Migration(migrations.Migration):
+    """Данные переносятся отдельно от 0015 и 0017: в PostgreSQL ALTER TABLE
+    падает с pending trigger events, если в той же транзакции менялись строки
+    таблицы с отложенными проверками FK.
+    """
+
+    dependencies = [
+        ('bot', '0015_telegramuser'),
+    ]
+
+    # Обратный шаг оставил бы новые FK пустыми, поэтому миграция необратима
+    operations = [
+        migrations.RunPython(check_orphans),
+        migrations.RunPython(copy_telegram_users),
+        migrations.RunPython(fill_telegram_user),
+    ]
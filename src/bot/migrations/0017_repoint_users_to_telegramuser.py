@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0016_copy_telegram_users'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='validation',
+            name='unique_upload',
+        ),
+        migrations.RemoveIndex(
+            model_name='subscription',
+            name='subscription_user_end_idx',
+        ),
+        migrations.RemoveField(
+            model_name='request',
+            name='user',
+        ),
+        migrations.RemoveField(
+            model_name='pdfupload',
+            name='user',
+        ),
+        migrations.RemoveField(
+            model_name='validation',
+            name='user',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='user',
+        ),
+        migrations.RemoveField(
+            model_name='subscription',
+            name='user',
+        ),
+        migrations.RenameField(
+            model_name='request',
+            old_name='telegram_user',
+            new_name='user',
+        ),
+        migrations.RenameField(
+            model_name='pdfupload',
+            old_name='telegram_user',
+            new_name='user',
+        ),
+        migrations.RenameField(
+            model_name='validation',
+            old_name='telegram_user',
+            new_name='user',
+        ),
+        migrations.RenameField(
+            model_name='notification',
+            old_name='telegram_user',
+            new_name='user',
+        ),
+        migrations.RenameField(
+            model_name='subscription',
+            old_name='telegram_user',
+            new_name='user',
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='requests', to='bot.telegramuser'),
+        ),
+        migrations.AlterField(
+            model_name='pdfupload',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='bot.telegramuser'),
+        ),
+        migrations.AlterField(
+            model_name='validation',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='validations', to='bot.telegramuser'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='bot.telegramuser'),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='bot.telegramuser'),
+        ),
+        migrations.AddConstraint(
+            model_name='validation',
+            constraint=models.UniqueConstraint(fields=('pdf_upload', 'user'), name='unique_upload'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['user', 'end_date'], name='subscription_user_end_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+from django.db import migrations
+from django.db.models import Q
+
+
+def drop_telegram_chat_users(apps, schema_editor):
+    """Оставляет в ChatUser только сотрудников.
+
+    Остальные строки уже перенесены в TelegramUser. Сотрудникам без
+    username (его раньше не задавали для пользователей Telegram)
+    назначается staff_<id>, потому что AbstractUser требует его.
+    """
+    ChatUser = apps.get_model('bot', 'ChatUser')
+    ChatUser.objects.filter(is_staff=False, is_superuser=False).delete()
+    for user in ChatUser.objects.filter(Q(username__isnull=True) | Q(username='')):
+        user.username = f'staff_{user.pk}'
+        user.save(update_fields=['username'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0017_repoint_users_to_telegramuser'),
+    ]
+
+    operations = [
+        # Удалённые строки не восстановить, поэтому миграция необратима
+        migrations.RunPython(drop_telegram_chat_users),
+    ]
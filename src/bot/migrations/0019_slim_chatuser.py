@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+import django.contrib.auth.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0018_drop_telegram_chat_users'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='chatuser',
+            options={'verbose_name': 'сотрудник', 'verbose_name_plural': 'Сотрудники'},
+        ),
+        migrations.RemoveField(
+            model_name='chatuser',
+            name='telegram_id',
+        ),
+        migrations.RemoveField(
+            model_name='chatuser',
+            name='join_date',
+        ),
+        migrations.RemoveField(
+            model_name='chatuser',
+            name='is_in_bot',
+        ),
+        migrations.RemoveField(
+            model_name='chatuser',
+            name='upload_count',
+        ),
+        migrations.RemoveField(
+            model_name='chatuser',
+            name='validation_count',
+        ),
+        migrations.RemoveField(
+            model_name='chatuser',
+            name='subscription_until',
+        ),
+        migrations.AlterField(
+            model_name='chatuser',
+            name='username',
+            field=models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username'),
+        ),
+    ]
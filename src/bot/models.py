@@ -1,9 +1,14 @@
+import time
+import uuid
 from datetime import timedelta
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.cache import cache
+from django.db import connection, models, transaction
 from django.utils import timezone
 
+from bot.doi import doi_hash, normalize_doi
+
 STATUS = (
     ('pending', 'pending'),
     ('completed', 'completed'),
@@ -21,30 +26,135 @@ REASON = (
     ('validations', 'validations')
 )
 
+OUTBOX_STATUS = (
+    ('pending', 'pending'),
+    ('sent', 'sent'),
+    ('failed', 'failed')
+)
+
+ACTIVE_REQUEST_STATUSES = ('pending', 'completed')
+
+REQUEST_TTL = timedelta(days=3)
+
+CONFIG_VERSION_KEY = 'config:version'
+CONFIG_LOCAL_TTL = 1
+
+_config_cache = {'instance': None, 'version': None, 'checked_at': 0.0}
+
 
 class ChatUser(AbstractUser):
-    """Пользователь."""
+    """Сотрудник с доступом к админке.
 
-    telegram_id = models.BigIntegerField(unique=True, null=True, blank=True)
-    username = models.CharField(max_length=25, unique=True, null=True)
+    Участники Telegram хранятся отдельно в TelegramUser, чтобы миллионы
+    их строк не несли пароль, email, группы и права Django.
+    """
+
+    class Meta:
+        verbose_name = 'сотрудник'
+        verbose_name_plural = 'Сотрудники'
+        app_label = "bot"
+
+
+class TelegramUser(models.Model):
+    """Пользователь Telegram."""
+
+    telegram_id = models.BigIntegerField(primary_key=True)
+    username = models.CharField(max_length=255, blank=True, default='')
     join_date = models.DateTimeField(auto_now_add=True)
     is_in_bot = models.BooleanField(default=False, help_text="Whether user has interacted with the bot directly")
     upload_count = models.BigIntegerField(default=0)
     validation_count = models.BigIntegerField(default=0)
+    subscription_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="End of the latest subscription, maintained by Subscription.save"
+    )
 
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
-        app_label = "bot"
 
     def __str__(self):
         return f'{self.telegram_id} {self.username}'
 
+    def increment_counter(self, field):
+        """Атомарно увеличивает upload_count или validation_count на 1.
+
+        Выполняет один UPDATE ... RETURNING, поэтому параллельные воркеры
+        не теряют инкременты. Возвращает новое значение счётчика.
+        """
+        value = type(self).bulk_increment_counter(field, {self.pk: 1})[self.pk]
+        setattr(self, field, value)
+        return value
+
+    @classmethod
+    def bulk_increment_counter(cls, field, deltas):
+        """Увеличивает счётчик field у пачки пользователей {telegram_id: на сколько}.
+
+        Один UPDATE ... RETURNING на каждое различное значение прибавки.
+        Возвращает {telegram_id: новое значение}.
+        """
+        if field not in ('upload_count', 'validation_count'):
+            raise ValueError(f"Unknown counter: {field}")
+        qn = connection.ops.quote_name
+        table = qn(cls._meta.db_table)
+        pk = qn(cls._meta.pk.column)
+        column = qn(cls._meta.get_field(field).column)
+        by_delta = {}
+        for telegram_id, delta in deltas.items():
+            by_delta.setdefault(delta, []).append(telegram_id)
+        values = {}
+        with connection.cursor() as cursor:
+            for delta, ids in by_delta.items():
+                cursor.execute(
+                    f"UPDATE {table} SET {column} = {column} + %s"
+                    f" WHERE {pk} IN ({', '.join(['%s'] * len(ids))}) RETURNING {pk}, {column}",
+                    [delta, *ids]
+                )
+                values.update(cursor.fetchall())
+        return values
+
+    @property
+    def has_active_subscription(self):
+        return self.subscription_until is not None and self.subscription_until > timezone.now()
+
+
+class Article(models.Model):
+    """Статья, общая для всех запросов с одинаковым нормализованным DOI."""
+
+    doi = models.CharField(max_length=256)
+    doi_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'статья'
+        verbose_name_plural = 'Статьи'
+
+    @classmethod
+    def get_for_doi(cls, doi):
+        """Возвращает статью по DOI в любом написании, создавая её при необходимости."""
+        instance, created = cls.objects.get_or_create(
+            doi_hash=doi_hash(doi),
+            defaults={'doi': normalize_doi(doi)}
+        )
+        return instance
+
+    def __str__(self):
+        return self.doi
+
 
 class Request(models.Model):
     """Запрос PDF."""
 
     doi = models.CharField(max_length=256)
+    article = models.ForeignKey(
+        Article,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='requests'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     status = models.CharField(
@@ -53,7 +163,7 @@ class Request(models.Model):
     )
     chat_id = models.BigIntegerField()
     user = models.ForeignKey(
-        ChatUser,
+        TelegramUser,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -62,13 +172,29 @@ class Request(models.Model):
     message_id = models.IntegerField(default=0)
 
     class Meta:
+        indexes = [
+            models.Index(fields=['chat_id', 'doi', 'status'], name='request_chat_doi_status_idx'),
+            models.Index(fields=['chat_id', 'message_id'], name='request_chat_message_idx'),
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(status='pending'),
+                name='request_pending_expires_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['chat_id', 'doi'],
+                condition=models.Q(status__in=ACTIVE_REQUEST_STATUSES),
+                name='unique_active_request'
+            ),
+        ]
         verbose_name = 'запрос'
         verbose_name_plural = 'Запросы'
 
     def save(self, *args, **kwargs):
         if not self.pk:
             self.created_at = timezone.now()
-            self.expires_at = self.created_at + timedelta(days=3)
+            self.expires_at = self.created_at + REQUEST_TTL
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -79,22 +205,38 @@ class PDFUpload(models.Model):
     """Загрузка PDF."""
 
     request = models.ForeignKey(Request, on_delete=models.CASCADE, related_name='uploads')
+    article = models.ForeignKey(
+        Article,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='uploads'
+    )
     file = models.FileField(upload_to='pdfs/')
+    telegram_file_id = models.CharField(max_length=256, blank=True, default='')
+    sha256 = models.CharField(max_length=64, blank=True, default='', db_index=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     validated_at = models.DateTimeField(null=True, blank=True)
     is_valid = models.BooleanField(null=True, blank=True)
+    votes_total = models.PositiveIntegerField(default=0)
+    votes_valid = models.PositiveIntegerField(default=0)
+    prevalidation_reason = models.CharField(
+        max_length=256,
+        blank=True,
+        default='',
+        help_text="Why the upload was decided automatically before voting"
+    )
     delete_at = models.DateTimeField(null=True, blank=True)
     chat_message_id = models.BigIntegerField()
-    user = models.ForeignKey(ChatUser, on_delete=models.CASCADE, related_name='uploads')
+    user = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, related_name='uploads')
 
     class Meta:
         verbose_name = 'загрузка PDF'
         verbose_name_plural = 'Загрузки PDF'
 
     def save(self, *args, **kwargs):
-        if not self.pk:
-            if self.validated_at:
-                self.delete_at = self.validated_at + timedelta(days=3)
+        if self.validated_at and not self.delete_at:
+            self.delete_at = self.validated_at + timedelta(days=3)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -105,7 +247,7 @@ class Validation(models.Model):
     """Валидация PDF."""
 
     pdf_upload = models.ForeignKey(PDFUpload, on_delete=models.CASCADE, related_name='validations')
-    user = models.ForeignKey(ChatUser, on_delete=models.CASCADE, related_name='validations')
+    user = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, related_name='validations')
     vote = models.BooleanField()
     voted_at = models.DateTimeField(auto_now_add=True)
 
@@ -133,7 +275,7 @@ class Validation(models.Model):
 class Notification(models.Model):
     """Уведомление."""
 
-    user = models.ForeignKey(ChatUser, on_delete=models.CASCADE, related_name='notifications')
+    user = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, related_name='notifications')
     type = models.CharField(
         max_length=25,
         choices=TYPE,
@@ -158,8 +300,8 @@ class Notification(models.Model):
 class Subscription(models.Model):
     """Подписка."""
 
-    user = models.ForeignKey(ChatUser, on_delete=models.CASCADE, related_name='subscriptions')
-    start_date = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, related_name='subscriptions')
+    start_date = models.DateTimeField(default=timezone.now)
     end_date = models.DateTimeField()
     reason = models.CharField(
         max_length=25,
@@ -169,11 +311,90 @@ class Subscription(models.Model):
     class Meta:
         verbose_name = 'подписка'
         verbose_name_plural = 'Подписки'
+        indexes = [
+            models.Index(fields=['user', 'end_date'], name='subscription_user_end_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Сохраняет подписку и в той же транзакции обновляет TelegramUser.subscription_until.
+
+        Новая или продлённая подписка только сдвигает дату вперёд; если
+        end_date уменьшен или подписка передана другому пользователю,
+        дата пересчитывается по оставшимся подпискам.
+        """
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = (
+                    Subscription.objects
+                    .filter(pk=self.pk)
+                    .values_list('user_id', 'end_date')
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            if previous and (previous[0] != self.user_id or previous[1] > self.end_date):
+                Subscription.refresh_subscription_until({previous[0], self.user_id})
+                self.user.refresh_from_db(fields=['subscription_until'])
+                return
+            TelegramUser.objects.filter(
+                models.Q(subscription_until__isnull=True) | models.Q(subscription_until__lt=self.end_date),
+                pk=self.user_id,
+            ).update(subscription_until=self.end_date)
+        user = self.user
+        if user.subscription_until is None or user.subscription_until < self.end_date:
+            user.subscription_until = self.end_date
+
+    @classmethod
+    def refresh_subscription_until(cls, user_ids):
+        """Пересчитывает TelegramUser.subscription_until как Max(end_date) подписок пользователей."""
+        latest = (
+            cls.objects
+            .filter(user=models.OuterRef('pk'))
+            .values('user')
+            .annotate(end=models.Max('end_date'))
+            .values('end')
+        )
+        TelegramUser.objects.filter(pk__in=user_ids).update(subscription_until=models.Subquery(latest))
 
     def __str__(self):
         return f'{self.user} {self.start_date}'
 
 
+class OutboxMessage(models.Model):
+    """Вызов Telegram, записанный в той же транзакции, что и изменение данных.
+
+    Отправляется после коммита задачей dispatch_outbox_task (см. bot.outbox).
+    """
+
+    idempotency_key = models.CharField(max_length=128, unique=True)
+    method = models.CharField(max_length=64)
+    params = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=25,
+        choices=OUTBOX_STATUS,
+        default='pending',
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(status='pending'),
+                name='outbox_pending_next_idx'
+            ),
+        ]
+        verbose_name = 'исходящий вызов Telegram'
+        verbose_name_plural = 'Исходящие вызовы Telegram'
+
+    def __str__(self):
+        return f'{self.method} {self.idempotency_key} {self.status}'
+
+
 class Config(models.Model):
     """Model for storing configurable threshold values and other parameters.
     Designed to have only one instance that can be edited through Django Admin.
@@ -200,3 +421,28 @@ class Config(models.Model):
         """
         instance, created = cls.objects.get_or_create(pk=1)
         return instance
+
+    @classmethod
+    def get_cached(cls):
+        """Get the Config from the process-local cache.
+
+        The local copy is trusted for CONFIG_LOCAL_TTL seconds. After that the
+        shared version key is compared and the row is re-read from the DB only
+        if another process has saved the Config in the meantime.
+        """
+        now = time.monotonic()
+        instance = _config_cache['instance']
+        if instance is not None and now - _config_cache['checked_at'] < CONFIG_LOCAL_TTL:
+            return instance
+
+        version = cache.get(CONFIG_VERSION_KEY)
+        if instance is None or version != _config_cache['version']:
+            instance = cls.get_instance()
+        _config_cache.update(instance=instance, version=version, checked_at=now)
+        return instance
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop the local copy and bump the shared version key for other processes."""
+        cache.set(CONFIG_VERSION_KEY, uuid.uuid4().hex, None)
+        _config_cache.update(instance=None, version=None, checked_at=0.0)
@@ -0,0 +1,115 @@
+import logging
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from bot.models import OutboxMessage
+from bot.rate_limit import get_rate_limiter
+from bot.telegram_client import TelegramAPIError, get_telegram_client
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_telegram(idempotency_key, method, **params):
+    """Записывает вызов метода TelegramClient в outbox в текущей транзакции.
+
+    Вызов уйдёт только после коммита; при откате транзакции он исчезает
+    вместе с остальными изменениями. Повторная запись с тем же
+    idempotency_key ничего не добавляет. Возвращает OutboxMessage.
+    """
+    params = {
+        key: value.to_dict() if hasattr(value, 'to_dict') else value
+        for key, value in params.items()
+    }
+    message, created = OutboxMessage.objects.get_or_create(
+        idempotency_key=idempotency_key,
+        defaults={'method': method, 'params': params}
+    )
+    if created:
+        # Импорт здесь, чтобы избежать циклического импорта bot.tasks -> bot.outbox
+        from bot.tasks import dispatch_outbox_task
+        transaction.on_commit(dispatch_outbox_task.delay)
+    return message
+
+
+def claim_batch(limit):
+    """Забирает до limit готовых к отправке сообщений.
+
+    Выбранные строки сдвигаются на OUTBOX_LEASE секунд вперёд, поэтому
+    параллельный диспетчер их не возьмёт, а сообщения упавшего воркера
+    будут отправлены повторно после истечения аренды.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        OutboxMessage.objects.filter(id__in=ids).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE)
+        )
+    return list(OutboxMessage.objects.filter(id__in=ids).order_by('next_attempt_at', 'id'))
+
+
+def deliver(message):
+    """Отправляет одно сообщение outbox и сохраняет результат.
+
+    429 и нехватка токенов в лимитере переносят отправку без расхода
+    попыток. Сетевые ошибки и ответы 5xx повторяются с экспоненциальной
+    задержкой до OUTBOX_MAX_ATTEMPTS раз, остальные ошибки Telegram
+    (бот заблокирован, сообщение не найдено) окончательные.
+    Возвращает True, если сообщение отправлено.
+    """
+    if settings.TELEGRAM_RATE_LIMIT_ENABLED:
+        wait = get_rate_limiter().acquire(message.params.get('chat_id'))
+        if wait:
+            _retry_later(message, wait)
+            return False
+    try:
+        getattr(get_telegram_client(), message.method)(**message.params)
+    except TelegramAPIError as e:
+        if e.error_code == 429:
+            _retry_later(message, e.retry_after or 1)
+        elif e.error_code >= 500:
+            _record_failure(message, e)
+        else:
+            _record_failure(message, e, permanent=True)
+        return False
+    except requests.RequestException as e:
+        _record_failure(message, e)
+        return False
+
+    message.status = 'sent'
+    message.sent_at = timezone.now()
+    message.save(update_fields=['status', 'sent_at'])
+    return True
+
+
+def _retry_later(message, delay):
+    message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    message.save(update_fields=['next_attempt_at'])
+
+
+def _record_failure(message, error, permanent=False):
+    message.attempts += 1
+    message.last_error = str(error)
+    if permanent or message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = 'failed'
+        logger.error(f"Outbox message {message.idempotency_key} failed: {error}")
+    else:
+        delay = min(
+            settings.OUTBOX_RETRY_BASE * 2 ** (message.attempts - 1),
+            settings.OUTBOX_RETRY_MAX
+        )
+        message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        logger.warning(
+            f"Outbox message {message.idempotency_key} attempt {message.attempts} failed,"
+            f" retry in {delay}s: {error}"
+        )
+    message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
@@ -0,0 +1,187 @@
+import re
+import zlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from bot.doi import normalize_doi
+
+OBJECT_REGEX = re.compile(rb'(\d+)\s+\d+\s+obj\b(.*?)\bendobj', re.DOTALL)
+STREAM_REGEX = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.DOTALL)
+TYPE_REGEX = re.compile(rb'/Type\s*/(\w+)')
+REF_REGEX = re.compile(rb'(\d+)\s+\d+\s+R\b')
+PAGES_REF_REGEX = re.compile(rb'/Pages\s+(\d+)\s+\d+\s+R\b')
+KIDS_REGEX = re.compile(rb'/Kids\s*\[([^\]]*)\]')
+CONTENTS_REGEX = re.compile(rb'/Contents\s*(\[[^\]]*\]|\d+\s+\d+\s+R\b)')
+COUNT_REGEX = re.compile(rb'/Count\s+(\d+)')
+FIRST_REGEX = re.compile(rb'/First\s+(\d+)')
+TEXT_ARRAY_REGEX = re.compile(rb'\[((?:\\.|[^\]\\])*)\]\s*TJ', re.DOTALL)
+TEXT_STRING_REGEX = re.compile(rb'\(((?:\\.|[^()\\])*)\)', re.DOTALL)
+ENCRYPT_REGEX = re.compile(rb'/Encrypt\b')
+# Символы DOI по рекомендации Crossref; слева DOI не должен продолжать
+# другое слово или число, справа его обрывает первый посторонний символ
+DOI_REGEX = re.compile(r'(?<![\w.])10\.\d{4,9}/[-._;()/:a-z0-9]+')
+
+TRAILER_SIZE = 4096
+DOI_TRAILING_CHARS = '.,;:'
+PAGE_TREE_MAX_DEPTH = 32
+
+ACCEPTED = 'accepted'
+REJECTED = 'rejected'
+
+
+def prevalidate_pdf(name, requested_doi):
+    """Дешёвая автоматическая проверка загруженного PDF до голосования.
+
+    Читает только первые PREVALIDATION_MAX_BYTES байт файла и хвост
+    с trailer, находит по дереву страниц первую страницу и ищет DOI
+    в её тексте. Возвращает (вердикт, причина): вердикт ACCEPTED, если
+    запрошенный DOI встречается на первой странице не реже любого
+    другого, REJECTED для зашифрованных файлов, файлов без страниц
+    и файлов, на первой странице которых есть только чужие DOI, иначе
+    None — решение остаётся за голосованием. DOI из списка литературы
+    на дальних страницах на вердикт не влияют.
+    """
+    with default_storage.open(name, 'rb') as f:
+        head = f.read(settings.PREVALIDATION_MAX_BYTES)
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(size - TRAILER_SIZE, len(head)))
+        tail = f.read()
+
+    if ENCRYPT_REGEX.search(head) or ENCRYPT_REGEX.search(tail):
+        return REJECTED, 'encrypted'
+
+    objects = _objects(head)
+    pages = _page_tree_root(objects)
+    if pages is not None:
+        count = COUNT_REGEX.search(pages)
+        if count and int(count.group(1)) == 0:
+            return REJECTED, 'no pages'
+
+    text = _first_page_text(objects, pages)
+    if text is None:
+        return None, 'undecided'
+
+    requested = normalize_doi(requested_doi)
+    found = Counter(_extract_dois(text))
+    others = {
+        doi: count for doi, count in found.items()
+        # DOI, обрезанный переносом строки, — не чужой DOI
+        if doi != requested and not requested.startswith(doi)
+    }
+    if found[requested]:
+        if found[requested] >= max(others.values(), default=0):
+            return ACCEPTED, 'doi match'
+        return None, 'undecided'
+    if others:
+        return REJECTED, f"doi mismatch: {', '.join(sorted(others)[:3])}"
+    return None, 'undecided'
+
+
+def _objects(head):
+    """Возвращает {номер: тело} объектов из начала файла, включая объекты из /ObjStm.
+
+    Более поздние определения (инкрементальные обновления) перекрывают
+    ранние; распаковывается не больше PREVALIDATION_MAX_STREAMS потоков объектов.
+    """
+    objects = {int(num): body for num, body in OBJECT_REGEX.findall(head)}
+    packed = [body for body in objects.values() if b'ObjStm' in _types(body)]
+    for body in packed[:settings.PREVALIDATION_MAX_STREAMS]:
+        first = FIRST_REGEX.search(body)
+        data = _stream(body)
+        if not first or data is None:
+            continue
+        first = int(first.group(1))
+        header = data[:first].split()
+        try:
+            entries = [(int(header[i]), int(header[i + 1])) for i in range(0, len(header) - 1, 2)]
+        except ValueError:
+            # Испорченный заголовок: объекты потока найти нельзя, пропускаем его
+            continue
+        for i, (num, offset) in enumerate(entries):
+            end = entries[i + 1][1] if i + 1 < len(entries) else len(data) - first
+            objects.setdefault(num, data[first + offset:first + end])
+    return objects
+
+
+def _page_tree_root(objects):
+    """Возвращает тело корневого /Pages из каталога документа или None."""
+    for body in objects.values():
+        if b'Catalog' in _types(body):
+            ref = PAGES_REF_REGEX.search(body)
+            return objects.get(int(ref.group(1))) if ref else None
+    return None
+
+
+def _first_page_text(objects, node):
+    """Спускается по /Kids до первой страницы и возвращает текст её потоков содержимого.
+
+    Возвращает None, если страницу или её содержимое не удалось найти
+    в прочитанном начале файла.
+    """
+    for _ in range(PAGE_TREE_MAX_DEPTH):
+        if node is None:
+            return None
+        if b'Pages' not in _types(node):
+            break
+        kids = KIDS_REGEX.search(node)
+        kid = REF_REGEX.search(kids.group(1)) if kids else None
+        node = objects.get(int(kid.group(1))) if kid else None
+    else:
+        return None
+
+    contents = CONTENTS_REGEX.search(node)
+    if not contents:
+        return None
+    streams = [
+        _stream(objects.get(int(num), b''))
+        for num in REF_REGEX.findall(contents.group(1))
+    ]
+    streams = [data for data in streams if data is not None]
+    if not streams:
+        return None
+    return '\n'.join(_text(data) for data in streams)
+
+
+def _stream(body):
+    """Возвращает распакованные данные потока объекта, ограничивая их размер."""
+    match = STREAM_REGEX.search(body)
+    if not match:
+        return None
+    data = match.group(1)
+    try:
+        return zlib.decompressobj().decompress(data, settings.PREVALIDATION_MAX_BYTES)
+    except zlib.error:
+        return data
+
+
+def _text(data):
+    """Собирает строки показа текста; массивы TJ, разбитые кернингом, склеиваются."""
+    data = TEXT_ARRAY_REGEX.sub(
+        lambda match: b'(' + b''.join(TEXT_STRING_REGEX.findall(match.group(1))) + b')',
+        data
+    )
+    strings = (_unescape(s) for s in TEXT_STRING_REGEX.findall(data))
+    return b'\n'.join(strings).decode('latin-1').lower()
+
+
+def _extract_dois(text):
+    """Находит DOI в тексте и приводит их к виду normalize_doi."""
+    dois = []
+    for doi in DOI_REGEX.findall(text):
+        doi = doi.rstrip(DOI_TRAILING_CHARS)
+        # Закрывающая скобка без открывающей — пунктуация вокруг DOI
+        while doi.endswith(')') and doi.count(')') > doi.count('('):
+            doi = doi[:-1].rstrip(DOI_TRAILING_CHARS)
+        dois.append(normalize_doi(doi))
+    return dois
+
+
+def _types(body):
+    return set(TYPE_REGEX.findall(body))
+
+
+def _unescape(value):
+    return re.sub(rb'\\([()\\])', rb'\1', value)
@@ -0,0 +1,90 @@
+import redis
+from django.conf import settings
+
+# Атомарно списывает по одному токену из всех корзин KEYS или не списывает ничего.
+# ARGV — пары (rate в токенах/сек, capacity) для каждой корзины и последним флаг reserve.
+# Возвращает 0, если токены списаны, иначе сколько секунд ждать. С reserve=1 токены
+# списываются и при нехватке: баланс уходит в минус, и ожидание — это место вызова
+# в очереди, поэтому отложенные вызовы не просыпаются одновременно.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local reserve = ARGV[#ARGV] == '1'
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local capacity = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate)
+    tokens[i] = available
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local capacity = tonumber(ARGV[2 * i])
+    local available = tokens[i]
+    if wait == 0 or reserve then
+        available = available - 1
+    end
+    redis.call('HSET', key, 'tokens', available, 'ts', now)
+    -- Ключ живёт, пока корзина не наполнится, в том числе после резервов в долг
+    redis.call('EXPIRE', key, math.ceil((capacity - available) / rate) + 1)
+end
+return tostring(wait)
+"""
+
+_limiter = None
+
+
+class TokenBucketLimiter:
+    """Распределённый token bucket для исходящих вызовов Telegram Bot API.
+
+    Каждый вызов берёт токен из глобальной корзины и, если известен chat_id,
+    из корзины чата. Лимиты групп (chat_id < 0) и личных чатов различаются.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def buckets(self, chat_id=None):
+        """Возвращает [(ключ, rate, capacity)] корзин, через которые идёт вызов."""
+        buckets = [(
+            'telegram:rate:global',
+            settings.TELEGRAM_GLOBAL_RATE,
+            settings.TELEGRAM_GLOBAL_RATE,
+        )]
+        if chat_id is not None:
+            if int(chat_id) < 0:
+                rate, capacity = settings.TELEGRAM_GROUP_RATE, settings.TELEGRAM_GROUP_BURST
+            else:
+                rate, capacity = settings.TELEGRAM_CHAT_RATE, settings.TELEGRAM_CHAT_BURST
+            buckets.append((f'telegram:rate:chat:{chat_id}', rate, capacity))
+        return buckets
+
+    def acquire(self, chat_id=None, reserve=False):
+        """Пытается взять токен. Возвращает 0 при успехе или секунды до повтора.
+
+        С reserve токен берётся и при пустой корзине, а возвращённое время —
+        момент, когда подойдёт очередь вызова: через столько секунд вызов
+        надо выполнить, не запрашивая токен повторно.
+        """
+        buckets = self.buckets(chat_id)
+        args = []
+        for _, rate, capacity in buckets:
+            args.extend([rate, capacity])
+        args.append(int(reserve))
+        return float(self.script(keys=[key for key, _, _ in buckets], args=args))
+
+
+def get_rate_limiter():
+    """Возвращает общий для процесса TokenBucketLimiter."""
+    global _limiter
+    if _limiter is None:
+        _limiter = TokenBucketLimiter(redis.Redis.from_url(settings.TELEGRAM_RATE_LIMIT_REDIS_URL))
+    return _limiter
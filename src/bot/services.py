@@ -1,57 +1,301 @@
+import hashlib
+import json
+import logging
+
 from dateutil.relativedelta import relativedelta
-from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
-from telegram import Bot
 
-from bot.models import Config, Subscription
+from bot.doi import doi_hash
+from bot.models import (
+    ACTIVE_REQUEST_STATUSES,
+    CONFIG_VERSION_KEY,
+    REQUEST_TTL,
+    Article,
+    Config,
+    PDFUpload,
+    Request,
+    Subscription,
+    TelegramUser,
+)
+from bot.outbox import enqueue_telegram
+from bot.users import ensure_telegram_users
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 500
+
+VALIDATED_PDF_CACHE_KEY = 'validated_pdf:{}'
+USER_STATS_CACHE_KEY = 'user_stats:{}'
+USER_STATS_CACHE_TTL = 60 * 60
+ENTITLEMENTS_CACHE_KEY = 'entitlements:{}'
+ENTITLEMENTS_CACHE_TTL = 30
 
 
-def check_and_award_subscription(chat_user):
-    """Проверяет, достиг ли пользователь порога загрузок (Z) или проверок (H),
+def check_and_award_subscription(user, reason, count, added=1):
+    """Проверяет, достиг ли счётчик count порога загрузок (Z) или проверок (H),
     и выдаёт подписку, если достиг.
-    """
-    config = Config.objects.first()
-    if not config:
-        return False
 
-    awarded = False
+    reason — 'uploads' или 'validations', count — новое значение счётчика,
+    полученное из TelegramUser.increment_counter, added — на сколько он вырос.
+    """
+    config = Config.get_cached()
 
-    z = config.uploads_for_subscription
-    if z and chat_user.upload_count and chat_user.upload_count % z == 0:
-        award_subscription(chat_user, reason='uploads')
-        awarded = True
+    if reason == 'uploads':
+        threshold = config.uploads_for_subscription
+    else:
+        threshold = config.validations_for_subscription
 
-    h = config.validations_for_subscription
-    if h and chat_user.validation_count and chat_user.validation_count % h == 0:
-        award_subscription(chat_user, reason='validations')
-        awarded = True
+    if threshold and count and count // threshold > (count - added) // threshold:
+        award_subscription(user, reason=reason)
+        return True
 
-    return awarded
+    return False
 
 
-def award_subscription(chat_user, reason):
+def award_subscription(user, reason):
     """Создаёт запись Subscription и уведомляет пользователя через Telegram.
+
+    Новый период начинается с конца текущей подписки (TelegramUser.subscription_until),
+    если она ещё активна. Уведомление пишется в outbox в той же транзакции.
     """
-    last = Subscription.objects.filter(user=chat_user).order_by('-end_date').first()
-    start_date = timezone.now()
-    if last and last.end_date > start_date:
-        start_date = last.end_date
-
-    end_date = start_date + relativedelta(months=1)
-
-    sub = Subscription.objects.create(
-        user=chat_user,
-        start_date=start_date,
-        end_date=end_date,
-        reason=reason
-    )
+    with transaction.atomic():
+        # Блокируем строку пользователя, чтобы параллельные выдачи выстроились в цепочку
+        until, is_in_bot = (
+            TelegramUser.objects.select_for_update()
+            .values_list('subscription_until', 'is_in_bot')
+            .get(pk=user.pk)
+        )
+        start_date = timezone.now()
+        if until and until > start_date:
+            start_date = until
 
-    bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
-    if chat_user.has_bot:
-        bot.send_message(
-            chat_id=chat_user.user_id,
-            text=(f"🎉 Поздравляем! Вам выдана подписка до {end_date.date()}"
-                  f" за {reason}.")
+        end_date = start_date + relativedelta(months=1)
+
+        sub = Subscription.objects.create(
+            user_id=user.pk,
+            start_date=start_date,
+            end_date=end_date,
+            reason=reason
         )
+
+        if is_in_bot:
+            # Уведомление уйдёт только после коммита, не задерживая транзакцию
+            enqueue_telegram(
+                f'subscription:{sub.pk}',
+                'send_message',
+                chat_id=user.pk,
+                text=(f"🎉 Поздравляем! Вам выдана подписка до {end_date.date()}"
+                      f" за {reason}.")
+            )
     # TODO: при необходимости уведомить основной бот SciSourceBot через API
     return sub
+
+
+def get_validated_pdf(article):
+    """Возвращает {pdf_id, file_id, file} проверенного PDF статьи или None.
+
+    Сначала смотрит в кеш, при промахе ищет в БД актуальную загрузку
+    с is_valid=True и кладёт её в кеш до PDFUpload.delete_at.
+    """
+    entry = cache.get(VALIDATED_PDF_CACHE_KEY.format(article.doi_hash))
+    if entry is not None:
+        return entry
+
+    pdf = (
+        PDFUpload.objects
+        .filter(article=article, is_valid=True)
+        .exclude(telegram_file_id='')
+        .filter(Q(delete_at__isnull=True) | Q(delete_at__gt=timezone.now()))
+        .order_by('-validated_at')
+        .first()
+    )
+    if pdf is None:
+        return None
+    return cache_validated_pdf(pdf, article)
+
+
+def cache_validated_pdf(pdf, article):
+    """Кладёт проверенный PDF в кеш статьи; запись живёт до PDFUpload.delete_at."""
+    entry = {'pdf_id': pdf.id, 'file_id': pdf.telegram_file_id, 'file': pdf.file.name}
+    timeout = None
+    if pdf.delete_at:
+        timeout = (pdf.delete_at - timezone.now()).total_seconds()
+    cache.set(VALIDATED_PDF_CACHE_KEY.format(article.doi_hash), entry, timeout)
+    return entry
+
+
+def forget_validated_pdf(article):
+    """Сбрасывает кеш статьи, когда её PDF после новых голосов признан непроверенным.
+
+    Следующий get_validated_pdf заново найдёт в БД другую проверенную загрузку, если она есть.
+    """
+    cache.delete(VALIDATED_PDF_CACHE_KEY.format(article.doi_hash))
+
+
+def get_user_stats(telegram_id):
+    """Возвращает снимок статистики пользователя для /stats или None.
+
+    Снимок {upload_count, validation_count, subscription_until,
+    uploads_for_subscription, validations_for_subscription} берётся
+    из кеша вместе с версией Config одной операцией (MGET); при промахе
+    или смене Config он читается из строки TelegramUser и кладётся в кеш.
+    Кеш сбрасывается при изменении счётчиков и подписок
+    (см. invalidate_user_stats в bot.signals).
+    """
+    key = USER_STATS_CACHE_KEY.format(telegram_id)
+    cached = cache.get_many([key, CONFIG_VERSION_KEY])
+    version = cached.get(CONFIG_VERSION_KEY)
+    stats = cached.get(key)
+    if stats is not None and stats['config_version'] == version:
+        return stats
+
+    stats = (
+        TelegramUser.objects
+        .filter(pk=telegram_id)
+        .values('upload_count', 'validation_count', 'subscription_until')
+        .first()
+    )
+    if stats is None:
+        return None
+    config = Config.get_cached()
+    stats.update(
+        uploads_for_subscription=config.uploads_for_subscription,
+        validations_for_subscription=config.validations_for_subscription,
+        config_version=version,
+    )
+    cache.set(key, stats, USER_STATS_CACHE_TTL)
+    return stats
+
+
+def invalidate_user_stats(telegram_id):
+    """Сбрасывает снимок статистики пользователя после коммита транзакции."""
+    if telegram_id is None:
+        return
+    transaction.on_commit(lambda: cache.delete(USER_STATS_CACHE_KEY.format(telegram_id)))
+
+
+def get_entitlements(telegram_ids):
+    """Возвращает (entitlements, etag) для пачки telegram_id.
+
+    entitlements — список {telegram_id, subscription_until} только для
+    пользователей с активной подпиской, собранный одним запросом по
+    индексу TelegramUser.subscription_until. Результат кешируется на
+    ENTITLEMENTS_CACHE_TTL секунд по набору id; etag — хеш содержимого.
+    """
+    ids = sorted(set(telegram_ids))
+    key = ENTITLEMENTS_CACHE_KEY.format(
+        hashlib.sha256(','.join(map(str, ids)).encode()).hexdigest()
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = (
+        TelegramUser.objects
+        .filter(telegram_id__in=ids, subscription_until__gt=timezone.now())
+        .order_by('telegram_id')
+        .values_list('telegram_id', 'subscription_until')
+    )
+    entitlements = [
+        {'telegram_id': telegram_id, 'subscription_until': until.isoformat()}
+        for telegram_id, until in rows
+    ]
+    etag = hashlib.sha256(json.dumps(entitlements).encode()).hexdigest()
+    cache.set(key, (entitlements, etag), ENTITLEMENTS_CACHE_TTL)
+    return entitlements, etag
+
+
+def bulk_create_requests(items):
+    """Сохраняет пачку запросов {chat_id, message_id, doi} несколькими запросами к БД.
+
+    DOI в items должны быть уже нормализованы (см. RequestSerializer).
+
+    Пользователи и уже активные (pending/completed) запросы выбираются
+    одним запросом на пачку, новые строки вставляются через bulk_create
+    в одной транзакции. Строки, проигравшие гонку параллельной вставке
+    на индексе unique_active_request, тоже считаются 'duplicate'.
+    Возвращает список результатов в порядке items: 'created' или 'duplicate'.
+    """
+    chat_ids = {item['chat_id'] for item in items}
+    dois = {item['doi'] for item in items}
+
+    with transaction.atomic():
+        ensure_telegram_users(dict.fromkeys(chat_ids), is_in_bot=True)
+        articles = _get_or_create_articles(dois)
+
+        seen = set(
+            Request.objects.filter(
+                chat_id__in=chat_ids,
+                doi__in=dois,
+                status__in=ACTIVE_REQUEST_STATUSES,
+            ).values_list('chat_id', 'doi')
+        )
+
+        now = timezone.now()
+        to_create = []
+        results = []
+        pending = {}
+        for item in items:
+            key = (item['chat_id'], item['doi'])
+            if key in seen:
+                results.append({**item, 'status': 'duplicate'})
+                continue
+            seen.add(key)
+            to_create.append(Request(
+                doi=item['doi'],
+                article=articles[item['doi']],
+                status='pending',
+                chat_id=item['chat_id'],
+                user_id=item['chat_id'],
+                message_id=item['message_id'],
+                created_at=now,
+                expires_at=now + REQUEST_TTL,
+            ))
+            pending[key] = len(results)
+            results.append({**item, 'status': 'created'})
+
+        # Гонку с параллельной вставкой закрывает индекс unique_active_request:
+        # конфликтующие строки молча пропускаются, поэтому сверяем, какие
+        # из них действительно вставлены (created_at проставляется каждой строке)
+        Request.objects.bulk_create(
+            to_create, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True
+        )
+        inserted = set(
+            Request.objects.filter(
+                chat_id__in=chat_ids,
+                doi__in=dois,
+                status__in=ACTIVE_REQUEST_STATUSES,
+            ).values_list('chat_id', 'doi', 'created_at')
+        ) & {(r.chat_id, r.doi, r.created_at) for r in to_create}
+        inserted = {(chat_id, doi) for chat_id, doi, _ in inserted}
+        for key, index in pending.items():
+            if key not in inserted:
+                results[index]['status'] = 'duplicate'
+
+    created = len(inserted)
+    logger.info(f"Bulk request: {created} created, {len(items) - created} duplicates")
+    return results
+
+
+def _get_or_create_articles(dois):
+    """Возвращает {doi: Article} для нормализованных DOI, создавая недостающие статьи пачкой."""
+    hashes = {doi_hash(doi): doi for doi in dois}
+    articles = {
+        article.doi: article
+        for article in Article.objects.filter(doi_hash__in=hashes)
+    }
+    missing = {h: doi for h, doi in hashes.items() if doi not in articles}
+    if missing:
+        Article.objects.bulk_create(
+            [Article(doi=doi, doi_hash=h) for h, doi in missing.items()],
+            batch_size=BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        articles.update(
+            (article.doi, article)
+            for article in Article.objects.filter(doi_hash__in=missing)
+        )
+    return articles
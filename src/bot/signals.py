@@ -1,8 +1,10 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from bot.models import PDFUpload, Validation
-from bot.services import check_and_award_subscription
+from bot.models import Config, PDFUpload, Subscription, TelegramUser, Validation
+from bot.services import check_and_award_subscription, invalidate_user_stats
+from bot.users import forget_telegram_user
 
 
 @receiver(post_save, sender=PDFUpload)
@@ -10,14 +12,15 @@ def on_pdfupload_created(sender, instance, created, **kwargs):
     """Сигнал: при создании PDFUpload инкрементим счетчик загрузок
     и проверяем достижение порога подписки.
     """
-    if not created or instance.user is None:
+    if not created or instance.user_id is None:
         return
 
-    user = instance.user
-    user.upload_count = (user.upload_count or 0) + 1
-    user.save(update_fields=['upload_count'])
-
-    check_and_award_subscription(user)
+    # По user_id, без загрузки instance.user: один UPDATE ... RETURNING
+    counts = TelegramUser.bulk_increment_counter('upload_count', {instance.user_id: 1})
+    invalidate_user_stats(instance.user_id)
+    check_and_award_subscription(
+        TelegramUser(pk=instance.user_id), 'uploads', counts[instance.user_id]
+    )
 
 
 @receiver(post_save, sender=Validation)
@@ -25,11 +28,41 @@ def on_validation_created(sender, instance, created, **kwargs):
     """Сигнал: при создании Validation инкрементим счетчик проверок
     и проверяем достижение порога подписки.
     """
-    if not created or instance.user is None:
+    if not created or instance.user_id is None:
         return
 
-    user = instance.user
-    user.validation_count = (user.validation_count or 0) + 1
-    user.save(update_fields=['validation_count'])
+    counts = TelegramUser.bulk_increment_counter('validation_count', {instance.user_id: 1})
+    invalidate_user_stats(instance.user_id)
+    check_and_award_subscription(
+        TelegramUser(pk=instance.user_id), 'validations', counts[instance.user_id]
+    )
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def on_subscription_changed(sender, instance, **kwargs):
+    """Сигнал: при изменении подписки сбрасываем снимок статистики пользователя."""
+    invalidate_user_stats(instance.user_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def on_subscription_deleted(sender, instance, **kwargs):
+    """Сигнал: удалённая подписка больше не продлевает subscription_until."""
+    Subscription.refresh_subscription_until([instance.user_id])
+
+
+@receiver(post_save, sender=Config)
+@receiver(post_delete, sender=Config)
+def on_config_changed(sender, instance, **kwargs):
+    """Сигнал: при изменении Config сбрасываем его кеш во всех процессах.
+
+    Только после коммита: иначе другой процесс увидит новую версию,
+    перечитает старую строку и закеширует её под новой версией.
+    """
+    transaction.on_commit(Config.invalidate_cache)
+
 
-    check_and_award_subscription(user)
+@receiver(post_delete, sender=TelegramUser)
+def on_telegramuser_deleted(sender, instance, **kwargs):
+    """Сигнал: удалённый пользователь не должен считаться созданным по кешу."""
+    forget_telegram_user(instance.telegram_id)
@@ -1,62 +1,118 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 from celery import shared_task
-from django.db import IntegrityError
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from telegram import Bot
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, InputMediaDocument
 
-from bot.models import Config, Request, ChatUser
+from bot.deletions import get_deletion_queue
+from bot.ingest import PDFRejected, ingest_telegram_pdf
+from bot.models import Article, PDFUpload, Request, TelegramUser, Validation
+from bot.outbox import claim_batch, deliver
+from bot.prevalidation import ACCEPTED, REJECTED, prevalidate_pdf
+from bot.rate_limit import get_rate_limiter
+from bot.services import (
+    cache_validated_pdf,
+    check_and_award_subscription,
+    forget_validated_pdf,
+    get_validated_pdf,
+    invalidate_user_stats,
+)
+from bot.telegram_client import TelegramAPIError, get_telegram_client
+from bot.users import ensure_telegram_user, ensure_telegram_users
+from bot.votes import get_vote_buffer
 
 logger = logging.getLogger(__name__)
 
-import os
+VOTES_QUORUM = 3
 
-from django.utils import timezone
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, InputMediaDocument
+# Отложенные повторы этих вызовов идут в массовую очередь, а не в интерактивную
+BULK_TELEGRAM_METHODS = {'delete_message'}
+
+
+def send_telegram(method: str, *, reserved: bool = False, **params):
+    """Вызывает метод TelegramClient с учётом лимитов Telegram.
+
+    Если токена в корзине нет или Telegram ответил 429, вызов не блокирует
+    воркер, а переносится в telegram_call_task с countdown. Токен для
+    отложенного вызова резервируется сразу, поэтому такие вызовы идут
+    друг за другом с темпом корзины; повтор с reserved=True лимитер не
+    проходит. Возвращает результат вызова или None, если вызов отложен.
+    """
+    params = {
+        key: value.to_dict() if hasattr(value, 'to_dict') else value
+        for key, value in params.items()
+    }
+    options = {'queue': settings.CELERY_BULK_QUEUE} if method in BULK_TELEGRAM_METHODS else {}
+    if settings.TELEGRAM_RATE_LIMIT_ENABLED and not reserved:
+        wait = get_rate_limiter().acquire(params.get('chat_id'), reserve=True)
+        if wait:
+            telegram_call_task.apply_async(
+                args=[method, params], kwargs={'reserved': True}, countdown=wait, **options
+            )
+            return None
+    try:
+        return getattr(get_telegram_client(), method)(**params)
+    except TelegramAPIError as e:
+        if e.error_code != 429:
+            raise
+        logger.warning(f"Telegram {method} throttled, retry in {e.retry_after}s")
+        telegram_call_task.apply_async(
+            args=[method, params], countdown=e.retry_after or 1, **options
+        )
+        return None
 
-from bot.models import ChatUser, PDFUpload, Request, Validation
 
-TELEGRAM_TOKEN = os.environ['TELEGRAM_BOT_TOKEN']
-SEND_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-bot = Bot(token=TELEGRAM_TOKEN)
+@shared_task
+def telegram_call_task(method: str, params: dict, reserved: bool = False):
+    """Повторяет отложенный лимитером вызов Telegram."""
+    send_telegram(method, reserved=reserved, **params)
 
 
 def _send_sync(chat_id: int, text: str, reply_to: int = None):
-    payload = {'chat_id': chat_id, 'text': text}
-    if reply_to is not None:
-        payload['reply_to_message_id'] = reply_to
-    requests.post(SEND_URL, json=payload, timeout=5)
+    send_telegram('send_message', chat_id=chat_id, text=text, reply_to=reply_to)
+
+
+def _send_document_sync(chat_id: int, file_id: str, reply_to: int = None):
+    send_telegram('send_document', chat_id=chat_id, document=file_id, reply_to=reply_to)
 
 
 @shared_task
 def request_pdf_task(chat_id, message_id, doi):
-    chat_user, _ = ChatUser.objects.get_or_create(
-        telegram_id=chat_id,
-        defaults={'username': f"user_{chat_id}", 'is_in_bot': True}
-    )
+    ensure_telegram_user(chat_id, is_in_bot=True)
 
-    # Проверка на наличие в базе даных запроса по DOI у пользователя
-    if Request.objects.filter(
-        chat_id=chat_id,
-        doi=doi,
-        status__in=('pending', 'completed')
-    ).exists():
+    article = Article.get_for_doi(doi)
+    # Если статья уже проверена, отдаём PDF сразу без нового цикла загрузки
+    cached_pdf = get_validated_pdf(article)
+
+    # Повторный активный запрос по DOI у пользователя отсекается
+    # частичным уникальным индексом unique_active_request
+    try:
+        with transaction.atomic():
+            request = Request.objects.create(
+                doi=article.doi,
+                article=article,
+                status='completed' if cached_pdf else 'pending',
+                chat_id=chat_id,
+                user_id=chat_id,
+                message_id=message_id
+            )
+    except IntegrityError:
         logger.info(
             f"Repeated request from user in chat_id={chat_id}: don't save to db"
         )
-        return
+        return {'status': 'duplicate'}
+
+    if cached_pdf:
+        _send_document_sync(chat_id, cached_pdf['file_id'], reply_to=message_id)
+        logger.info(f"Request served from validated PDF {cached_pdf['pdf_id']}: {request}")
+        return {'status': 'served', 'request_id': request.id}
 
-    # Если статьи нет в базе данных
-    request = Request.objects.create(
-        doi=doi,
-        status='pending',
-        chat_id=chat_id,
-        user=chat_user,
-        message_id=message_id
-    )
     logger.info(f"Request recorded in the db {request}")
-    return request
+    return {'status': 'created', 'request_id': request.id}
 
 
 @shared_task
@@ -66,94 +122,428 @@ def handle_pdf_upload_task(
     uploader_id: int, uploader_username: str
 ):
     req = Request.objects.get(pk=req_id)
-    chat_user, _ = ChatUser.objects.get_or_create(
-        telegram_id=uploader_id,
-        defaults={'username': uploader_username}
-    )
+    try:
+        file_path, sha256 = ingest_telegram_pdf(file_id)
+    except PDFRejected as e:
+        logger.info(f"Upload {file_name} for request {req_id} rejected: {e}")
+        return None
+
+    duplicate = PDFUpload.objects.filter(request=req, sha256=sha256).first()
+    if duplicate:
+        logger.info(f"Upload {file_name} for request {req_id} duplicates PDF {duplicate.id}")
+        return duplicate.id
+
+    ensure_telegram_user(uploader_id, uploader_username)
     pdf = PDFUpload.objects.create(
         request=req,
-        file=f"articles/{req.id}_{file_name}",
+        article_id=req.article_id,
+        file=file_path,
+        sha256=sha256,
+        telegram_file_id=file_id,
         uploaded_at=timezone.now(),
-        user=chat_user
+        chat_message_id=orig_msg_id,
+        user_id=uploader_id
     )
+
+    verdict, reason = prevalidate_pdf(file_path, req.doi)
+    if verdict is not None:
+        pdf.is_valid = verdict == ACCEPTED
+        pdf.validated_at = timezone.now()
+        pdf.prevalidation_reason = reason
+        pdf.save(update_fields=['is_valid', 'validated_at', 'delete_at', 'prevalidation_reason'])
+        logger.info(f"PDF {pdf.id} for request {req_id} {verdict} without voting: {reason}")
+    if verdict == REJECTED:
+        return pdf.id
+    if verdict == ACCEPTED:
+        Request.objects.filter(pk=req.pk).update(status='completed')
+        if req.article:
+            cache_validated_pdf(pdf, req.article)
+        send_telegram(
+            'edit_message_media',
+            chat_id=req.chat_id,
+            message_id=orig_msg_id,
+            media=InputMediaDocument(media=file_id, caption=f"PDF {req.doi}")
+        )
+        return pdf.id
+
     keyboard = InlineKeyboardMarkup([
         [
             InlineKeyboardButton("✅ Все верно", callback_data=f"vote_valid:{pdf.id}"),
             InlineKeyboardButton("❌ PDF неверный", callback_data=f"vote_invalid:{pdf.id}"),
         ]
     ])
-    bot.edit_message_media(
+    send_telegram(
+        'edit_message_media',
         chat_id=req.chat_id,
         message_id=orig_msg_id,
-        media=InputMediaDocument(media=file_id, caption=f"Проверьте PDF {req.doi}")
-    )
-    bot.edit_message_reply_markup(
-        chat_id=req.chat_id, message_id=orig_msg_id, reply_markup=keyboard
+        media=InputMediaDocument(media=file_id, caption=f"Проверьте PDF {req.doi}"),
+        reply_markup=keyboard
     )
     return pdf.id
 
 
+def _parse_vote(callback_query_id, callback_data, voter_id, voter_username):
+    action, pdf_id = callback_data.split(":")
+    return {
+        'callback_query_id': callback_query_id,
+        'pdf_id': int(pdf_id),
+        'vote': action == "vote_valid",
+        'voter_id': voter_id,
+        'voter_username': voter_username,
+    }
+
+
+def submit_vote(callback_query_id: str, callback_data: str, voter_id: int, voter_username: str):
+    """Передаёт голос на обработку.
+
+    С VOTE_BATCH_ENABLED голос кладётся в буфер Redis, и первый голос окна
+    планирует flush_votes_task через VOTE_BATCH_WINDOW секунд; иначе
+    голос обрабатывается отдельной задачей.
+    """
+    if not settings.VOTE_BATCH_ENABLED:
+        handle_vote_callback_task.delay(callback_query_id, callback_data, voter_id, voter_username)
+        return
+    vote = _parse_vote(callback_query_id, callback_data, voter_id, voter_username)
+    if get_vote_buffer().push(vote):
+        flush_votes_task.apply_async(countdown=settings.VOTE_BATCH_WINDOW)
+
+
 @shared_task
 def handle_vote_callback_task(callback_query_id: str, callback_data: str, voter_id: int, voter_username: str):
-    action, pdf_id_str = callback_data.split(":")
-    pdf_id = int(pdf_id_str)
-    pdf = PDFUpload.objects.select_related('request', 'user').get(id=pdf_id)
-    req = pdf.request
-    if req.user and req.user.telegram_id == voter_id:
-        bot.answer_callback_query(callback_query_id=callback_query_id, text="Вы не можете голосовать по своему запросу.", show_alert=True)
-        return
-    if pdf.user.telegram_id == voter_id:
-        bot.answer_callback_query(callback_query_id=callback_query_id, text="Вы не можете голосовать за свой PDF.", show_alert=True)
-        return
+    """Processes a single vote as a batch of one."""
+    vote = _parse_vote(callback_query_id, callback_data, voter_id, voter_username)
+    return apply_votes([vote])
 
-    voter, _ = ChatUser.objects.get_or_create(
-        telegram_id=voter_id,
-        defaults={'username': voter_username}
+
+@shared_task
+def flush_votes_task():
+    """Processes all buffered votes in batches of VOTE_BATCH_MAX_SIZE.
+
+    A batch that fails is pushed back to the buffer and a new flush is
+    scheduled, so a vote is applied at least once; apply_votes skips
+    votes that were already stored.
+    """
+    buffer = get_vote_buffer()
+    applied = 0
+    while True:
+        votes = buffer.pop(settings.VOTE_BATCH_MAX_SIZE)
+        if not votes:
+            break
+        try:
+            applied += apply_votes(votes)
+        except Exception:
+            if buffer.requeue(votes):
+                flush_votes_task.apply_async(countdown=settings.VOTE_BATCH_WINDOW)
+            raise
+    return applied
+
+
+def apply_votes(votes):
+    """Applies a batch of votes with a fixed number of queries per batch.
+
+    Uploads are locked and loaded with one query, missing voters are
+    created with one insert, new validations are inserted with one bulk_create and
+    the tally and quorum are evaluated once per PDF. Validation signals
+    are not sent, so voter counters and subscriptions are updated here.
+    Rejected votes are answered after the commit, outside the row locks.
+    Returns the number of votes counted.
+    """
+    with transaction.atomic():
+        pdfs = _lock_uploads({vote['pdf_id'] for vote in votes})
+        accepted, rejected = _check_voters(votes, pdfs)
+        counted = _new_votes(accepted)
+        decided = _store_votes(counted, pdfs) if counted else []
+
+    for vote, text in rejected:
+        _reject_vote(vote, text)
+    for pdf in decided:
+        if not pdf.article:
+            continue
+        # Голоса после кворума могут перевернуть решение
+        if pdf.is_valid:
+            cache_validated_pdf(pdf, pdf.article)
+        else:
+            forget_validated_pdf(pdf.article)
+    return len(counted)
+
+
+def _lock_uploads(pdf_ids):
+    """Locks the uploads of a batch and returns them by id.
+
+    Rows are locked in pk order, so the window flush and the beat flush
+    cannot deadlock on overlapping sets of PDFs.
+    """
+    pdfs = (
+        PDFUpload.objects
+        .select_for_update(of=('self',))
+        .select_related('request', 'article')
+        .filter(pk__in=pdf_ids)
+        .order_by('pk')
     )
-    vote_val = (action == "vote_valid")
-    Validation.objects.create(
-        pdf_upload=pdf,
-        user=voter,
-        vote=vote_val,
-        voted_at=timezone.now()
+    return {pdf.pk: pdf for pdf in pdfs}
+
+
+def _check_voters(votes, pdfs):
+    """Splits votes into (accepted, rejected); rejected holds (vote, text) pairs.
+
+    The requester and the uploader may not vote on a PDF; votes for
+    missing PDFs are dropped.
+    """
+    accepted, rejected = [], []
+    for vote in votes:
+        pdf = pdfs.get(vote['pdf_id'])
+        if pdf is None:
+            logger.warning(f"Vote for missing PDF {vote['pdf_id']} ignored")
+        elif pdf.request.user_id == vote['voter_id']:
+            rejected.append((vote, "Вы не можете голосовать по своему запросу."))
+        elif pdf.user_id == vote['voter_id']:
+            rejected.append((vote, "Вы не можете голосовать за свой PDF."))
+        else:
+            accepted.append(vote)
+    return accepted, rejected
+
+
+def _new_votes(accepted):
+    """Creates missing voters and returns the votes not stored yet, one per voter and PDF."""
+    if not accepted:
+        return []
+    ensure_telegram_users(
+        {vote['voter_id']: vote['voter_username'] for vote in accepted}
+    )
+    seen = set(
+        Validation.objects.filter(
+            pdf_upload_id__in={vote['pdf_id'] for vote in accepted},
+            user_id__in={vote['voter_id'] for vote in accepted}
+        ).values_list('pdf_upload_id', 'user_id')
     )
+    counted = []
+    for vote in accepted:
+        key = (vote['pdf_id'], vote['voter_id'])
+        if key in seen:
+            logger.info(f"Repeated vote by {vote['voter_id']} for PDF {vote['pdf_id']} ignored")
+            continue
+        seen.add(key)
+        counted.append(vote)
+    return counted
 
-    votes = Validation.objects.filter(pdf_upload=pdf)
-    total_votes = votes.count()
-    if total_votes >= 3:
-        correct = votes.filter(vote=True).count()
-        pdf.is_valid = correct > (total_votes - correct)
-        pdf.validated_at = timezone.now()
-        pdf.save()
-    return pdf.id
+
+def _store_votes(counted, pdfs):
+    """Inserts the validations, updates the tallies and returns the PDFs that reached quorum."""
+    now = timezone.now()
+    Validation.objects.bulk_create(
+        [
+            Validation(
+                pdf_upload=pdfs[vote['pdf_id']],
+                user_id=vote['voter_id'],
+                vote=vote['vote'],
+                voted_at=now
+            )
+            for vote in counted
+        ],
+        ignore_conflicts=True
+    )
+    _count_validations(counted)
+
+    decided = []
+    for pdf_id in {vote['pdf_id'] for vote in counted}:
+        pdf = pdfs[pdf_id]
+        pdf_votes = [vote['vote'] for vote in counted if vote['pdf_id'] == pdf_id]
+        pdf.votes_total += len(pdf_votes)
+        pdf.votes_valid += sum(pdf_votes)
+        fields = ['votes_total', 'votes_valid']
+        if pdf.votes_total >= VOTES_QUORUM:
+            pdf.is_valid = pdf.votes_valid > (pdf.votes_total - pdf.votes_valid)
+            pdf.validated_at = now
+            fields += ['is_valid', 'validated_at', 'delete_at']
+            decided.append(pdf)
+        pdf.save(update_fields=fields)
+
+    # Как и при автоматической проверке: запрос с проверенным PDF выполнен и не истекает
+    completed = {pdf.request_id for pdf in decided if pdf.is_valid}
+    if completed:
+        Request.objects.filter(pk__in=completed, status='pending').update(status='completed')
+    return decided
+
+
+def _reject_vote(vote, text):
+    """Shows the voter why the vote was not counted.
+
+    The handler has usually answered the callback query already, so
+    Telegram may refuse the second answer; that only loses the alert.
+    """
+    try:
+        send_telegram(
+            'answer_callback_query',
+            callback_query_id=vote['callback_query_id'],
+            text=text,
+            show_alert=True
+        )
+    except TelegramAPIError as e:
+        logger.info(f"Rejection for vote {vote['callback_query_id']} not shown: {e}")
+
+
+def _count_validations(votes):
+    """Increments validation_count of the voters and awards subscriptions."""
+    added = {}
+    for vote in votes:
+        added[vote['voter_id']] = added.get(vote['voter_id'], 0) + 1
+    counts = TelegramUser.bulk_increment_counter('validation_count', added)
+    for telegram_id, count in added.items():
+        invalidate_user_stats(telegram_id)
+        check_and_award_subscription(
+            TelegramUser(pk=telegram_id), 'validations', counts[telegram_id], count
+        )
 
 
 @shared_task
 def delete_message_task(chat_id, message_id):
-    """Deletes a message after a delay, fetching config inside."""
-    config = Config.objects.first()
-    if not config or not config.bot_token:
-        logger.error("Bot token not configured in DB for delete_message_task.")
-        return
-    bot = Bot(token=config.bot_token)
+    """Deletes a message after a delay; a deferred deletion goes to the deletion queue."""
+    delay = _delete_message(chat_id, message_id)
+    if delay is not None:
+        get_deletion_queue().schedule(chat_id, message_id, delay)
+
+
+def _delete_message(chat_id, message_id):
+    """Deletes a message; returns None when done or seconds after which to retry.
+
+    Network errors and 5xx responses are transient and retried after
+    DELETION_SWEEP_LEASE. Other Telegram errors (message already gone or
+    too old) are final, retrying them is useless. A deletion denied by the
+    rate limiter or by a 429 is retried when the token is expected; no
+    Celery task is queued for it.
+    """
+    if settings.TELEGRAM_RATE_LIMIT_ENABLED:
+        wait = get_rate_limiter().acquire(chat_id)
+        if wait:
+            logger.info(
+                f"Deletion of message {message_id} from chat {chat_id} deferred by {wait:.1f}s"
+            )
+            return wait
     try:
-        bot.delete_message(chat_id=chat_id, message_id=message_id)
-        logger.info(f"Deleted message {message_id} from chat {chat_id}")
+        get_telegram_client().delete_message(chat_id=chat_id, message_id=message_id)
+    except TelegramAPIError as e:
+        if e.error_code == 429:
+            logger.info(f"Deletion of message {message_id} from chat {chat_id} deferred by 429")
+            return float(e.retry_after or 1)
+        logger.error(f"Failed to delete message {message_id} from chat {chat_id}: {e}")
+        return settings.DELETION_SWEEP_LEASE if e.error_code >= 500 else None
     except Exception as e:
         logger.error(f"Failed to delete message {message_id} from chat {chat_id}: {e}")
+        return settings.DELETION_SWEEP_LEASE
+    logger.info(f"Deleted message {message_id} from chat {chat_id}")
+    return None
+
+
+@shared_task
+def sweep_due_deletions_task():
+    """Deletes messages whose deletion time has come.
+
+    Claims due messages from the deletion queue in batches and deletes each
+    batch with at most DELETION_SWEEP_CONCURRENCY parallel calls. A message
+    leaves the queue once it was deleted or failed for good; a deferred or
+    transiently failed one stays with its due time moved to the retry time.
+    Messages of a crashed worker are retried after DELETION_SWEEP_LEASE.
+    """
+    queue = get_deletion_queue()
+    deleted = 0
+    with ThreadPoolExecutor(max_workers=settings.DELETION_SWEEP_CONCURRENCY) as executor:
+        for _ in range(settings.DELETION_SWEEP_MAX_BATCHES):
+            due = queue.claim_due(settings.DELETION_SWEEP_BATCH_SIZE)
+            if not due:
+                break
+            delays = dict(zip(due, executor.map(lambda item: _delete_message(*item), due)))
+            done = [item for item, delay in delays.items() if delay is None]
+            queue.remove(done)
+            queue.defer(_spread_retries(
+                {item: delay for item, delay in delays.items() if delay is not None}
+            ))
+            deleted += len(done)
+    if deleted:
+        logger.info(f"Swept {deleted} due message deletions")
+    return deleted
+
+
+def _spread_retries(delays):
+    """Spaces the retries of one chat by the chat's rate so they do not come due together."""
+    limiter = get_rate_limiter()
+    spread = {}
+    position = {}
+    # Раньше всех в своём чате идёт сообщение с самым коротким ожиданием
+    for (chat_id, message_id), delay in sorted(delays.items(), key=lambda entry: entry[1]):
+        _, rate, _ = limiter.buckets(chat_id)[-1]
+        spread[(chat_id, message_id)] = delay + position.get(chat_id, 0) / rate
+        position[chat_id] = position.get(chat_id, 0) + 1
+    return spread
+
+
+@shared_task
+def dispatch_outbox_task():
+    """Sends pending outbox messages.
+
+    Runs after each commit that wrote to the outbox and periodically from
+    beat to pick up retries. Handles at most OUTBOX_MAX_BATCHES batches of
+    OUTBOX_BATCH_SIZE messages per run.
+    """
+    sent = 0
+    for _ in range(settings.OUTBOX_MAX_BATCHES):
+        batch = claim_batch(settings.OUTBOX_BATCH_SIZE)
+        if not batch:
+            break
+        sent += sum(deliver(message) for message in batch)
+    if sent:
+        logger.info(f"Dispatched {sent} outbox messages")
+    return sent
+
+
+@shared_task
+def expire_requests_task():
+    """Marks pending requests past expires_at as expired.
+
+    Works in chunks of REQUEST_EXPIRY_BATCH_SIZE rows so each UPDATE stays
+    short. With REQUEST_EXPIRY_DELETE_MESSAGES the request messages are
+    queued for deletion and removed by the sweeper with bounded concurrency.
+    """
+    started = time.monotonic()
+    now = timezone.now()
+    expired = 0
+    while True:
+        batch = list(
+            Request.objects
+            .filter(status='pending', expires_at__lt=now)
+            .values_list('id', 'chat_id', 'message_id')[:settings.REQUEST_EXPIRY_BATCH_SIZE]
+        )
+        if not batch:
+            break
+        expired += Request.objects.filter(
+            id__in=[request_id for request_id, _, _ in batch],
+            status='pending'
+        ).update(status='expired')
+
+        if settings.REQUEST_EXPIRY_DELETE_MESSAGES:
+            queue = get_deletion_queue()
+            for _, chat_id, message_id in batch:
+                if message_id:
+                    queue.schedule(chat_id, message_id, 0)
+
+    seconds = time.monotonic() - started
+    rows_per_sec = expired / seconds if seconds else 0.0
+    logger.info(f"Expired {expired} requests in {seconds:.2f}s ({rows_per_sec:.0f} rows/s)")
+    return {'expired': expired, 'seconds': seconds, 'rows_per_sec': rows_per_sec}
+
 
 @shared_task
 def schedule_pdf_deletion(chat_id: int, message_id: int, delay: int):
     """Schedules the deletion of a PDF-related message."""
-    delete_message_task.apply_async(args=[chat_id, message_id], countdown=delay)
+    get_deletion_queue().schedule(chat_id, message_id, delay)
     logger.info(
         f"Scheduled PDF message {message_id} in chat {chat_id} for deletion in {delay} seconds."
     )
 
+
 @shared_task
 def schedule_notification_deletion(chat_id: int, message_id: int, delay: int):
     """Schedules the deletion of a notification message."""
-    delete_message_task.apply_async(args=[chat_id, message_id], countdown=delay)
+    get_deletion_queue().schedule(chat_id, message_id, delay)
     logger.info(
         f"Scheduled notification message {message_id} in chat {chat_id} for deletion in {delay} seconds."
     )
@@ -0,0 +1,137 @@
+import logging
+
+import requests
+from celery.signals import worker_process_init
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://api.telegram.org/bot{token}/{method}"
+FILE_URL = "https://api.telegram.org/file/bot{token}/{file_path}"
+
+_client = None
+
+
+class TelegramAPIError(Exception):
+    """Ошибка, которую вернул Telegram Bot API (ok=false)."""
+
+    def __init__(self, method, error_code, description, retry_after=None):
+        super().__init__(f"{method} failed with {error_code}: {description}")
+        self.method = method
+        self.error_code = error_code
+        self.description = description
+        self.retry_after = retry_after
+
+
+class TelegramClient:
+    """Синхронный клиент Telegram Bot API для Celery-воркеров.
+
+    Держит один requests.Session с пулом keep-alive соединений, поэтому
+    TLS-рукопожатие выполняется один раз на соединение, а не на каждый вызов.
+    Объекты python-telegram-bot (клавиатуры, InputMedia) сериализуются
+    через to_dict().
+    """
+
+    def __init__(self, token, pool_size, timeout):
+        self.token = token
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+
+    def call(self, method, **params):
+        """Вызывает метод Bot API и возвращает поле result ответа."""
+        payload = {
+            key: value.to_dict() if hasattr(value, 'to_dict') else value
+            for key, value in params.items()
+            if value is not None
+        }
+        response = self.session.post(
+            API_URL.format(token=self.token, method=method),
+            json=payload,
+            timeout=self.timeout
+        )
+        try:
+            data = response.json()
+        except ValueError:
+            # Прокси или балансировщик могут ответить HTML-страницей ошибки
+            raise TelegramAPIError(method, response.status_code, response.text[:200])
+        if not data.get('ok'):
+            raise TelegramAPIError(
+                method,
+                data.get('error_code', response.status_code),
+                data.get('description', ''),
+                retry_after=data.get('parameters', {}).get('retry_after')
+            )
+        return data['result']
+
+    def send_message(self, chat_id, text, reply_to=None, **params):
+        return self.call(
+            'sendMessage', chat_id=chat_id, text=text, reply_to_message_id=reply_to, **params
+        )
+
+    def send_document(self, chat_id, document, reply_to=None, **params):
+        return self.call(
+            'sendDocument',
+            chat_id=chat_id,
+            document=document,
+            reply_to_message_id=reply_to,
+            **params
+        )
+
+    def edit_message_media(self, chat_id, message_id, media, **params):
+        return self.call(
+            'editMessageMedia', chat_id=chat_id, message_id=message_id, media=media, **params
+        )
+
+    def edit_message_reply_markup(self, chat_id, message_id, reply_markup):
+        return self.call(
+            'editMessageReplyMarkup',
+            chat_id=chat_id,
+            message_id=message_id,
+            reply_markup=reply_markup
+        )
+
+    def get_file(self, file_id):
+        return self.call('getFile', file_id=file_id)
+
+    def download_file(self, file_path):
+        """Открывает потоковую загрузку файла; тело читается через iter_content."""
+        response = self.session.get(
+            FILE_URL.format(token=self.token, file_path=file_path),
+            stream=True,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response
+
+    def delete_message(self, chat_id, message_id):
+        return self.call('deleteMessage', chat_id=chat_id, message_id=message_id)
+
+    def answer_callback_query(self, callback_query_id, text=None, show_alert=False):
+        return self.call(
+            'answerCallbackQuery',
+            callback_query_id=callback_query_id,
+            text=text,
+            show_alert=show_alert
+        )
+
+
+def get_telegram_client():
+    """Возвращает общий для процесса TelegramClient, создавая его при первом вызове."""
+    global _client
+    if _client is None:
+        _client = TelegramClient(
+            settings.TELEGRAM_BOT_TOKEN,
+            pool_size=settings.TELEGRAM_HTTP_POOL_SIZE,
+            timeout=settings.TELEGRAM_HTTP_TIMEOUT
+        )
+    return _client
+
+
+@worker_process_init.connect
+def reset_telegram_client(**kwargs):
+    """Не переиспользуем соединения родительского процесса после fork воркера."""
+    global _client
+    _client = None
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from bot.models import TelegramUser
+
+TELEGRAM_USER_CACHE_KEY = 'telegram_user:{}'
+USERNAME_MAX_LENGTH = TelegramUser._meta.get_field('username').max_length
+
+
+def ensure_telegram_users(users, is_in_bot=False):
+    """Создаёт строки TelegramUser для ещё не встреченных пользователей.
+
+    users — {telegram_id: username или None}; username и is_in_bot
+    задают только новым пользователям, существующие не меняются.
+    Внешние ключи ссылаются прямо на telegram_id, поэтому pk искать
+    не нужно: недавно встреченные пользователи отсеиваются по кешу
+    одной операцией, остальные вставляются одним INSERT ... ON CONFLICT
+    DO NOTHING.
+    """
+    keys = {TELEGRAM_USER_CACHE_KEY.format(telegram_id): telegram_id for telegram_id in users}
+    known = cache.get_many(keys)
+    missing = [telegram_id for key, telegram_id in keys.items() if key not in known]
+    if not missing:
+        return
+
+    TelegramUser.objects.bulk_create(
+        [
+            TelegramUser(
+                telegram_id=telegram_id,
+                username=(users[telegram_id] or '')[:USERNAME_MAX_LENGTH],
+                is_in_bot=is_in_bot
+            )
+            for telegram_id in missing
+        ],
+        batch_size=settings.TELEGRAM_USER_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # Кешируем после коммита, чтобы откат не оставил в кеше несуществующую строку
+    transaction.on_commit(lambda: cache.set_many(
+        {TELEGRAM_USER_CACHE_KEY.format(telegram_id): 1 for telegram_id in missing},
+        settings.TELEGRAM_USER_CACHE_TTL
+    ))
+
+
+def ensure_telegram_user(telegram_id, username=None, is_in_bot=False):
+    """Создаёт TelegramUser для одного telegram_id (см. ensure_telegram_users)."""
+    ensure_telegram_users({telegram_id: username}, is_in_bot=is_in_bot)
+
+
+def register_bot_user(telegram_id, username):
+    """Отмечает, что пользователь написал боту напрямую (/start)."""
+    ensure_telegram_user(telegram_id, username, is_in_bot=True)
+    TelegramUser.objects.filter(pk=telegram_id, is_in_bot=False).update(is_in_bot=True)
+
+
+def forget_telegram_user(telegram_id):
+    """Убирает пользователя из кеша, например после удаления."""
+    cache.delete(TELEGRAM_USER_CACHE_KEY.format(telegram_id))
@@ -0,0 +1,93 @@
+import json
+import logging
+
+import redis
+from django.conf import settings
+
+VOTE_BUFFER_KEY = 'votes:pending'
+VOTE_FLUSH_FLAG_KEY = 'votes:flush-scheduled'
+
+logger = logging.getLogger(__name__)
+
+# Атомарно забирает из начала буфера до ARGV[1] голосов,
+# чтобы параллельные flush не обработали один голос дважды.
+POP_SCRIPT = """
+local votes = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #votes > 0 then
+    redis.call('LTRIM', KEYS[1], #votes, -1)
+end
+return votes
+"""
+
+_buffer = None
+
+
+class VoteBuffer:
+    """Буфер голосов в списке Redis для пакетной обработки.
+
+    Обработчик callback query только кладёт голос в буфер; первый голос
+    окна планирует flush_votes_task через VOTE_BATCH_WINDOW секунд,
+    и она обрабатывает все накопившиеся голоса одной пачкой.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.pop_script = client.register_script(POP_SCRIPT)
+
+    def push(self, vote):
+        """Добавляет голос; возвращает True, если для окна ещё не запланирован flush."""
+        pipe = self.client.pipeline()
+        pipe.rpush(VOTE_BUFFER_KEY, json.dumps(vote))
+        pipe.set(
+            VOTE_FLUSH_FLAG_KEY, 1, nx=True,
+            px=int(settings.VOTE_BATCH_WINDOW * 1000 * 10)
+        )
+        _, scheduled = pipe.execute()
+        return bool(scheduled)
+
+    def requeue(self, votes):
+        """Возвращает в начало буфера голоса пачки, которую не удалось обработать.
+
+        Голоса сохраняют порядок поступления; голос, возвращённый
+        VOTE_FLUSH_MAX_ATTEMPTS раз, отбрасывается с ошибкой в логе, чтобы
+        один испорченный голос не зациклил flush. Возвращает True, если
+        для окна ещё не запланирован flush.
+        """
+        retry = []
+        for vote in votes:
+            vote = {**vote, 'attempts': vote.get('attempts', 0) + 1}
+            if vote['attempts'] >= settings.VOTE_FLUSH_MAX_ATTEMPTS:
+                logger.error(f"Vote dropped after {vote['attempts']} failed flushes: {vote}")
+                continue
+            retry.append(json.dumps(vote))
+        if not retry:
+            return False
+        pipe = self.client.pipeline()
+        # LPUSH кладёт каждое значение в голову списка, поэтому пачка идёт задом наперёд
+        pipe.lpush(VOTE_BUFFER_KEY, *reversed(retry))
+        pipe.set(
+            VOTE_FLUSH_FLAG_KEY, 1, nx=True,
+            px=int(settings.VOTE_BATCH_WINDOW * 1000 * 10)
+        )
+        _, scheduled = pipe.execute()
+        return bool(scheduled)
+
+    def pop(self, limit):
+        """Забирает до limit голосов в порядке поступления.
+
+        Флаг окна снимается до чтения буфера: голос, пришедший после этого,
+        запланирует новый flush, а не останется в буфере.
+        """
+        self.client.delete(VOTE_FLUSH_FLAG_KEY)
+        return [json.loads(vote) for vote in self.pop_script(keys=[VOTE_BUFFER_KEY], args=[limit])]
+
+    def __len__(self):
+        return self.client.llen(VOTE_BUFFER_KEY)
+
+
+def get_vote_buffer():
+    """Возвращает общий для процесса VoteBuffer."""
+    global _buffer
+    if _buffer is None:
+        _buffer = VoteBuffer(redis.Redis.from_url(settings.VOTE_BUFFER_REDIS_URL))
+    return _buffer
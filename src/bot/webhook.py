@@ -0,0 +1,121 @@
+import asyncio
+import atexit
+import hmac
+import json
+import threading
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from telegram import Update
+
+from bot.dedup import claim_once, release_claim
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+_update_errors = ContextVar('webhook_update_errors')
+_lock = threading.Lock()
+_application = None
+_loop = None
+
+
+def build_webhook_application():
+    """Создаёт Application бота без Updater с теми же обработчиками,
+    что и в режиме polling (bot.bot.build_application).
+    """
+    from bot.bot import build_application
+
+    application = build_application(settings.TELEGRAM_BOT_TOKEN, polling=False)
+    application.add_error_handler(_record_error)
+    return application
+
+
+async def _record_error(update, context):
+    """Запоминает ошибку обработчика для webhook-запроса этого апдейта.
+
+    process_update передаёт исключения обработчиков в error handler'ы
+    и не пробрасывает их (даже если error handler сам упал), поэтому
+    без этой записи view ответил бы 200 и апдейт был бы потерян.
+    """
+    errors = _update_errors.get(None)
+    if errors is not None:
+        errors.append(context.error)
+
+
+def _get_application():
+    """Возвращает Application процесса, созданный и инициализированный один раз.
+
+    HTTP-клиент бота привязан к event loop, а под WSGI у каждого
+    асинхронного view свой loop. Поэтому Application живёт в отдельном
+    потоке со своим loop, и initialize (getMe и создание клиента)
+    выполняется один раз на процесс, а не на каждый апдейт.
+    """
+    global _application, _loop
+    with _lock:
+        if _application is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name='telegram-webhook', daemon=True
+            ).start()
+            application = build_webhook_application()
+            asyncio.run_coroutine_threadsafe(application.initialize(), loop).result()
+            atexit.register(_shutdown, application, loop)
+            _application, _loop = application, loop
+    return _application, _loop
+
+
+def _shutdown(application, loop):
+    asyncio.run_coroutine_threadsafe(application.shutdown(), loop).result(timeout=10)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+async def _process_update(application, data):
+    """Обрабатывает апдейт и пробрасывает первую ошибку его обработчиков."""
+    errors = []
+    # У каждой задачи своя копия контекста, так что список виден
+    # только error handler'ам этого апдейта
+    _update_errors.set(errors)
+    await application.process_update(Update.de_json(data, application.bot))
+    if errors:
+        raise errors[0]
+
+
+@csrf_exempt
+@require_POST
+async def telegram_webhook(request):
+    """Принимает апдейт от Telegram и обрабатывает его в том же процессе.
+
+    Запрос без секрета, указанного при setWebhook, отклоняется: иначе
+    кто угодно мог бы присылать апдейты от имени Telegram.
+
+    Если обработчик апдейта упал, отметка update_id снимается и ответ
+    5xx заставляет Telegram повторить доставку.
+    """
+    secret = settings.TELEGRAM_WEBHOOK_SECRET
+    if not secret or not hmac.compare_digest(
+        request.headers.get(SECRET_HEADER, '').encode(), secret.encode()
+    ):
+        return HttpResponseForbidden()
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    # Telegram повторяет доставку, если не дождался ответа
+    key = f"update:{data.get('update_id')}"
+    if 'update_id' in data and not await sync_to_async(claim_once)(key):
+        return HttpResponse()
+
+    try:
+        application, loop = await sync_to_async(_get_application, thread_sensitive=False)()
+        await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(_process_update(application, data), loop)
+        )
+    except Exception:
+        await sync_to_async(release_claim)(key)
+        raise
+    return HttpResponse()
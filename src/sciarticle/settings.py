@@ -96,14 +96,87 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
+# Загрузка PDF: Bot API отдаёт файлы до 20 МБ, в памяти держим не больше 1 МБ
+PDF_MAX_SIZE = 20 * 1024 * 1024
+PDF_SPOOL_MAX_MEMORY = 1024 * 1024
+
+# Автопроверка PDF перед голосованием читает только начало файла
+PREVALIDATION_MAX_BYTES = 1024 * 1024
+# Сколько потоков объектов (/ObjStm) распаковывать в поисках первой страницы
+PREVALIDATION_MAX_STREAMS = 5
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
 SCI_SOURCE_BOT_ID = os.environ.get('SCI_SOURCE_BOT_ID')
+BOT_DB_POOL_SIZE = int(os.environ.get('BOT_DB_POOL_SIZE', 8))
+TELEGRAM_HTTP_POOL_SIZE = int(os.environ.get('TELEGRAM_HTTP_POOL_SIZE', 10))
+TELEGRAM_HTTP_TIMEOUT = float(os.environ.get('TELEGRAM_HTTP_TIMEOUT', 5))
+# Если задан, бот получает апдейты через webhook (bot.webhook), а не polling
+TELEGRAM_WEBHOOK_URL = os.environ.get('TELEGRAM_WEBHOOK_URL')
+TELEGRAM_WEBHOOK_SECRET = os.environ.get('TELEGRAM_WEBHOOK_SECRET')
 
 REDIS_HOST = os.environ.get('REDIS_HOST', 'redis')
 REDIS_PORT = os.environ.get('REDIS_PORT', '6379')
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
+    }
+}
+
+# Лимиты Telegram: ~30 сообщений/сек на бота, ~20/мин в группу, ~1/сек в личный чат
+TELEGRAM_RATE_LIMIT_ENABLED = os.environ.get('TELEGRAM_RATE_LIMIT_ENABLED', 'True') == 'True'
+TELEGRAM_RATE_LIMIT_REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/2"
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_GROUP_RATE = 20 / 60
+TELEGRAM_GROUP_BURST = 20
+TELEGRAM_CHAT_RATE = 1
+TELEGRAM_CHAT_BURST = 1
+
+# Отложенные удаления сообщений: sorted set в Redis, разбирается beat-задачей
+TELEGRAM_DELETION_QUEUE_REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/2"
+DELETION_SWEEP_INTERVAL = 10
+DELETION_SWEEP_BATCH_SIZE = 200
+DELETION_SWEEP_MAX_BATCHES = 10
+DELETION_SWEEP_CONCURRENCY = 8
+# Через сколько секунд сообщение, взятое упавшим проходом, вернётся в очередь
+DELETION_SWEEP_LEASE = 60
+
+# Перевод просроченных запросов в expired пачками
+REQUEST_EXPIRY_INTERVAL = 5 * 60
+REQUEST_EXPIRY_BATCH_SIZE = 1000
+REQUEST_EXPIRY_DELETE_MESSAGES = os.environ.get('REQUEST_EXPIRY_DELETE_MESSAGES', 'False') == 'True'
+
+# Голоса копятся в буфере VOTE_BATCH_WINDOW секунд и обрабатываются пачкой
+VOTE_BATCH_ENABLED = os.environ.get('VOTE_BATCH_ENABLED', 'True') == 'True'
+VOTE_BUFFER_REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/2"
+VOTE_BATCH_WINDOW = 0.2
+VOTE_BATCH_MAX_SIZE = 500
+VOTE_FLUSH_INTERVAL = 5
+# Сколько раз пачка голосов возвращается в буфер после сбоя обработки
+VOTE_FLUSH_MAX_ATTEMPTS = 5
+
+# Кеш уже созданных TelegramUser (bot.users)
+TELEGRAM_USER_CACHE_TTL = 24 * 60 * 60
+TELEGRAM_USER_BATCH_SIZE = 500
+
+# Сколько секунд помнить обработанные апдейты и события (bot.dedup)
+TASK_DEDUP_TTL = 10 * 60
+
+# Outbox вызовов Telegram (bot.outbox)
+OUTBOX_DISPATCH_INTERVAL = 10
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_BATCHES = 10
+OUTBOX_LEASE = 60
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_BASE = 5
+OUTBOX_RETRY_MAX = 30 * 60
+
 CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
 CELERY_RESULT_BACKEND = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
 
@@ -115,3 +188,60 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 15 * 60
 CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+
+# Очереди Celery: интерактивные задачи, которых ждёт пользователь, не стоят
+# за массовыми удалениями и уведомлениями. Каждую очередь слушает свой
+# воркер со своими concurrency и prefetch (см. infra/docker-compose.yml).
+CELERY_INTERACTIVE_QUEUE = 'interactive'
+CELERY_BULK_QUEUE = 'bulk'
+CELERY_MAINTENANCE_QUEUE = 'maintenance'
+
+CELERY_INTERACTIVE_TASKS = [
+    'bot.tasks.handle_vote_callback_task',
+    'bot.tasks.flush_votes_task',
+    'bot.tasks.handle_pdf_upload_task',
+    'bot.tasks.request_pdf_task',
+    'bot.tasks.telegram_call_task',
+]
+CELERY_BULK_TASKS = [
+    'bot.tasks.delete_message_task',
+    'bot.tasks.sweep_due_deletions_task',
+    'bot.tasks.schedule_pdf_deletion',
+    'bot.tasks.schedule_notification_deletion',
+    'bot.tasks.dispatch_outbox_task',
+]
+CELERY_MAINTENANCE_TASKS = [
+    'bot.tasks.expire_requests_task',
+]
+
+CELERY_TASK_DEFAULT_QUEUE = CELERY_MAINTENANCE_QUEUE
+CELERY_TASK_ROUTES = {
+    **{name: {'queue': CELERY_INTERACTIVE_QUEUE} for name in CELERY_INTERACTIVE_TASKS},
+    **{name: {'queue': CELERY_BULK_QUEUE} for name in CELERY_BULK_TASKS},
+    **{name: {'queue': CELERY_MAINTENANCE_QUEUE} for name in CELERY_MAINTENANCE_TASKS},
+}
+# Массовые и служебные задачи идемпотентны, поэтому подтверждаются после
+# выполнения и переживают падение воркера. Интерактивные подтверждаются сразу.
+CELERY_TASK_ANNOTATIONS = {
+    name: {'acks_late': True, 'reject_on_worker_lost': True}
+    for name in CELERY_BULK_TASKS + CELERY_MAINTENANCE_TASKS
+}
+
+CELERY_BEAT_SCHEDULE = {
+    'sweep-due-deletions': {
+        'task': 'bot.tasks.sweep_due_deletions_task',
+        'schedule': DELETION_SWEEP_INTERVAL,
+    },
+    'expire-requests': {
+        'task': 'bot.tasks.expire_requests_task',
+        'schedule': REQUEST_EXPIRY_INTERVAL,
+    },
+    'flush-votes': {
+        'task': 'bot.tasks.flush_votes_task',
+        'schedule': VOTE_FLUSH_INTERVAL,
+    },
+    'dispatch-outbox': {
+        'task': 'bot.tasks.dispatch_outbox_task',
+        'schedule': OUTBOX_DISPATCH_INTERVAL,
+    },
+}
@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from bot.webhook import telegram_webhook
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('telegram/webhook/', telegram_webhook, name='telegram-webhook'),
 ]
@@ -14,13 +14,29 @@ import pytest
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
 django.setup()
 
-from bot.models import ChatUser, Config, PDFUpload, Request, Validation
+from django.core.cache import cache
+
+from bot.models import Config, PDFUpload, Request, TelegramUser, Validation
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Clear the shared cache and the process-local Config copy between tests."""
+    cache.clear()
+    Config.invalidate_cache()
+
+
+@pytest.fixture
+def redis_client():
+    """Create an in-memory Redis that runs the Lua scripts for real."""
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.FakeRedis()
 
 
 @pytest.fixture
 def chat_user():
-    """Create a test ChatUser."""
-    user = ChatUser.objects.create(
+    """Create a test TelegramUser."""
+    user = TelegramUser.objects.create(
         telegram_id=123456789,
         username="test_user",
         is_in_bot=True,
@@ -32,8 +48,8 @@ def chat_user():
 
 @pytest.fixture
 def another_chat_user():
-    """Create another test ChatUser."""
-    user = ChatUser.objects.create(
+    """Create another test TelegramUser."""
+    user = TelegramUser.objects.create(
         telegram_id=987654321,
         username="another_user",
         is_in_bot=True,
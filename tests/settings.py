@@ -7,5 +7,14 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+TELEGRAM_RATE_LIMIT_ENABLED = False
+VOTE_BATCH_ENABLED = False
+
 # Make Celery execute tasks synchronously for testing
 CELERY_TASK_ALWAYS_EAGER = True
\ No newline at end of file
@@ -0,0 +1,239 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.serializers import MAX_ENTITLEMENT_IDS
+from bot.models import Article, Request, Subscription, TelegramUser
+
+
+@pytest.fixture
+def api_client():
+    """Create a DRF test client."""
+    return APIClient()
+
+
+@pytest.mark.django_db
+class TestRequestAPIView:
+    def test_request_is_enqueued(self, api_client):
+        """Test that the view acks with 202 and a token instead of writing inline."""
+        payload = {'chat_id': 111, 'message_id': 1, 'doi': '10.1234/a'}
+
+        with patch('api.views.request_pdf_task') as mock_task:
+            mock_task.delay.return_value.id = 'token-1'
+            response = api_client.post(reverse('request-pdf'), payload, format='json')
+
+        assert response.status_code == 202
+        assert response.data == {'token': 'token-1'}
+        mock_task.delay.assert_called_once_with(111, 1, '10.1234/a')
+        assert not Request.objects.exists()
+
+    def test_invalid_doi(self, api_client):
+        """Test that invalid payloads are rejected before enqueueing."""
+        payload = {'chat_id': 111, 'message_id': 1, 'doi': 'not-a-doi'}
+
+        with patch('api.views.request_pdf_task') as mock_task:
+            response = api_client.post(reverse('request-pdf'), payload, format='json')
+
+        assert response.status_code == 400
+        mock_task.delay.assert_not_called()
+
+
+class TestRequestStatusAPIView:
+    @patch('api.views.AsyncResult')
+    def test_status_success(self, mock_result_class, api_client):
+        """Test that a finished task reports its result."""
+        mock_result_class.return_value = MagicMock(
+            state='SUCCESS', result={'status': 'created', 'request_id': 1}
+        )
+        mock_result_class.return_value.successful.return_value = True
+
+        response = api_client.get(reverse('request-pdf-status', args=['token-1']))
+
+        assert response.status_code == 200
+        assert response.data == {
+            'token': 'token-1',
+            'state': 'SUCCESS',
+            'result': {'status': 'created', 'request_id': 1},
+        }
+
+    @patch('api.views.AsyncResult')
+    def test_status_pending(self, mock_result_class, api_client):
+        """Test that an unfinished task reports only its state."""
+        mock_result_class.return_value = MagicMock(state='PENDING')
+        mock_result_class.return_value.successful.return_value = False
+        mock_result_class.return_value.failed.return_value = False
+
+        response = api_client.get(reverse('request-pdf-status', args=['token-1']))
+
+        assert response.data == {'token': 'token-1', 'state': 'PENDING'}
+
+
+@pytest.mark.django_db
+class TestBulkRequestAPIView:
+    def test_bulk_create(self, api_client):
+        """Test that every new item is stored and reported as created."""
+        items = [
+            {'chat_id': 111, 'message_id': 1, 'doi': '10.1234/a'},
+            {'chat_id': 111, 'message_id': 2, 'doi': '10.1234/b'},
+            {'chat_id': 222, 'message_id': 3, 'doi': '10.1234/a'},
+        ]
+
+        response = api_client.post(
+            reverse('request-pdf-bulk'), {'items': items}, format='json'
+        )
+
+        assert response.status_code == 201
+        assert [r['status'] for r in response.data['results']] == ['created'] * 3
+        assert Request.objects.filter(status='pending').count() == 3
+        assert TelegramUser.objects.filter(telegram_id__in=[111, 222]).count() == 2
+        request = Request.objects.get(chat_id=111, doi='10.1234/b')
+        assert request.user.telegram_id == 111
+        assert request.expires_at > request.created_at
+
+    def test_bulk_dedup(self, api_client, request_obj):
+        """Test that active requests and repeats inside the batch are skipped."""
+        items = [
+            {'chat_id': request_obj.chat_id, 'message_id': 1, 'doi': request_obj.doi},
+            {'chat_id': 333, 'message_id': 2, 'doi': '10.1234/c'},
+            {'chat_id': 333, 'message_id': 3, 'doi': '10.1234/c'},
+        ]
+
+        response = api_client.post(
+            reverse('request-pdf-bulk'), {'items': items}, format='json'
+        )
+
+        assert response.status_code == 201
+        assert [r['status'] for r in response.data['results']] == [
+            'duplicate', 'created', 'duplicate'
+        ]
+        assert Request.objects.count() == 2
+
+    def test_bulk_lost_race_is_duplicate(self, api_client):
+        """Test that a row skipped by the unique index is not reported as created."""
+        original = Request.objects.bulk_create
+
+        def racing_bulk_create(*args, **kwargs):
+            # Параллельный запрос вставляет ту же пару между проверкой и вставкой
+            Request.objects.create(
+                doi='10.1234/d', status='pending', chat_id=444,
+                expires_at=timezone.now() + timedelta(days=1)
+            )
+            return original(*args, **kwargs)
+
+        items = [
+            {'chat_id': 444, 'message_id': 1, 'doi': '10.1234/d'},
+            {'chat_id': 444, 'message_id': 2, 'doi': '10.1234/e'},
+        ]
+        with patch.object(Request.objects, 'bulk_create', side_effect=racing_bulk_create):
+            response = api_client.post(
+                reverse('request-pdf-bulk'), {'items': items}, format='json'
+            )
+
+        assert [r['status'] for r in response.data['results']] == ['duplicate', 'created']
+        assert Request.objects.filter(chat_id=444, doi='10.1234/d').count() == 1
+
+    def test_bulk_normalizes_doi(self, api_client):
+        """Test that DOI spellings are normalized and linked to one Article."""
+        items = [
+            {'chat_id': 111, 'message_id': 1, 'doi': 'https://doi.org/10.1234/ABC'},
+            {'chat_id': 111, 'message_id': 2, 'doi': '10.1234/abc'},
+            {'chat_id': 222, 'message_id': 3, 'doi': 'doi:10.1234/Abc'},
+        ]
+
+        response = api_client.post(
+            reverse('request-pdf-bulk'), {'items': items}, format='json'
+        )
+
+        assert [r['status'] for r in response.data['results']] == [
+            'created', 'duplicate', 'created'
+        ]
+        assert Article.objects.count() == 1
+        assert set(Request.objects.values_list('doi', flat=True)) == {'10.1234/abc'}
+        assert Request.objects.filter(article__doi='10.1234/abc').count() == 2
+
+    def test_bulk_invalid_doi(self, api_client):
+        """Test that an invalid item rejects the whole batch."""
+        items = [
+            {'chat_id': 111, 'message_id': 1, 'doi': '10.1234/a'},
+            {'chat_id': 111, 'message_id': 2, 'doi': 'not-a-doi'},
+        ]
+
+        response = api_client.post(
+            reverse('request-pdf-bulk'), {'items': items}, format='json'
+        )
+
+        assert response.status_code == 400
+        assert not Request.objects.exists()
+
+
+@pytest.mark.django_db
+class TestEntitlementAPIView:
+    @pytest.fixture
+    def subscriber(self, chat_user):
+        Subscription.objects.create(
+            user=chat_user, end_date=timezone.now() + timedelta(days=10), reason='uploads'
+        )
+        chat_user.refresh_from_db()
+        return chat_user
+
+    def test_returns_active_subscriptions(self, api_client, subscriber, django_assert_num_queries):
+        """Test that only users with an active subscription are returned, in one query."""
+        expired = TelegramUser.objects.create(telegram_id=2, username='expired')
+        Subscription.objects.create(
+            user=expired, end_date=timezone.now() - timedelta(days=1), reason='uploads'
+        )
+        payload = {'telegram_ids': [subscriber.telegram_id, expired.telegram_id, 3]}
+
+        with django_assert_num_queries(1):
+            response = api_client.post(reverse('entitlements'), payload, format='json')
+
+        assert response.status_code == 200
+        assert response.data == {'entitlements': [{
+            'telegram_id': subscriber.telegram_id,
+            'subscription_until': subscriber.subscription_until.isoformat(),
+        }]}
+        assert response['ETag']
+
+    def test_repeat_is_served_from_cache(self, api_client, subscriber, django_assert_num_queries):
+        payload = {'telegram_ids': [subscriber.telegram_id]}
+        first = api_client.post(reverse('entitlements'), payload, format='json')
+
+        with django_assert_num_queries(0):
+            second = api_client.post(reverse('entitlements'), payload, format='json')
+
+        assert second.data == first.data
+        assert second['ETag'] == first['ETag']
+
+    def test_not_modified(self, api_client, subscriber):
+        """Test that a matching If-None-Match gets 304 without a body."""
+        payload = {'telegram_ids': [subscriber.telegram_id]}
+        etag = api_client.post(reverse('entitlements'), payload, format='json')['ETag']
+
+        response = api_client.post(
+            reverse('entitlements'), payload, format='json', headers={'If-None-Match': etag}
+        )
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_stale_etag(self, api_client, subscriber):
+        payload = {'telegram_ids': [subscriber.telegram_id]}
+
+        response = api_client.post(
+            reverse('entitlements'), payload, format='json', headers={'If-None-Match': '"stale"'}
+        )
+
+        assert response.status_code == 200
+        assert len(response.data['entitlements']) == 1
+
+    def test_too_many_ids(self, api_client):
+        payload = {'telegram_ids': list(range(MAX_ENTITLEMENT_IDS + 1))}
+
+        response = api_client.post(reverse('entitlements'), payload, format='json')
+
+        assert response.status_code == 400
@@ -6,7 +6,7 @@ from telegram.ext import ContextTypes
 from bot.handlers.start import start_handler
 from bot.handlers.help import help_handler
 from bot.handlers.doi_request import handle_request
-from bot.models import Request, ChatUser
+from bot.models import Request, TelegramUser
 
 
 @pytest.fixture
@@ -4,7 +4,7 @@ from telegram import Update, Chat, Message, User, CallbackQuery
 from telegram.ext import ContextTypes
 
 from bot.handlers.callback_handlers import handle_vote_callback
-from bot.models import Request, ChatUser, PDFUpload, Validation
+from bot.models import Request, TelegramUser, PDFUpload, Validation
 
 
 @pytest.fixture
@@ -167,8 +167,8 @@ async def test_handle_vote_callback_multiple_votes(
     mock_timezone.now.return_value = mock_now
     
     # Create two more users for voting
-    user2 = ChatUser.objects.create(telegram_id=111222333, username="user2")
-    user3 = ChatUser.objects.create(telegram_id=444555666, username="user3")
+    user2 = TelegramUser.objects.create(telegram_id=111222333, username="user2")
+    user3 = TelegramUser.objects.create(telegram_id=444555666, username="user3")
     
     # Set the callback data to vote for the pdf_upload fixture
     telegram_update_with_callback.callback_query.data = f"vote_valid:{pdf_upload.id}"
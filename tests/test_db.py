@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import pytest
+from asgiref.sync import sync_to_async
+
+from bot.db import db_async, run_in_db_pool
+
+QUERY_TIME = 0.1
+CONCURRENCY = 4
+
+
+def _slow_query():
+    time.sleep(QUERY_TIME)
+    return 1
+
+
+async def _run_concurrently(call):
+    started = time.monotonic()
+    results = await asyncio.gather(*(call() for _ in range(CONCURRENCY)))
+    assert results == [1] * CONCURRENCY
+    return time.monotonic() - started
+
+
+@pytest.mark.asyncio
+async def test_pool_runs_queries_in_parallel():
+    """Test that concurrent handlers overlap their DB work instead of queueing on one thread."""
+    serial = await _run_concurrently(sync_to_async(_slow_query, thread_sensitive=True))
+    pooled = await _run_concurrently(lambda: run_in_db_pool(_slow_query))
+
+    assert serial >= QUERY_TIME * CONCURRENCY
+    assert pooled < QUERY_TIME * CONCURRENCY / 2
+
+
+@pytest.mark.asyncio
+async def test_db_async_passes_arguments():
+    """Test that wrapped functions receive their arguments and return values."""
+    add = db_async(lambda a, b=0: a + b)
+
+    assert await add(1, b=2) == 3
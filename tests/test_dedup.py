@@ -0,0 +1,95 @@
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from bot.dedup import claim_once, enqueue_once
+from bot.handlers.callback_handlers import handle_vote_callback
+from bot.handlers.file_handlers import handle_pdf_upload
+
+
+def test_claim_once():
+    assert claim_once('vote:1:2') is True
+    assert claim_once('vote:1:2') is False
+    assert claim_once('vote:1:3') is True
+
+
+def test_enqueue_once():
+    """Test that only the first event with a key reaches the queue."""
+    task = MagicMock()
+
+    first = enqueue_once(task, 'upload:1:2', 'a', b=1)
+    second = enqueue_once(task, 'upload:1:2', 'a', b=1)
+
+    task.delay.assert_called_once_with('a', b=1)
+    assert first is task.delay.return_value
+    assert second is None
+
+
+def test_failed_enqueue_releases_the_key():
+    """Test that an event is not lost when the broker rejects the first attempt."""
+    task = MagicMock()
+    task.delay.side_effect = [ConnectionError, 'result']
+
+    with pytest.raises(ConnectionError):
+        enqueue_once(task, 'upload:1:2')
+
+    assert enqueue_once(task, 'upload:1:2') == 'result'
+    assert task.delay.call_count == 2
+
+
+def make_vote_update(query_id):
+    update = MagicMock()
+    update.callback_query.id = query_id
+    update.callback_query.data = 'vote_valid:7'
+    update.callback_query.from_user.id = 42
+    update.callback_query.from_user.username = 'voter'
+    update.callback_query.answer = AsyncMock()
+    return update
+
+
+@pytest.mark.asyncio
+async def test_double_tap_is_submitted_once(monkeypatch):
+    """Test that two callback queries for the same vote are submitted once."""
+    submit_vote = MagicMock()
+    monkeypatch.setattr('bot.handlers.callback_handlers.submit_vote', submit_vote)
+
+    for query_id in ('cq-1', 'cq-2'):
+        update = make_vote_update(query_id)
+        await handle_vote_callback(update, MagicMock())
+        update.callback_query.answer.assert_awaited_once()
+
+    submit_vote.assert_called_once_with('cq-1', 'vote_valid:7', 42, 'voter')
+
+
+@pytest.mark.asyncio
+async def test_failed_submit_can_be_retried(monkeypatch):
+    """Test that a vote the buffer did not accept is not answered and can be sent again."""
+    submit_vote = MagicMock(side_effect=[ConnectionError, None])
+    monkeypatch.setattr('bot.handlers.callback_handlers.submit_vote', submit_vote)
+
+    update = make_vote_update('cq-1')
+    with pytest.raises(ConnectionError):
+        await handle_vote_callback(update, MagicMock())
+    update.callback_query.answer.assert_not_awaited()
+
+    await handle_vote_callback(make_vote_update('cq-2'), MagicMock())
+
+    assert submit_vote.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_is_enqueued_off_the_event_loop(monkeypatch):
+    """Test that the blocking claim and broker publish run in the bot thread pool."""
+    threads = []
+    monkeypatch.setattr(
+        'bot.handlers.file_handlers.Request.objects.get', MagicMock(return_value=MagicMock(id=5))
+    )
+    monkeypatch.setattr(
+        'bot.handlers.file_handlers.enqueue_once',
+        lambda *args: threads.append(threading.current_thread())
+    )
+
+    await handle_pdf_upload(MagicMock(), MagicMock())
+
+    assert threads and threads[0] is not threading.current_thread()
@@ -0,0 +1,70 @@
+from unittest.mock import MagicMock, patch
+
+from bot.deletions import DELETION_QUEUE_KEY, DeletionQueue
+
+
+@patch('bot.deletions.time.time', return_value=1000.0)
+def test_schedule(mock_time):
+    """Test that a message is stored with its due time as the score."""
+    client = MagicMock()
+    queue = DeletionQueue(client)
+
+    queue.schedule(-100123, 42, 3600)
+
+    client.zadd.assert_called_once_with(DELETION_QUEUE_KEY, {'-100123:42': 4600.0})
+
+
+@patch('bot.deletions.time.time', return_value=1000.0)
+def test_claim_due(mock_time, settings):
+    """Test that due members are leased and parsed back into (chat_id, message_id) pairs."""
+    settings.DELETION_SWEEP_LEASE = 60
+    client = MagicMock()
+    client.register_script.return_value.return_value = [b'-100123:42', b'7:1']
+    queue = DeletionQueue(client)
+
+    assert queue.claim_due(100) == [(-100123, 42), (7, 1)]
+    client.register_script.return_value.assert_called_once_with(
+        keys=[DELETION_QUEUE_KEY], args=[1000.0, 100, 1060.0]
+    )
+
+
+def test_remove():
+    """Test that processed messages are removed with one ZREM."""
+    client = MagicMock()
+    queue = DeletionQueue(client)
+
+    queue.remove([(-100123, 42), (7, 1)])
+    queue.remove([])
+
+    client.zrem.assert_called_once_with(DELETION_QUEUE_KEY, '-100123:42', '7:1')
+
+
+def test_claim_due_script(redis_client, settings):
+    """Test the claim script against Redis: due members are leased, then released by remove."""
+    settings.DELETION_SWEEP_LEASE = 60
+    queue = DeletionQueue(redis_client)
+    with patch('bot.deletions.time.time', return_value=1000.0):
+        queue.schedule(1, 10, 0)
+        queue.schedule(1, 11, 0)
+        queue.schedule(2, 20, 300)
+
+        assert sorted(queue.claim_due(10)) == [(1, 10), (1, 11)]
+        # Арендованные сообщения не достаются параллельному проходу
+        assert queue.claim_due(10) == []
+
+    with patch('bot.deletions.time.time', return_value=1061.0):
+        queue.remove([(1, 10)])
+        # Сообщение упавшего прохода возвращается после аренды
+        assert queue.claim_due(10) == [(1, 11)]
+
+    assert len(queue) == 2
+
+
+def test_defer_keeps_only_queued_messages(redis_client):
+    """Test that a retry time is set for queued messages and removed ones are not re-added."""
+    queue = DeletionQueue(redis_client)
+    with patch('bot.deletions.time.time', return_value=1000.0):
+        queue.schedule(1, 10, 0)
+        queue.defer({(1, 10): 30, (1, 11): 30})
+
+    assert redis_client.zrange(DELETION_QUEUE_KEY, 0, -1, withscores=True) == [(b'1:10', 1030.0)]
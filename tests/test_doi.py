@@ -0,0 +1,22 @@
+import pytest
+
+from bot.doi import doi_hash, normalize_doi
+
+
+@pytest.mark.parametrize('value', [
+    '10.1234/Test.DOI',
+    '  10.1234/test.doi ',
+    'https://doi.org/10.1234/test.doi',
+    'http://dx.doi.org/10.1234/TEST.doi',
+    'doi:10.1234/test.doi',
+    'https://doi.org/10.1234%2Ftest.doi',
+])
+def test_normalize_doi(value):
+    """Test that DOI spellings are reduced to one canonical form."""
+    assert normalize_doi(value) == '10.1234/test.doi'
+
+
+def test_doi_hash():
+    """Test that equivalent DOIs share the same hash."""
+    assert doi_hash('https://doi.org/10.1234/TEST.doi') == doi_hash('10.1234/test.doi')
+    assert doi_hash('10.1234/a') != doi_hash('10.1234/b')
@@ -4,7 +4,7 @@ from telegram import Update, Chat, Message, User, Document, File
 from telegram.ext import ContextTypes
 
 from bot.handlers.file_handlers import handle_pdf_upload
-from bot.models import Request, ChatUser, PDFUpload
+from bot.models import Request, TelegramUser, PDFUpload
 
 
 @pytest.fixture
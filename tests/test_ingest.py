@@ -0,0 +1,85 @@
+import hashlib
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import default_storage
+
+from bot.ingest import PDFRejected, ingest_telegram_pdf, pdf_storage_path, store_pdf_stream
+
+PDF_BYTES = b'%PDF-1.7\n' + b'x' * 1000 + b'\n%%EOF'
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Store uploaded files in a temporary MEDIA_ROOT."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _chunks(data, size=7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def test_store_pdf_stream():
+    """Test that a PDF is stored under its SHA-256 and the hash is returned."""
+    name, sha256 = store_pdf_stream(_chunks(PDF_BYTES))
+
+    assert sha256 == hashlib.sha256(PDF_BYTES).hexdigest()
+    assert name == pdf_storage_path(sha256)
+    with default_storage.open(name) as f:
+        assert f.read() == PDF_BYTES
+
+
+def test_identical_pdfs_stored_once(media_root):
+    """Test that the same content uploaded twice is kept as one file."""
+    first, _ = store_pdf_stream(_chunks(PDF_BYTES))
+    second, _ = store_pdf_stream(_chunks(PDF_BYTES, size=100))
+
+    assert first == second
+    assert len([p for p in media_root.rglob('*') if p.is_file()]) == 1
+
+
+def test_non_pdf_rejected_from_header():
+    """Test that a non-PDF is rejected after the first bytes without reading the rest."""
+    chunks = _chunks(b'<html>' + b'x' * 10000, size=3)
+
+    with pytest.raises(PDFRejected):
+        store_pdf_stream(chunks)
+
+    assert len(list(chunks)) > 3000
+
+
+def test_oversized_pdf_rejected(settings):
+    """Test that reading stops once the size limit is exceeded."""
+    settings.PDF_MAX_SIZE = 100
+
+    with pytest.raises(PDFRejected):
+        store_pdf_stream(_chunks(PDF_BYTES))
+
+
+@patch('bot.ingest.get_telegram_client')
+def test_ingest_rejects_by_reported_size(mock_get_client, settings):
+    """Test that files Telegram reports as too large are not downloaded."""
+    settings.PDF_MAX_SIZE = 100
+    client = mock_get_client.return_value
+    client.get_file.return_value = {'file_path': 'documents/file.pdf', 'file_size': 101}
+
+    with pytest.raises(PDFRejected):
+        ingest_telegram_pdf('tg_file_id')
+
+    client.download_file.assert_not_called()
+
+
+@patch('bot.ingest.get_telegram_client')
+def test_ingest_telegram_pdf(mock_get_client):
+    """Test that the Telegram file is streamed into storage."""
+    client = mock_get_client.return_value
+    client.get_file.return_value = {'file_path': 'documents/file.pdf', 'file_size': len(PDF_BYTES)}
+    response = client.download_file.return_value.__enter__.return_value
+    response.iter_content.return_value = _chunks(PDF_BYTES)
+
+    name, sha256 = ingest_telegram_pdf('tg_file_id')
+
+    client.download_file.assert_called_once_with('documents/file.pdf')
+    assert name == pdf_storage_path(sha256)
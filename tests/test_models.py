@@ -1,24 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from unittest.mock import patch
 
 import pytest
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from bot.models import (
-    ChatUser,
+    CONFIG_LOCAL_TTL,
+    CONFIG_VERSION_KEY,
+    Article,
     Config,
     Notification,
     PDFUpload,
     Request,
     Subscription,
+    TelegramUser,
     Validation,
 )
 
 
 @pytest.mark.django_db
 class TestChatUser:
-    def test_create_chat_user(self, chat_user):
-        """Test creating a ChatUser."""
+    def test_create_telegram_user(self, chat_user):
+        """Test creating a TelegramUser."""
         assert chat_user.telegram_id == 123456789
         assert chat_user.username == "test_user"
         assert chat_user.is_in_bot is True
@@ -26,9 +34,98 @@ class TestChatUser:
         assert chat_user.validation_count == 0
 
     def test_str_representation(self, chat_user):
-        """Test the string representation of a ChatUser."""
+        """Test the string representation of a TelegramUser."""
         assert str(chat_user) == "123456789 test_user"
 
+    def test_increment_counter(self, chat_user):
+        """Test that counters are incremented in the DB and the new value is returned."""
+        assert chat_user.increment_counter('upload_count') == 1
+        assert chat_user.increment_counter('upload_count') == 2
+        assert chat_user.upload_count == 2
+
+        chat_user.refresh_from_db()
+        assert (chat_user.upload_count, chat_user.validation_count) == (2, 0)
+
+    def test_increment_unknown_counter(self, chat_user):
+        """Test that only the known counters can be incremented."""
+        with pytest.raises(ValueError):
+            chat_user.increment_counter('is_staff')
+
+    def test_upload_signal_increments_counter(self, pdf_upload, chat_user):
+        """Test that creating a PDFUpload bumps the uploader's counter."""
+        chat_user.refresh_from_db()
+        assert chat_user.upload_count == 1
+
+    def test_signal_does_not_load_the_user(self, request_obj, chat_user, config):
+        """Test that an upload created by user_id is counted without a SELECT of the user."""
+        Config.get_cached()
+
+        with CaptureQueriesContext(connection) as queries:
+            PDFUpload.objects.create(
+                request=request_obj, user_id=chat_user.pk, file='x.pdf', chat_message_id=1
+            )
+
+        assert [query['sql'].split()[0] for query in queries] == ['INSERT', 'UPDATE']
+        chat_user.refresh_from_db()
+        assert chat_user.upload_count == 1
+
+
+@pytest.mark.django_db
+def test_increment_counter_stale_instances(chat_user):
+    """Test that interleaved workers holding stale copies never lose increments."""
+    first = TelegramUser.objects.get(pk=chat_user.pk)
+    second = TelegramUser.objects.get(pk=chat_user.pk)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert first.increment_counter('validation_count') == 1
+        assert second.increment_counter('validation_count') == 2
+        assert first.increment_counter('validation_count') == 3
+
+    # Каждый инкремент — одно атомарное UPDATE без предварительного SELECT
+    assert len(queries) == 3
+    assert all(
+        query['sql'].startswith('UPDATE') and '"validation_count" + ' in query['sql']
+        for query in queries
+    )
+    chat_user.refresh_from_db()
+    assert chat_user.validation_count == 3
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason="SQLite serializes writers, the stress test needs a real DB server"
+)
+@pytest.mark.django_db(transaction=True)
+def test_increment_counter_concurrent(chat_user):
+    """Test that parallel workers never lose increments."""
+    workers, per_worker = 16, 50
+
+    def work():
+        user = TelegramUser.objects.get(pk=chat_user.pk)
+        try:
+            for _ in range(per_worker):
+                user.increment_counter('validation_count')
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(work) for _ in range(workers)]:
+            future.result()
+
+    chat_user.refresh_from_db()
+    assert chat_user.validation_count == workers * per_worker
+
+
+@pytest.mark.django_db
+class TestArticle:
+    def test_get_for_doi(self):
+        """Test that every spelling of a DOI resolves to the same Article."""
+        article = Article.get_for_doi("https://doi.org/10.1234/TEST.doi")
+
+        assert article.doi == "10.1234/test.doi"
+        assert Article.get_for_doi("doi:10.1234/test.doi") == article
+        assert Article.objects.count() == 1
+
 
 @pytest.mark.django_db
 class TestRequest:
@@ -53,6 +150,24 @@ class TestRequest:
         """Test the string representation of a Request."""
         assert str(request_obj).startswith("10.1234/test.doi")
 
+    def test_unique_active_request(self, request_obj):
+        """Test that only one active request per chat and DOI can exist."""
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Request.objects.create(
+                doi=request_obj.doi,
+                status="completed",
+                chat_id=request_obj.chat_id
+            )
+
+        request_obj.status = "expired"
+        request_obj.save()
+        Request.objects.create(
+            doi=request_obj.doi,
+            status="pending",
+            chat_id=request_obj.chat_id
+        )
+        assert Request.objects.filter(doi=request_obj.doi).count() == 2
+
 
 @pytest.mark.django_db
 class TestPDFUpload:
@@ -71,7 +186,7 @@ class TestPDFUpload:
             status="pending",
             chat_id=123456789
         )
-        user = ChatUser.objects.create(
+        user = TelegramUser.objects.create(
             telegram_id=111222333,
             username="test_user2"
         )
@@ -141,6 +256,47 @@ class TestConfig:
         assert config2.pk == 1
         assert config1 == config2
 
+    def test_get_cached_skips_db(self, config, django_assert_num_queries):
+        """Test that repeated reads are served from the local copy."""
+        Config.get_cached()
+
+        with django_assert_num_queries(0):
+            assert Config.get_cached().uploads_for_subscription == 10
+
+    def test_get_cached_sees_local_save(self, config, django_capture_on_commit_callbacks):
+        """Test that saving the Config drops the local copy once the save commits."""
+        Config.get_cached()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            config.uploads_for_subscription = 5
+            config.save()
+
+        assert Config.get_cached().uploads_for_subscription == 5
+
+    def test_version_is_bumped_after_commit(self, config, django_capture_on_commit_callbacks):
+        """Test that other processes cannot cache the old row under the new version."""
+        version = cache.get(CONFIG_VERSION_KEY)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            config.save()
+            assert cache.get(CONFIG_VERSION_KEY) == version
+
+        assert len(callbacks) == 1
+
+    @patch('bot.models.time.monotonic')
+    def test_get_cached_sees_remote_save(self, mock_monotonic, config):
+        """Test that a save in another process is picked up after the local TTL."""
+        mock_monotonic.return_value = 1000.0
+        Config.get_cached()
+
+        # Another process saves the row and bumps the version key
+        Config.objects.filter(pk=config.pk).update(uploads_for_subscription=7)
+        cache.set(CONFIG_VERSION_KEY, 'other-process', None)
+
+        assert Config.get_cached().uploads_for_subscription == 10
+        mock_monotonic.return_value = 1000.0 + CONFIG_LOCAL_TTL
+        assert Config.get_cached().uploads_for_subscription == 7
+
 
 @pytest.mark.django_db
 class TestNotification:
@@ -181,6 +337,55 @@ class TestSubscription:
         assert subscription.reason == "uploads"
         assert subscription.end_date.date() == end_date.date()
 
+    def test_subscription_until_is_maintained(self, chat_user):
+        """Test that TelegramUser.subscription_until follows the latest end_date."""
+        later = timezone.now() + timedelta(days=30)
+        earlier = timezone.now() + timedelta(days=10)
+
+        Subscription.objects.create(user=chat_user, end_date=later, reason="uploads")
+        Subscription.objects.create(user=chat_user, end_date=earlier, reason="uploads")
+
+        chat_user.refresh_from_db()
+        assert chat_user.subscription_until == later
+        assert chat_user.has_active_subscription
+
+    def test_subscription_until_follows_deletion(self, chat_user):
+        """Test that deleting the latest subscription falls back to the remaining ones."""
+        later = timezone.now() + timedelta(days=30)
+        earlier = timezone.now() + timedelta(days=10)
+        Subscription.objects.create(user=chat_user, end_date=earlier, reason="uploads")
+        latest = Subscription.objects.create(user=chat_user, end_date=later, reason="uploads")
+
+        latest.delete()
+        chat_user.refresh_from_db()
+        assert chat_user.subscription_until == earlier
+
+        Subscription.objects.filter(user=chat_user).delete()
+        chat_user.refresh_from_db()
+        assert chat_user.subscription_until is None
+
+    def test_subscription_until_follows_lowered_end_date(self, chat_user):
+        """Test that shortening a subscription in the admin revokes the access."""
+        subscription = Subscription.objects.create(
+            user=chat_user, end_date=timezone.now() + timedelta(days=30), reason="uploads"
+        )
+
+        subscription.end_date = timezone.now() - timedelta(days=1)
+        subscription.save()
+
+        assert subscription.user.subscription_until == subscription.end_date
+        chat_user.refresh_from_db()
+        assert chat_user.subscription_until == subscription.end_date
+        assert not chat_user.has_active_subscription
+
+    def test_expired_subscription_is_not_active(self, chat_user):
+        Subscription.objects.create(
+            user=chat_user, end_date=timezone.now() - timedelta(days=1), reason="uploads"
+        )
+
+        chat_user.refresh_from_db()
+        assert not chat_user.has_active_subscription
+
     def test_str_representation(self, chat_user):
         """Test the string representation of a Subscription."""
         end_date = timezone.now() + timedelta(days=30)
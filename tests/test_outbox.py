@@ -0,0 +1,152 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from django.utils import timezone
+
+from bot.models import OutboxMessage
+from bot.outbox import claim_batch, deliver, enqueue_telegram
+from bot.tasks import dispatch_outbox_task
+from bot.telegram_client import TelegramAPIError
+
+
+@pytest.fixture
+def mock_client():
+    """Подменяет TelegramClient, которым отправляет outbox."""
+    client = MagicMock()
+    with patch('bot.outbox.get_telegram_client', return_value=client):
+        yield client
+
+
+@pytest.fixture
+def message(db):
+    return enqueue_telegram('test:1', 'send_message', chat_id=111, text='hi')
+
+
+@pytest.mark.django_db
+class TestEnqueue:
+    def test_same_key_is_written_once(self, message):
+        """Test that repeated enqueues with the same key are deduplicated."""
+        again = enqueue_telegram('test:1', 'send_message', chat_id=111, text='other')
+
+        assert again.pk == message.pk
+        assert OutboxMessage.objects.count() == 1
+        assert again.params == {'chat_id': 111, 'text': 'hi'}
+
+    def test_dispatch_is_triggered_after_commit(self, django_capture_on_commit_callbacks):
+        with patch('bot.tasks.dispatch_outbox_task') as mock_dispatch:
+            with django_capture_on_commit_callbacks(execute=True):
+                enqueue_telegram('test:2', 'send_message', chat_id=111, text='hi')
+
+        mock_dispatch.delay.assert_called_once_with()
+
+
+@pytest.mark.django_db
+class TestClaimBatch:
+    def test_claimed_messages_are_leased(self, message, settings):
+        """Test that a claimed message is not handed out again until the lease expires."""
+        settings.OUTBOX_LEASE = 60
+
+        assert claim_batch(10) == [message]
+        assert claim_batch(10) == []
+
+        message.refresh_from_db()
+        assert message.next_attempt_at > timezone.now() + timedelta(seconds=50)
+
+    def test_future_and_sent_messages_are_skipped(self, message):
+        OutboxMessage.objects.filter(pk=message.pk).update(status='sent')
+        enqueue_telegram('test:2', 'send_message', chat_id=111, text='later')
+        OutboxMessage.objects.filter(idempotency_key='test:2').update(
+            next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        assert claim_batch(10) == []
+
+
+@pytest.mark.django_db
+class TestDeliver:
+    def test_success(self, message, mock_client):
+        assert deliver(message) is True
+
+        mock_client.send_message.assert_called_once_with(chat_id=111, text='hi')
+        message.refresh_from_db()
+        assert message.status == 'sent'
+        assert message.sent_at is not None
+
+    def test_network_error_is_retried_with_backoff(self, message, mock_client, settings):
+        """Test that transient errors count an attempt and back off exponentially."""
+        settings.OUTBOX_RETRY_BASE = 5
+        mock_client.send_message.side_effect = requests.ConnectionError('down')
+
+        deliver(message)
+        first_retry = message.next_attempt_at
+        deliver(message)
+
+        message.refresh_from_db()
+        assert message.status == 'pending'
+        assert message.attempts == 2
+        assert message.last_error == 'down'
+        assert message.next_attempt_at - first_retry > timedelta(seconds=4)
+
+    def test_gives_up_after_max_attempts(self, message, mock_client, settings):
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+        mock_client.send_message.side_effect = TelegramAPIError('sendMessage', 502, 'Bad Gateway')
+
+        deliver(message)
+        deliver(message)
+
+        message.refresh_from_db()
+        assert message.status == 'failed'
+        assert message.attempts == 2
+
+    def test_client_error_is_permanent(self, message, mock_client):
+        """Test that errors like a blocked bot are not retried."""
+        mock_client.send_message.side_effect = TelegramAPIError(
+            'sendMessage', 403, 'Forbidden: bot was blocked by the user'
+        )
+
+        deliver(message)
+
+        message.refresh_from_db()
+        assert message.status == 'failed'
+        assert message.attempts == 1
+
+    def test_throttled_does_not_count_attempt(self, message, mock_client):
+        mock_client.send_message.side_effect = TelegramAPIError(
+            'sendMessage', 429, 'Too Many Requests', retry_after=30
+        )
+
+        deliver(message)
+
+        message.refresh_from_db()
+        assert message.status == 'pending'
+        assert message.attempts == 0
+        assert message.next_attempt_at > timezone.now() + timedelta(seconds=25)
+
+    def test_rate_limited_is_postponed(self, message, mock_client, settings):
+        settings.TELEGRAM_RATE_LIMIT_ENABLED = True
+        limiter = MagicMock()
+        limiter.acquire.return_value = 2.0
+
+        with patch('bot.outbox.get_rate_limiter', return_value=limiter):
+            assert deliver(message) is False
+
+        limiter.acquire.assert_called_once_with(111)
+        mock_client.send_message.assert_not_called()
+        message.refresh_from_db()
+        assert message.attempts == 0
+
+
+@pytest.mark.django_db
+def test_dispatch_outbox_task(mock_client, settings):
+    """Test that the dispatcher drains all due messages in batches."""
+    for i in range(5):
+        enqueue_telegram(f'test:{i}', 'send_message', chat_id=i, text='hi')
+
+    settings.OUTBOX_BATCH_SIZE = 2
+
+    assert dispatch_outbox_task() == 5
+
+    assert mock_client.send_message.call_count == 5
+    assert not OutboxMessage.objects.filter(status='pending').exists()
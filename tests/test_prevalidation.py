@@ -0,0 +1,140 @@
+import zlib
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from bot.prevalidation import ACCEPTED, REJECTED, prevalidate_pdf
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Store test PDFs in a temporary MEDIA_ROOT."""
+    settings.MEDIA_ROOT = tmp_path
+
+
+def _store_pdf(content=b'', page_count=1, trailer=b'<< /Root 1 0 R >>', later_pages=()):
+    """Store a PDF whose first page shows content; later_pages hold the following pages."""
+    pages = [content, *later_pages]
+    kids = b' '.join(b'%d 0 R' % (10 + 2 * i) for i in range(len(pages)))
+    data = (
+        b'%PDF-1.7\n'
+        b'1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n'
+        b'2 0 obj << /Type /Pages /Kids [' + kids + b'] /Count ' + str(page_count).encode() + b' >> endobj\n'
+    )
+    for i, page in enumerate(pages):
+        page_num, contents_num = 10 + 2 * i, 11 + 2 * i
+        stream = zlib.compress(b'BT /F1 12 Tf ' + page + b' ET')
+        data += (
+            b'%d 0 obj << /Type /Page /Parent 2 0 R /Contents %d 0 R'
+            b' /Resources << /Font << /F1 << /Type /Font >> >> >> >> endobj\n' % (page_num, contents_num)
+            + b'%d 0 obj << /Length %d /Filter /FlateDecode >>\n' % (contents_num, len(stream))
+            + b'stream\n' + stream + b'\nendstream\nendobj\n'
+        )
+    data += b'trailer ' + trailer + b'\n%%EOF'
+    return default_storage.save('pdfs/test.pdf', ContentFile(data))
+
+
+def test_doi_match_split_by_kerning():
+    """Test that a DOI split across a TJ array still matches the request."""
+    name = _store_pdf(b'[(https://doi.org/10.12)-20(34/ABC.5)]TJ')
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (ACCEPTED, 'doi match')
+
+
+def test_doi_mismatch():
+    """Test that a file carrying only another DOI is rejected."""
+    name = _store_pdf(b'(doi: 10.9999/other.1.) Tj')
+
+    verdict, reason = prevalidate_pdf(name, '10.1234/abc.5')
+
+    assert verdict == REJECTED
+    assert reason == 'doi mismatch: 10.9999/other.1'
+
+
+def test_truncated_doi_is_undecided():
+    """Test that a DOI cut short by a line break does not reject the file."""
+    name = _store_pdf(b'(10.1234/ab) Tj')
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (None, 'undecided')
+
+
+def test_no_doi_is_undecided():
+    """Test that files without any DOI are left to voting."""
+    name = _store_pdf(b'(Some title) Tj')
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (None, 'undecided')
+
+
+def test_encrypted():
+    """Test that encrypted files are rejected."""
+    name = _store_pdf(trailer=b'<< /Root 1 0 R /Encrypt 5 0 R >>')
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (REJECTED, 'encrypted')
+
+
+def test_no_pages():
+    """Test that files with an empty page tree are rejected."""
+    name = _store_pdf(b'(10.1234/abc.5) Tj', page_count=0)
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (REJECTED, 'no pages')
+
+
+def test_longer_doi_is_not_a_match():
+    """Test that a DOI extending the requested one is a different DOI."""
+    name = _store_pdf(b'(https://doi.org/10.1234/abc.50) Tj')
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (REJECTED, 'doi mismatch: 10.1234/abc.50')
+
+
+def test_citation_in_references_is_ignored():
+    """Test that the requested DOI cited on a later page does not accept the file."""
+    name = _store_pdf(
+        b'(doi:10.9999/other.1) Tj',
+        page_count=2,
+        later_pages=[b'(References) Tj (10.1234/abc.5) Tj'],
+    )
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (REJECTED, 'doi mismatch: 10.9999/other.1')
+
+
+def test_dominant_other_doi_is_undecided():
+    """Test that a first page mostly about another DOI is left to voting."""
+    name = _store_pdf(b'(10.9999/other.1) Tj (10.9999/other.1) Tj (see 10.1234/abc.5) Tj')
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (None, 'undecided')
+
+
+def test_first_page_in_object_stream():
+    """Test that page dictionaries packed into an /ObjStm are found."""
+    content = zlib.compress(b'BT (10.1234/abc.5) Tj ET')
+    packed_objects = [
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /Contents 4 0 R >>',
+    ]
+    header = b'2 0 3 %d ' % (len(packed_objects[0]) + 1)
+    packed = zlib.compress(header + b' '.join(packed_objects))
+    data = (
+        b'%PDF-1.7\n'
+        b'1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n'
+        + b'5 0 obj << /Type /ObjStm /N 2 /First %d /Filter /FlateDecode >>\n' % len(header)
+        + b'stream\n' + packed + b'\nendstream\nendobj\n'
+        + b'4 0 obj << /Filter /FlateDecode >>\nstream\n' + content + b'\nendstream\nendobj\n'
+    )
+    name = default_storage.save('pdfs/test.pdf', ContentFile(data))
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (ACCEPTED, 'doi match')
+
+
+def test_malformed_object_stream_is_undecided():
+    """Test that a junk /ObjStm header leaves the decision to the vote instead of failing."""
+    packed = zlib.compress(b'2 x junk 0 << /Type /Page >>')
+    data = (
+        b'%PDF-1.7\n'
+        b'1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n'
+        + b'5 0 obj << /Type /ObjStm /N 2 /First 11 /Filter /FlateDecode >>\n'
+        + b'stream\n' + packed + b'\nendstream\nendobj\n'
+    )
+    name = default_storage.save('pdfs/test.pdf', ContentFile(data))
+
+    assert prevalidate_pdf(name, '10.1234/abc.5') == (None, 'undecided')
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+from celery import Celery
+from django.conf import settings
+
+import bot.tasks  # noqa: F401 — регистрирует задачи в приложении
+from celery_app import app
+
+
+def routed_queue(task, **options):
+    """Возвращает имя очереди, которую Celery выберет для задачи."""
+    return app.amqp.router.route(options, task)['queue'].name
+
+
+@pytest.mark.parametrize('task, queue', [
+    ('bot.tasks.handle_vote_callback_task', 'interactive'),
+    ('bot.tasks.flush_votes_task', 'interactive'),
+    ('bot.tasks.handle_pdf_upload_task', 'interactive'),
+    ('bot.tasks.delete_message_task', 'bulk'),
+    ('bot.tasks.dispatch_outbox_task', 'bulk'),
+    ('bot.tasks.expire_requests_task', 'maintenance'),
+])
+def test_task_routes(task, queue):
+    assert routed_queue(task) == queue
+
+
+def test_every_task_has_an_explicit_route():
+    """Test that no bot task silently falls back to the default queue."""
+    tasks = {name for name in app.tasks if name.startswith('bot.tasks.')}
+
+    assert tasks
+    assert tasks <= set(settings.CELERY_TASK_ROUTES)
+
+
+def test_unknown_task_goes_to_default_queue():
+    assert routed_queue('bot.tasks.not_a_task') == settings.CELERY_TASK_DEFAULT_QUEUE
+
+
+def test_explicit_queue_overrides_route():
+    """Test that a retry of a bulk Telegram call stays out of the interactive queue."""
+    assert routed_queue('bot.tasks.telegram_call_task') == 'interactive'
+    assert routed_queue('bot.tasks.telegram_call_task', queue=settings.CELERY_BULK_QUEUE) == 'bulk'
+
+
+def test_beat_tasks_are_routed():
+    """Test that every periodic task has an explicit queue."""
+    for entry in settings.CELERY_BEAT_SCHEDULE.values():
+        assert entry['task'] in settings.CELERY_TASK_ROUTES
+
+
+BULK_BACKLOG = 2000
+VOTE_TASK = 'bot.tasks.handle_vote_callback_task'
+
+
+def make_broker_app(routes):
+    """Создаёт Celery-приложение с брокером в памяти и заданными маршрутами."""
+    app = Celery('queues-test', broker='memory://', set_as_current=False)
+    app.conf.task_default_queue = settings.CELERY_TASK_DEFAULT_QUEUE
+    app.conf.task_routes = routes
+    return app
+
+
+@pytest.fixture
+def broker_app():
+    app = make_broker_app(settings.CELERY_TASK_ROUTES)
+    yield app
+    with app.connection_for_write() as conn:
+        for queue in (
+            settings.CELERY_INTERACTIVE_QUEUE,
+            settings.CELERY_BULK_QUEUE,
+            settings.CELERY_MAINTENANCE_QUEUE,
+        ):
+            conn.SimpleQueue(queue).clear()
+
+
+def enqueue_backlog(app, count):
+    for i in range(count):
+        app.send_task('bot.tasks.delete_message_task', args=[-100123, i])
+
+
+class BulkConsumer(threading.Thread):
+    """Воркер очереди bulk: разбирает удаления по одному, каждое стоит cost секунд."""
+
+    def __init__(self, app, cost=0.001):
+        super().__init__(daemon=True)
+        self.app = app
+        self.cost = cost
+        self.processed = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        with self.app.connection_for_write() as conn:
+            queue = conn.SimpleQueue(settings.CELERY_BULK_QUEUE)
+            while not self.stopped.is_set():
+                try:
+                    message = queue.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                time.sleep(self.cost)
+                message.ack()
+                self.processed += 1
+
+
+def vote_latency(app, bulk_backlog):
+    """Ставит bulk_backlog удалений и голос; воркер bulk занят удалениями.
+
+    Возвращает (секунды до получения голоса воркером interactive,
+    сколько удалений воркер bulk успел разобрать к этому моменту).
+    """
+    enqueue_backlog(app, bulk_backlog)
+    bulk = BulkConsumer(app)
+    bulk.start()
+    try:
+        with app.connection_for_write() as conn:
+            interactive = conn.SimpleQueue(settings.CELERY_INTERACTIVE_QUEUE)
+            started = time.perf_counter()
+            app.send_task(VOTE_TASK, args=['cb', 'vote_valid:1', 222, 'voter'])
+            message = interactive.get(timeout=1)
+            elapsed = time.perf_counter() - started
+            processed = bulk.processed
+            message.ack()
+    finally:
+        bulk.stopped.set()
+        bulk.join()
+    assert message.headers['task'] == VOTE_TASK
+    return elapsed, processed
+
+
+def test_vote_latency_is_flat_under_bulk_load(broker_app):
+    """Test that a vote is picked up at once while the bulk worker is saturated."""
+    idle, _ = vote_latency(broker_app, bulk_backlog=0)
+    saturated, processed = vote_latency(broker_app, bulk_backlog=BULK_BACKLOG)
+
+    # Воркер bulk ещё разбирает очередь, а голос уже получен
+    assert processed < BULK_BACKLOG
+    assert saturated < max(idle * 10, 0.05)
+
+
+def test_shared_queue_puts_votes_behind_the_backlog():
+    """Test that without the routes a vote waits for the whole bulk backlog."""
+    app = make_broker_app({})
+    enqueue_backlog(app, BULK_BACKLOG)
+    app.send_task(VOTE_TASK, args=['cb', 'vote_valid:1', 222, 'voter'])
+
+    with app.connection_for_write() as conn:
+        queue = conn.SimpleQueue(settings.CELERY_TASK_DEFAULT_QUEUE)
+        ahead = 0
+        while (message := queue.get(timeout=1)).headers['task'] != VOTE_TASK:
+            message.ack()
+            ahead += 1
+        message.ack()
+
+    assert ahead == BULK_BACKLOG
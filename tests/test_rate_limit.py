@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from bot.rate_limit import TokenBucketLimiter
+
+
+def test_buckets_private_and_group_chats(settings):
+    """Test that private chats and groups get their own per-chat limits."""
+    limiter = TokenBucketLimiter(MagicMock())
+
+    assert limiter.buckets() == [
+        ('telegram:rate:global', settings.TELEGRAM_GLOBAL_RATE, settings.TELEGRAM_GLOBAL_RATE)
+    ]
+    assert limiter.buckets(42)[1] == (
+        'telegram:rate:chat:42', settings.TELEGRAM_CHAT_RATE, settings.TELEGRAM_CHAT_BURST
+    )
+    assert limiter.buckets(-100123)[1] == (
+        'telegram:rate:chat:-100123', settings.TELEGRAM_GROUP_RATE, settings.TELEGRAM_GROUP_BURST
+    )
+
+
+@pytest.fixture
+def group_limit(settings):
+    """Allow one call per second into a group and plenty globally."""
+    settings.TELEGRAM_GLOBAL_RATE = 100
+    settings.TELEGRAM_GROUP_RATE = 1
+    settings.TELEGRAM_GROUP_BURST = 1
+
+
+def test_reserved_calls_queue_up(redis_client, group_limit):
+    """Test that each deferred call gets its own slot instead of the same wait."""
+    limiter = TokenBucketLimiter(redis_client)
+
+    assert limiter.acquire(-1, reserve=True) == 0
+    waits = [limiter.acquire(-1, reserve=True) for _ in range(4)]
+
+    assert waits == pytest.approx([1, 2, 3, 4], abs=0.1)
+    # Ключ корзины в долгу живёт, пока долг не погашен
+    assert redis_client.ttl('telegram:rate:chat:-1') >= 5
+
+
+def test_denied_call_without_reserve_takes_nothing(redis_client, group_limit):
+    limiter = TokenBucketLimiter(redis_client)
+
+    assert limiter.acquire(-1) == 0
+    first, second = limiter.acquire(-1), limiter.acquire(-1)
+
+    assert first == pytest.approx(1, abs=0.1)
+    assert second == pytest.approx(1, abs=0.1)
+
+
+def test_all_buckets_or_none(redis_client, settings):
+    """Test that a call denied by the chat bucket does not spend a global token."""
+    settings.TELEGRAM_GLOBAL_RATE = 2
+    settings.TELEGRAM_CHAT_RATE = 1
+    settings.TELEGRAM_CHAT_BURST = 1
+    limiter = TokenBucketLimiter(redis_client)
+
+    assert limiter.acquire(42) == 0
+    assert limiter.acquire(42) > 0
+    assert limiter.acquire(43) == 0
+    assert limiter.acquire() > 0
@@ -0,0 +1,200 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from bot.models import Article, Config, OutboxMessage, PDFUpload, Subscription
+from bot.services import (
+    USER_STATS_CACHE_KEY,
+    VALIDATED_PDF_CACHE_KEY,
+    award_subscription,
+    check_and_award_subscription,
+    get_user_stats,
+    get_validated_pdf,
+)
+
+
+@pytest.fixture
+def article():
+    """Create a test Article."""
+    return Article.get_for_doi("10.1234/test.doi")
+
+
+@pytest.fixture
+def validated_pdf(request_obj, chat_user, article):
+    """Create a validated PDFUpload for the test Article."""
+    return PDFUpload.objects.create(
+        request=request_obj,
+        article=article,
+        file="articles/test_file.pdf",
+        telegram_file_id="tg_file_id",
+        chat_message_id=123456,
+        user=chat_user,
+        is_valid=True,
+        validated_at=timezone.now()
+    )
+
+
+@pytest.mark.django_db
+class TestGetValidatedPdf:
+    def test_db_fallback_fills_cache(self, article, validated_pdf):
+        """Test that a cache miss falls back to the DB and populates the cache."""
+        entry = get_validated_pdf(article)
+
+        assert entry == {
+            'pdf_id': validated_pdf.id,
+            'file_id': 'tg_file_id',
+            'file': 'articles/test_file.pdf',
+        }
+        assert cache.get(VALIDATED_PDF_CACHE_KEY.format(article.doi_hash)) == entry
+
+    def test_cache_hit(self, article, validated_pdf, django_assert_num_queries):
+        """Test that a cached entry is served without DB queries."""
+        get_validated_pdf(article)
+
+        with django_assert_num_queries(0):
+            assert get_validated_pdf(article)['pdf_id'] == validated_pdf.id
+
+    def test_expired_pdf_is_ignored(self, article, validated_pdf):
+        """Test that PDFs past delete_at are not served."""
+        validated_pdf.delete_at = timezone.now() - timedelta(minutes=1)
+        validated_pdf.save()
+
+        assert get_validated_pdf(article) is None
+
+    def test_invalid_pdf_is_ignored(self, article, validated_pdf):
+        """Test that PDFs rejected by voting are not served."""
+        validated_pdf.is_valid = False
+        validated_pdf.save()
+
+        assert get_validated_pdf(article) is None
+
+
+@pytest.mark.django_db
+@patch('bot.services.award_subscription')
+class TestCheckAndAwardSubscription:
+    def test_award_on_threshold(self, mock_award, chat_user, config):
+        """Test that reaching a threshold awards a subscription for that reason."""
+        assert check_and_award_subscription(chat_user, 'uploads', 10) is True
+        mock_award.assert_called_once_with(chat_user, reason='uploads')
+
+    def test_no_award_below_threshold(self, mock_award, chat_user, config):
+        """Test that counts between thresholds award nothing."""
+        assert check_and_award_subscription(chat_user, 'validations', 10) is False
+        mock_award.assert_not_called()
+
+    def test_other_counter_is_ignored(self, mock_award, chat_user, config):
+        """Test that a validation event does not re-award an uploads subscription."""
+        chat_user.upload_count = 10
+
+        check_and_award_subscription(chat_user, 'validations', 1)
+
+        mock_award.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestGetUserStats:
+    def test_snapshot_is_cached(self, chat_user, config, django_assert_num_queries):
+        """Test that the first call costs one query and the next one none."""
+        end_date = timezone.now() + timedelta(days=10)
+        Subscription.objects.create(user=chat_user, end_date=end_date, reason='uploads')
+        Subscription.objects.create(
+            user=chat_user, end_date=timezone.now() - timedelta(days=1), reason='uploads'
+        )
+
+        Config.get_cached()
+
+        with django_assert_num_queries(1):
+            stats = get_user_stats(chat_user.telegram_id)
+        with django_assert_num_queries(0), patch('bot.services.cache', wraps=cache) as mock_cache:
+            assert get_user_stats(chat_user.telegram_id) == stats
+        # Снимок и версия Config читаются одной операцией кеша
+        assert [name for name, *_ in mock_cache.method_calls] == ['get_many']
+
+        assert stats['upload_count'] == 0
+        assert stats['validation_count'] == 0
+        assert stats['subscription_until'] == end_date
+        assert stats['uploads_for_subscription'] == config.uploads_for_subscription
+        assert stats['validations_for_subscription'] == config.validations_for_subscription
+
+    def test_config_change_refreshes_snapshot(
+        self, chat_user, config, django_capture_on_commit_callbacks
+    ):
+        """Test that new thresholds show up without waiting for the snapshot TTL."""
+        get_user_stats(chat_user.telegram_id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            config.uploads_for_subscription = 3
+            config.save()
+
+        assert get_user_stats(chat_user.telegram_id)['uploads_for_subscription'] == 3
+
+    def test_no_subscription(self, chat_user):
+        assert get_user_stats(chat_user.telegram_id)['subscription_until'] is None
+
+    def test_unknown_user(self, db):
+        assert get_user_stats(999999) is None
+
+    def test_upload_invalidates_snapshot(
+        self, chat_user, request_obj, config, django_capture_on_commit_callbacks
+    ):
+        """Test that creating a PDFUpload drops the cached snapshot."""
+        get_user_stats(chat_user.telegram_id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            PDFUpload.objects.create(
+                request=request_obj, file="articles/a.pdf", chat_message_id=1, user=chat_user
+            )
+
+        assert cache.get(USER_STATS_CACHE_KEY.format(chat_user.telegram_id)) is None
+        assert get_user_stats(chat_user.telegram_id)['upload_count'] == 1
+
+    def test_subscription_invalidates_snapshot(self, chat_user, django_capture_on_commit_callbacks):
+        """Test that a new subscription drops the cached snapshot."""
+        get_user_stats(chat_user.telegram_id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Subscription.objects.create(
+                user=chat_user, end_date=timezone.now() + timedelta(days=1), reason='validations'
+            )
+
+        assert get_user_stats(chat_user.telegram_id)['subscription_until'] is not None
+
+
+@pytest.mark.django_db
+class TestAwardSubscription:
+    def test_new_period_starts_now(self, chat_user):
+        before = timezone.now()
+
+        sub = award_subscription(chat_user, reason='uploads')
+
+        assert sub.start_date >= before
+        chat_user.refresh_from_db()
+        assert chat_user.subscription_until == sub.end_date
+
+    def test_period_is_chained_to_active_subscription(self, chat_user):
+        """Test that a second award extends the active subscription."""
+        first = award_subscription(chat_user, reason='uploads')
+        second = award_subscription(chat_user, reason='validations')
+
+        assert second.start_date == first.end_date
+        chat_user.refresh_from_db()
+        assert chat_user.subscription_until == second.end_date
+        assert chat_user.has_active_subscription
+
+    @patch('bot.tasks.dispatch_outbox_task')
+    def test_notification_goes_to_outbox(
+        self, mock_dispatch, chat_user, django_capture_on_commit_callbacks
+    ):
+        """Test that the notification is written to the outbox and sent only after commit."""
+        with django_capture_on_commit_callbacks() as callbacks:
+            sub = award_subscription(chat_user, reason='uploads')
+            mock_dispatch.delay.assert_not_called()
+
+        message = OutboxMessage.objects.get()
+        assert message.idempotency_key == f'subscription:{sub.pk}'
+        assert message.method == 'send_message'
+        assert message.params['chat_id'] == chat_user.telegram_id
+        assert mock_dispatch.delay in callbacks
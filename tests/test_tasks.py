@@ -1,62 +1,493 @@
+from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
 import pytest
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from bot.models import Config
-from bot.tasks import delete_message_task, schedule_notification_deletion, schedule_pdf_deletion
+from bot.ingest import PDFRejected
+from bot.models import Article, Config, PDFUpload, Request, TelegramUser, Validation
+from bot.rate_limit import TokenBucketLimiter
+from bot.services import get_validated_pdf
+from bot.tasks import (
+    apply_votes,
+    delete_message_task,
+    expire_requests_task,
+    flush_votes_task,
+    handle_pdf_upload_task,
+    handle_vote_callback_task,
+    request_pdf_task,
+    schedule_notification_deletion,
+    schedule_pdf_deletion,
+    send_telegram,
+    submit_vote,
+    sweep_due_deletions_task,
+    telegram_call_task,
+)
+from bot.telegram_client import TelegramAPIError
 
 
 @pytest.fixture
-def mock_bot():
-    """Create a mock Telegram Bot."""
-    with patch('telegram.Bot') as mock_bot_class:
-        mock_bot_instance = MagicMock()
-        mock_bot_class.return_value = mock_bot_instance
-        yield mock_bot_instance
+def mock_client():
+    """Patch the shared Telegram client used by the tasks."""
+    with patch('bot.tasks.get_telegram_client') as mock_get_client:
+        yield mock_get_client.return_value
+
+
+@pytest.fixture
+def mock_limiter(settings):
+    """Enable rate limiting with a mocked limiter."""
+    settings.TELEGRAM_RATE_LIMIT_ENABLED = True
+    with patch('bot.tasks.get_rate_limiter') as mock_get_limiter:
+        mock_get_limiter.return_value.acquire.return_value = 0
+        yield mock_get_limiter.return_value
+
+
+@patch('bot.tasks.telegram_call_task')
+class TestSendTelegram:
+    def test_call_within_limit(self, mock_call_task, mock_client, mock_limiter):
+        """Test that calls with an available token go straight to the client."""
+        send_telegram('send_message', chat_id=42, text="hi")
+
+        mock_limiter.acquire.assert_called_once_with(42, reserve=True)
+        mock_client.send_message.assert_called_once_with(chat_id=42, text="hi")
+        mock_call_task.apply_async.assert_not_called()
+
+    def test_call_over_limit_is_rescheduled(self, mock_call_task, mock_client, mock_limiter):
+        """Test that throttled calls are re-enqueued with a countdown instead of blocking."""
+        mock_limiter.acquire.return_value = 2.5
+
+        assert send_telegram('send_message', chat_id=42, text="hi") is None
+
+        mock_client.send_message.assert_not_called()
+        mock_call_task.apply_async.assert_called_once_with(
+            args=['send_message', {'chat_id': 42, 'text': "hi"}],
+            kwargs={'reserved': True},
+            countdown=2.5
+        )
+
+    def test_reserved_call_skips_the_limiter(self, mock_call_task, mock_client, mock_limiter):
+        """Test that a deferred call uses the token reserved for it instead of queueing again."""
+        telegram_call_task('send_message', {'chat_id': 42, 'text': "hi"}, reserved=True)
+
+        mock_limiter.acquire.assert_not_called()
+        mock_client.send_message.assert_called_once_with(chat_id=42, text="hi")
+
+    def test_retry_after_is_honored(self, mock_call_task, mock_client, mock_limiter):
+        """Test that a 429 reschedules the call after retry_after, deletions on the bulk queue."""
+        mock_client.delete_message.side_effect = TelegramAPIError(
+            'deleteMessage', 429, 'Too Many Requests', retry_after=7
+        )
+
+        send_telegram('delete_message', chat_id=42, message_id=1)
+
+        mock_call_task.apply_async.assert_called_once_with(
+            args=['delete_message', {'chat_id': 42, 'message_id': 1}], countdown=7, queue='bulk'
+        )
+
+    def test_other_errors_are_raised(self, mock_call_task, mock_client, mock_limiter):
+        """Test that non-429 API errors reach the caller."""
+        mock_client.delete_message.side_effect = TelegramAPIError(
+            'deleteMessage', 400, 'message to delete not found'
+        )
+
+        with pytest.raises(TelegramAPIError):
+            send_telegram('delete_message', chat_id=42, message_id=1)
+        mock_call_task.apply_async.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestRequestPdfTask:
+    def test_request_created(self):
+        """Test that a new request is stored and its id returned."""
+        result = request_pdf_task(123456789, 1, "10.1234/new.doi")
+
+        request = Request.objects.get(chat_id=123456789, doi="10.1234/new.doi")
+        assert result == {'status': 'created', 'request_id': request.id}
+        assert request.user.telegram_id == 123456789
+        assert request.article.doi == "10.1234/new.doi"
+
+    @patch('bot.tasks._send_document_sync')
+    def test_request_served_from_validated_pdf(self, mock_send_document, chat_user, another_chat_user):
+        """Test that a DOI with a validated PDF is answered immediately."""
+        article = Article.get_for_doi("10.1234/served.doi")
+        first = Request.objects.create(
+            doi=article.doi, article=article, status="completed", chat_id=111, user=chat_user
+        )
+        PDFUpload.objects.create(
+            request=first,
+            article=article,
+            file="articles/served.pdf",
+            telegram_file_id="tg_file_id",
+            chat_message_id=1,
+            user=chat_user,
+            is_valid=True,
+            validated_at=timezone.now()
+        )
+
+        result = request_pdf_task(987654321, 42, "https://doi.org/10.1234/SERVED.doi")
+
+        request = Request.objects.get(chat_id=987654321)
+        assert result == {'status': 'served', 'request_id': request.id}
+        assert request.status == "completed"
+        mock_send_document.assert_called_once_with(987654321, "tg_file_id", reply_to=42)
+
+    def test_request_duplicate(self, request_obj):
+        """Test that an active request for the same chat and DOI is not stored twice."""
+        result = request_pdf_task(request_obj.chat_id, 1, request_obj.doi)
+
+        assert result == {'status': 'duplicate'}
+        assert Request.objects.count() == 1
+
+
+@pytest.mark.django_db
+@patch('bot.tasks.prevalidate_pdf', return_value=(None, 'undecided'))
+@patch('bot.tasks.send_telegram')
+@patch('bot.tasks.ingest_telegram_pdf')
+class TestHandlePdfUploadTask:
+    def test_upload_stored(self, mock_ingest, mock_send, mock_prevalidate, request_obj, another_chat_user):
+        """Test that the ingested file and its checksum are recorded."""
+        mock_ingest.return_value = ("pdfs/ab/cd/abcd.pdf", "abcd")
+
+        pdf_id = handle_pdf_upload_task(
+            55, request_obj.id, "tg_file_id", "article.pdf", another_chat_user.telegram_id, "uploader"
+        )
+
+        pdf = PDFUpload.objects.get(pk=pdf_id)
+        assert (pdf.file.name, pdf.sha256, pdf.telegram_file_id) == (
+            "pdfs/ab/cd/abcd.pdf", "abcd", "tg_file_id"
+        )
+        assert pdf.chat_message_id == 55
+        mock_send.assert_called_once()
+
+    def test_same_file_not_recorded_twice(
+        self, mock_ingest, mock_send, mock_prevalidate, request_obj, another_chat_user):
+        """Test that re-uploading identical content for a request reuses the first upload."""
+        mock_ingest.return_value = ("pdfs/ab/cd/abcd.pdf", "abcd")
+        args = (55, request_obj.id, "tg_file_id", "article.pdf", another_chat_user.telegram_id, "uploader")
+
+        first = handle_pdf_upload_task(*args)
+        second = handle_pdf_upload_task(*args)
+
+        assert first == second
+        assert PDFUpload.objects.count() == 1
+
+    def test_rejected_file(self, mock_ingest, mock_send, mock_prevalidate, request_obj, another_chat_user):
+        """Test that rejected files create no upload and no vote message."""
+        mock_ingest.side_effect = PDFRejected("File is not a PDF")
+
+        result = handle_pdf_upload_task(
+            55, request_obj.id, "tg_file_id", "article.pdf", another_chat_user.telegram_id, "uploader"
+        )
+
+        assert result is None
+        assert not PDFUpload.objects.exists()
+        mock_send.assert_not_called()
+
+    def test_prevalidation_rejects(
+        self, mock_ingest, mock_send, mock_prevalidate, request_obj, another_chat_user
+    ):
+        """Test that an auto-rejected upload skips voting and Telegram edits."""
+        mock_ingest.return_value = ("pdfs/ab/cd/abcd.pdf", "abcd")
+        mock_prevalidate.return_value = ('rejected', 'encrypted')
+
+        pdf_id = handle_pdf_upload_task(
+            55, request_obj.id, "tg_file_id", "article.pdf", another_chat_user.telegram_id, "uploader"
+        )
+
+        pdf = PDFUpload.objects.get(pk=pdf_id)
+        assert (pdf.is_valid, pdf.prevalidation_reason) == (False, 'encrypted')
+        mock_send.assert_not_called()
+
+    def test_prevalidation_fast_tracks(
+        self, mock_ingest, mock_send, mock_prevalidate, request_obj, another_chat_user
+    ):
+        """Test that a DOI match completes the request without a vote keyboard."""
+        mock_ingest.return_value = ("pdfs/ab/cd/abcd.pdf", "abcd")
+        mock_prevalidate.return_value = ('accepted', 'doi match')
+
+        pdf_id = handle_pdf_upload_task(
+            55, request_obj.id, "tg_file_id", "article.pdf", another_chat_user.telegram_id, "uploader"
+        )
+
+        pdf = PDFUpload.objects.get(pk=pdf_id)
+        request_obj.refresh_from_db()
+        assert pdf.is_valid is True
+        assert request_obj.status == "completed"
+        _, kwargs = mock_send.call_args
+        assert 'reply_markup' not in kwargs
+
+
+def _vote(pdf, voter_id, valid=True):
+    action = "vote_valid" if valid else "vote_invalid"
+    return handle_vote_callback_task("callback_id", f"{action}:{pdf.id}", voter_id, f"voter_{voter_id}")
+
+
+@pytest.mark.django_db
+class TestHandleVoteCallbackTask:
+    def test_counters_and_quorum(self, pdf_upload):
+        """Test that votes update the tally and the quorum decides validity."""
+        _vote(pdf_upload, 1001, valid=True)
+        _vote(pdf_upload, 1002, valid=False)
+
+        pdf_upload.refresh_from_db()
+        assert (pdf_upload.votes_total, pdf_upload.votes_valid) == (2, 1)
+        assert pdf_upload.is_valid is None
+
+        _vote(pdf_upload, 1003, valid=True)
+
+        pdf_upload.refresh_from_db()
+        assert (pdf_upload.votes_total, pdf_upload.votes_valid) == (3, 2)
+        assert pdf_upload.is_valid is True
+        assert pdf_upload.delete_at is not None
+
+    def test_repeated_vote_is_ignored(self, pdf_upload):
+        """Test that a redelivered vote neither raises nor counts twice."""
+        _vote(pdf_upload, 1001, valid=True)
+        _vote(pdf_upload, 1001, valid=True)
+
+        pdf_upload.refresh_from_db()
+        assert (pdf_upload.votes_total, pdf_upload.votes_valid) == (1, 1)
+        assert Validation.objects.filter(pdf_upload=pdf_upload).count() == 1
+        assert TelegramUser.objects.get(telegram_id=1001).validation_count == 1
+
+    def test_query_count_independent_of_votes(self, pdf_upload):
+        """Test that handling a vote costs the same number of queries at any tally size."""
+        def seed_votes(start, count):
+            voters = TelegramUser.objects.bulk_create(
+                TelegramUser(telegram_id=start + i, username=f"bulk_voter_{start + i}")
+                for i in range(count)
+            )
+            Validation.objects.bulk_create(
+                Validation(pdf_upload=pdf_upload, user=voter, vote=True) for voter in voters
+            )
+            PDFUpload.objects.filter(pk=pdf_upload.pk).update(
+                votes_total=F('votes_total') + count, votes_valid=F('votes_valid') + count
+            )
+
+        seed_votes(3000, 3)
+        with CaptureQueriesContext(connection) as few_votes:
+            _vote(pdf_upload, 2000)
+
+        seed_votes(4000, 500)
+        with CaptureQueriesContext(connection) as many_votes:
+            _vote(pdf_upload, 2001)
+
+        assert len(many_votes) == len(few_votes)
+
+
+def _votes(pdf, voter_ids, valid=True):
+    return [
+        {
+            'callback_query_id': f"cq_{voter_id}",
+            'pdf_id': pdf.id,
+            'vote': valid,
+            'voter_id': voter_id,
+            'voter_username': f"voter_{voter_id}",
+        }
+        for voter_id in voter_ids
+    ]
+
+
+@pytest.mark.django_db
+class TestApplyVotes:
+    def test_batch_is_tallied_once(self, pdf_upload):
+        """Test that a burst of votes is counted and decided in one batch."""
+        votes = _votes(pdf_upload, range(5000, 5004)) + _votes(pdf_upload, [5004], valid=False)
+
+        assert apply_votes(votes) == 5
+
+        pdf_upload.refresh_from_db()
+        assert (pdf_upload.votes_total, pdf_upload.votes_valid) == (5, 4)
+        assert pdf_upload.is_valid is True
+        voter = TelegramUser.objects.get(telegram_id=5004)
+        assert voter.username == "voter_5004"
+        assert voter.validation_count == 1
+        assert voter.is_in_bot is False
+
+    def test_query_count_independent_of_batch_size(self, pdf_upload):
+        """Test that a batch costs the same number of queries for 3 and 50 votes."""
+        with CaptureQueriesContext(connection) as small:
+            apply_votes(_votes(pdf_upload, range(6000, 6003)))
+        with CaptureQueriesContext(connection) as large:
+            apply_votes(_votes(pdf_upload, range(7000, 7050)))
+
+        assert len(large) == len(small)
+        pdf_upload.refresh_from_db()
+        assert pdf_upload.votes_total == 53
+
+    def test_valid_quorum_completes_the_request(self, pdf_upload, settings):
+        """Test that a request answered through voting is not expired later."""
+        settings.REQUEST_EXPIRY_DELETE_MESSAGES = False
+        apply_votes(_votes(pdf_upload, [8200, 8201, 8202]))
+
+        Request.objects.filter(pk=pdf_upload.request_id).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        expire_requests_task()
+
+        assert Request.objects.get(pk=pdf_upload.request_id).status == 'completed'
+
+    def test_invalid_quorum_keeps_the_request_pending(self, pdf_upload):
+        apply_votes(_votes(pdf_upload, [8300, 8301, 8302], valid=False))
+
+        assert Request.objects.get(pk=pdf_upload.request_id).status == 'pending'
+
+    def test_late_votes_drop_the_cached_pdf(self, pdf_upload):
+        """Test that a PDF outvoted after quorum is no longer served from the cache."""
+        article = Article.get_for_doi("10.1234/flipped")
+        PDFUpload.objects.filter(pk=pdf_upload.pk).update(
+            article=article, telegram_file_id="tg_file_id"
+        )
+
+        apply_votes(_votes(pdf_upload, [8100, 8101]) + _votes(pdf_upload, [8102], valid=False))
+        assert get_validated_pdf(article)['file_id'] == "tg_file_id"
+
+        apply_votes(_votes(pdf_upload, [8103, 8104], valid=False))
+
+        pdf_upload.refresh_from_db()
+        assert pdf_upload.is_valid is False
+        assert get_validated_pdf(article) is None
+
+    def test_uploads_are_locked_in_pk_order(self, pdf_upload):
+        """Test that overlapping flushes take the row locks in the same order."""
+        with CaptureQueriesContext(connection) as queries:
+            apply_votes(_votes(pdf_upload, [8400]))
+
+        lock = next(query['sql'] for query in queries if 'bot_pdfupload' in query['sql'])
+        assert 'ORDER BY "bot_pdfupload"."id" ASC' in lock
+
+    def test_repeats_within_batch_are_ignored(self, pdf_upload):
+        assert apply_votes(_votes(pdf_upload, [8000, 8000])) == 1
+
+    def test_own_upload_vote_is_rejected(self, pdf_upload, chat_user, mock_client):
+        votes = _votes(pdf_upload, [chat_user.telegram_id])
+
+        assert apply_votes(votes) == 0
+
+        mock_client.answer_callback_query.assert_called_once()
+        assert not Validation.objects.exists()
+
+    def test_failed_rejection_keeps_the_batch(self, pdf_upload, chat_user, mock_client):
+        """Test that Telegram refusing a second answer does not roll back the other votes."""
+        mock_client.answer_callback_query.side_effect = TelegramAPIError(
+            'answerCallbackQuery', 400, 'query is too old'
+        )
+        votes = _votes(pdf_upload, [9100, chat_user.telegram_id, 9101])
+
+        assert apply_votes(votes) == 2
+
+        mock_client.answer_callback_query.assert_called_once()
+        assert Validation.objects.filter(pdf_upload=pdf_upload).count() == 2
+
+
+@pytest.mark.django_db
+@patch('bot.tasks.get_vote_buffer')
+class TestVoteBatching:
+    def test_first_vote_schedules_flush(self, mock_get_buffer, settings):
+        settings.VOTE_BATCH_ENABLED = True
+        settings.VOTE_BATCH_WINDOW = 0.2
+        mock_get_buffer.return_value.push.side_effect = [True, False]
+
+        with patch('bot.tasks.flush_votes_task') as mock_flush:
+            submit_vote("cq1", "vote_valid:1", 10, "a")
+            submit_vote("cq2", "vote_valid:1", 11, "b")
+
+        mock_flush.apply_async.assert_called_once_with(countdown=0.2)
+        pushed = mock_get_buffer.return_value.push.call_args_list[0].args[0]
+        assert pushed == {
+            'callback_query_id': "cq1", 'pdf_id': 1, 'vote': True,
+            'voter_id': 10, 'voter_username': "a",
+        }
+
+    def test_flush_drains_buffer(self, mock_get_buffer, pdf_upload):
+        mock_get_buffer.return_value.pop.side_effect = [
+            _votes(pdf_upload, [9000, 9001]), _votes(pdf_upload, [9002]), []
+        ]
+
+        assert flush_votes_task() == 3
+
+        pdf_upload.refresh_from_db()
+        assert pdf_upload.votes_total == 3
+
+    def test_failed_batch_is_requeued(self, mock_get_buffer, pdf_upload, settings):
+        """Test that votes popped from the buffer are not lost when the batch fails."""
+        settings.VOTE_BATCH_WINDOW = 0.2
+        votes = _votes(pdf_upload, [9200, 9201])
+        buffer = mock_get_buffer.return_value
+        buffer.pop.side_effect = [votes, []]
+        buffer.requeue.return_value = True
+
+        with patch('bot.tasks.apply_votes', side_effect=RuntimeError), \
+                patch.object(flush_votes_task, 'apply_async') as mock_apply_async:
+            with pytest.raises(RuntimeError):
+                flush_votes_task()
+
+        buffer.requeue.assert_called_once_with(votes)
+        mock_apply_async.assert_called_once_with(countdown=0.2)
 
 
 @pytest.mark.django_db
 class TestDeleteMessageTask:
-    @patch('bot.tasks.Bot')
-    def test_delete_message_success(self, mock_bot_class, mock_bot):
+    def test_delete_message_success(self, mock_client):
         """Test successful message deletion."""
-        mock_bot_class.return_value = mock_bot
         chat_id = 123456789
         message_id = 987654321
 
         delete_message_task(chat_id, message_id)
 
-        mock_bot.delete_message.assert_called_once_with(
+        mock_client.delete_message.assert_called_once_with(
             chat_id=chat_id,
             message_id=message_id
         )
 
-    @patch('bot.tasks.Bot')
-    @patch('bot.tasks.print')
-    def test_delete_message_failure(self, mock_print, mock_bot_class, mock_bot):
+    @patch('bot.tasks.logger')
+    def test_delete_message_deferred(self, mock_logger, mock_client, mock_limiter, mock_queue):
+        """Test that a throttled deletion goes to the deletion queue, not to a countdown task."""
+        mock_limiter.acquire.return_value = 2.5
+
+        delete_message_task(123456789, 987654321)
+
+        mock_client.delete_message.assert_not_called()
+        mock_queue.schedule.assert_called_once_with(123456789, 987654321, 2.5)
+        args, _ = mock_logger.info.call_args
+        assert "deferred" in args[0]
+
+    @patch('bot.tasks.logger')
+    def test_delete_message_failure(self, mock_logger, mock_client, mock_queue, settings):
         """Test handling of message deletion failure."""
-        mock_bot_class.return_value = mock_bot
         chat_id = 123456789
         message_id = 987654321
         error_message = "Message to delete not found"
-        mock_bot.delete_message.side_effect = Exception(error_message)
+        mock_client.delete_message.side_effect = Exception(error_message)
 
         delete_message_task(chat_id, message_id)
 
-        mock_bot.delete_message.assert_called_once_with(
+        mock_client.delete_message.assert_called_once_with(
             chat_id=chat_id,
             message_id=message_id
         )
-        mock_print.assert_called_once()
-        args, _ = mock_print.call_args
+        mock_logger.error.assert_called_once()
+        args, _ = mock_logger.error.call_args
         assert f"Failed to delete message {message_id}" in args[0]
         assert error_message in args[0]
+        mock_queue.schedule.assert_called_once_with(
+            chat_id, message_id, settings.DELETION_SWEEP_LEASE
+        )
+
+
+@pytest.fixture
+def mock_queue():
+    """Patch the Redis deletion queue used by the tasks."""
+    with patch('bot.tasks.get_deletion_queue') as mock_get_queue:
+        yield mock_get_queue.return_value
 
 
 @pytest.mark.django_db
 class TestScheduleFunctions:
-    @patch('bot.tasks.delete_message_task')
-    def test_schedule_pdf_deletion(self, mock_delete_task):
+    def test_schedule_pdf_deletion(self, mock_queue):
         """Test scheduling PDF deletion."""
         chat_id = 123456789
         message_id = 987654321
@@ -64,13 +495,9 @@ class TestScheduleFunctions:
 
         schedule_pdf_deletion(chat_id, message_id, delay)
 
-        mock_delete_task.apply_async.assert_called_once_with(
-            args=[chat_id, message_id],
-            countdown=delay
-        )
+        mock_queue.schedule.assert_called_once_with(chat_id, message_id, delay)
 
-    @patch('bot.tasks.delete_message_task')
-    def test_schedule_notification_deletion(self, mock_delete_task):
+    def test_schedule_notification_deletion(self, mock_queue):
         """Test scheduling notification deletion."""
         chat_id = 123456789
         message_id = 987654321
@@ -78,11 +505,121 @@ class TestScheduleFunctions:
 
         schedule_notification_deletion(chat_id, message_id, delay)
 
-        mock_delete_task.apply_async.assert_called_once_with(
-            args=[chat_id, message_id],
-            countdown=delay
+        mock_queue.schedule.assert_called_once_with(chat_id, message_id, delay)
+
+
+class TestSweepDueDeletionsTask:
+    @patch('bot.tasks._delete_message', return_value=None)
+    def test_sweep_in_batches(self, mock_delete, mock_queue, settings):
+        """Test that due messages are claimed in batches until the queue is drained."""
+        settings.DELETION_SWEEP_BATCH_SIZE = 2
+        mock_queue.claim_due.side_effect = [[(1, 10), (1, 11)], [(2, 20)], []]
+
+        assert sweep_due_deletions_task() == 3
+
+        mock_queue.claim_due.assert_called_with(2)
+        assert sorted(c.args for c in mock_delete.call_args_list) == [
+            (1, 10), (1, 11), (2, 20)
+        ]
+        assert [c.args[0] for c in mock_queue.remove.call_args_list] == [
+            [(1, 10), (1, 11)], [(2, 20)]
+        ]
+
+    @patch('bot.tasks._delete_message', return_value=None)
+    def test_sweep_stops_at_max_batches(self, mock_delete, mock_queue, settings):
+        """Test that one sweep never processes more than DELETION_SWEEP_MAX_BATCHES batches."""
+        settings.DELETION_SWEEP_MAX_BATCHES = 2
+        mock_queue.claim_due.return_value = [(1, 10)]
+
+        assert sweep_due_deletions_task() == 2
+        assert mock_queue.claim_due.call_count == 2
+
+    def test_failed_deletion_stays_queued(self, mock_queue, mock_client, settings):
+        """Test that only transient failures are left in the queue for a retry."""
+        mock_queue.claim_due.side_effect = [[(1, 10), (1, 11), (1, 12)], []]
+        errors = {
+            11: TelegramAPIError('deleteMessage', 502, 'Bad Gateway'),
+            12: TelegramAPIError('deleteMessage', 400, 'message to delete not found'),
+        }
+
+        def delete_message(chat_id, message_id):
+            if message_id in errors:
+                raise errors[message_id]
+            return True
+
+        mock_client.delete_message.side_effect = delete_message
+
+        assert sweep_due_deletions_task() == 2
+
+        mock_queue.remove.assert_called_once_with([(1, 10), (1, 12)])
+        mock_queue.defer.assert_called_once_with({(1, 11): settings.DELETION_SWEEP_LEASE})
+
+    @patch('bot.tasks.telegram_call_task')
+    def test_throttled_deletions_stay_queued(
+        self, mock_call_task, mock_queue, mock_client, mock_limiter, settings
+    ):
+        """Test that deferred deletions are spaced out in the queue instead of becoming tasks."""
+        settings.TELEGRAM_GROUP_RATE = 0.5
+        mock_queue.claim_due.side_effect = [[(-1, 10), (-1, 11), (-1, 12), (7, 1)], []]
+        mock_limiter.acquire.side_effect = lambda chat_id: 3.0 if chat_id == -1 else 0
+        mock_limiter.buckets.side_effect = TokenBucketLimiter(MagicMock()).buckets
+
+        assert sweep_due_deletions_task() == 1
+
+        mock_queue.remove.assert_called_once_with([(7, 1)])
+        delays = mock_queue.defer.call_args.args[0]
+        assert sorted(delays.values()) == [3.0, 5.0, 7.0]
+        assert set(delays) == {(-1, 10), (-1, 11), (-1, 12)}
+        mock_call_task.apply_async.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestExpireRequestsTask:
+    def _make_requests(self, count, expired):
+        Request.objects.bulk_create(
+            Request(
+                doi=f"10.1234/{'old' if expired else 'new'}.{i}",
+                status="pending",
+                chat_id=111,
+                message_id=i + 1,
+                expires_at=timezone.now() + timedelta(days=-1 if expired else 1)
+            )
+            for i in range(count)
         )
 
+    def test_expire_in_batches(self, settings):
+        """Test that only pending requests past expires_at are expired, in chunks."""
+        settings.REQUEST_EXPIRY_BATCH_SIZE = 2
+        self._make_requests(5, expired=True)
+        self._make_requests(2, expired=False)
+
+        result = expire_requests_task()
+
+        assert result['expired'] == 5
+        assert result['rows_per_sec'] >= 0
+        assert Request.objects.filter(status="expired").count() == 5
+        assert Request.objects.filter(status="pending").count() == 2
+
+    def test_completed_requests_are_kept(self):
+        """Test that completed requests are not expired."""
+        Request.objects.create(
+            doi="10.1234/done", status="completed", chat_id=111,
+        )
+        Request.objects.update(expires_at=timezone.now() - timedelta(days=1))
+
+        assert expire_requests_task()['expired'] == 0
+
+    def test_messages_queued_for_deletion(self, settings, mock_queue):
+        """Test that expired request messages go to the deletion queue when enabled."""
+        settings.REQUEST_EXPIRY_DELETE_MESSAGES = True
+        self._make_requests(2, expired=True)
+
+        expire_requests_task()
+
+        assert sorted(c.args for c in mock_queue.schedule.call_args_list) == [
+            (111, 1, 0), (111, 2, 0)
+        ]
+
 
 @pytest.mark.django_db
 class TestConfigAccess:
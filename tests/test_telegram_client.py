@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot import telegram_client
+from bot.telegram_client import TelegramAPIError, TelegramClient, get_telegram_client
+
+
+@pytest.fixture
+def client():
+    """Create a TelegramClient with a mocked HTTP session."""
+    client = TelegramClient("123:abc", pool_size=4, timeout=5)
+    client.session = MagicMock()
+    client.session.post.return_value.json.return_value = {'ok': True, 'result': {'message_id': 1}}
+    return client
+
+
+def test_call_serializes_payload(client):
+    """Test that PTB objects are serialized and empty params are dropped."""
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("ok", callback_data="vote_valid:1")]])
+
+    result = client.send_message(42, "hi", reply_markup=keyboard)
+
+    assert result == {'message_id': 1}
+    client.session.post.assert_called_once_with(
+        "https://api.telegram.org/bot123:abc/sendMessage",
+        json={'chat_id': 42, 'text': 'hi', 'reply_markup': keyboard.to_dict()},
+        timeout=5
+    )
+
+
+def test_call_raises_api_error(client):
+    """Test that ok=false responses raise TelegramAPIError with retry_after."""
+    client.session.post.return_value.json.return_value = {
+        'ok': False,
+        'error_code': 429,
+        'description': 'Too Many Requests',
+        'parameters': {'retry_after': 7},
+    }
+
+    with pytest.raises(TelegramAPIError) as exc_info:
+        client.delete_message(42, 1)
+
+    assert exc_info.value.error_code == 429
+    assert exc_info.value.retry_after == 7
+
+
+def test_call_wraps_non_json_error_page(client):
+    """Test that an HTML 502 page raises TelegramAPIError, not JSONDecodeError."""
+    response = client.session.post.return_value
+    response.status_code = 502
+    response.text = '<html>Bad Gateway</html>'
+    response.json.side_effect = ValueError("Expecting value")
+
+    with pytest.raises(TelegramAPIError) as exc_info:
+        client.delete_message(42, 1)
+
+    assert exc_info.value.error_code == 502
+    assert exc_info.value.retry_after is None
+
+
+def test_pool_size():
+    """Test that the HTTPS adapter is sized from the pool_size argument."""
+    client = TelegramClient("123:abc", pool_size=4, timeout=5)
+
+    assert client.session.get_adapter("https://api.telegram.org")._pool_maxsize == 4
+
+
+@patch.object(telegram_client, '_client', None)
+def test_get_telegram_client_is_shared():
+    """Test that the process reuses one client and a forked worker gets a new one."""
+    first = get_telegram_client()
+    assert get_telegram_client() is first
+
+    telegram_client.reset_telegram_client()
+    assert get_telegram_client() is not first
@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import cache
+
+from bot.models import TelegramUser
+from bot.users import (
+    TELEGRAM_USER_CACHE_KEY,
+    ensure_telegram_user,
+    ensure_telegram_users,
+    register_bot_user,
+)
+
+
+@pytest.mark.django_db
+class TestEnsureTelegramUsers:
+    def test_new_and_existing_in_one_query(self, chat_user, django_assert_num_queries):
+        """Test that a mixed batch is inserted with a single query."""
+        with django_assert_num_queries(1):
+            ensure_telegram_users({chat_user.telegram_id: "renamed", 42: "newbie", 43: None})
+
+        assert TelegramUser.objects.get(pk=42).username == "newbie"
+        assert TelegramUser.objects.get(pk=43).username == ""
+        chat_user.refresh_from_db()
+        assert chat_user.username == "test_user"
+
+    def test_long_username_is_truncated(self):
+        """Test that display names longer than the column do not fail the insert."""
+        ensure_telegram_user(42, "x" * 1000)
+
+        assert len(TelegramUser.objects.get(pk=42).username) == 255
+
+    def test_recent_users_skip_the_database(self, django_assert_num_queries,
+                                            django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            ensure_telegram_user(42, "newbie")
+
+        with django_assert_num_queries(0):
+            ensure_telegram_user(42)
+
+    def test_not_cached_before_commit(self, django_capture_on_commit_callbacks):
+        """Test that a rolled back insert does not leave the user in the cache."""
+        with django_capture_on_commit_callbacks(execute=False):
+            ensure_telegram_user(42, "newbie")
+
+        assert cache.get(TELEGRAM_USER_CACHE_KEY.format(42)) is None
+
+    def test_is_in_bot_applies_to_new_users_only(self, another_chat_user):
+        TelegramUser.objects.filter(pk=another_chat_user.pk).update(is_in_bot=False)
+
+        ensure_telegram_users({another_chat_user.telegram_id: None, 42: None}, is_in_bot=True)
+
+        assert TelegramUser.objects.get(pk=42).is_in_bot is True
+        another_chat_user.refresh_from_db()
+        assert another_chat_user.is_in_bot is False
+
+    def test_deleted_user_is_forgotten(self, chat_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            ensure_telegram_users({chat_user.telegram_id: None, 42: None})
+
+        TelegramUser.objects.get(pk=42).delete()
+        ensure_telegram_user(42)
+
+        assert TelegramUser.objects.filter(pk=42).exists()
+
+
+@pytest.mark.django_db
+def test_register_bot_user(another_chat_user):
+    """Test that /start marks an existing user as reachable in private chat."""
+    TelegramUser.objects.filter(pk=another_chat_user.pk).update(is_in_bot=False)
+
+    register_bot_user(another_chat_user.telegram_id, "someone")
+
+    another_chat_user.refresh_from_db()
+    assert another_chat_user.is_in_bot is True
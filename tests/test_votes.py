@@ -0,0 +1,76 @@
+import json
+from unittest.mock import MagicMock
+
+from bot.votes import VOTE_BUFFER_KEY, VOTE_FLUSH_FLAG_KEY, VoteBuffer
+
+VOTE = {'callback_query_id': 'cq', 'pdf_id': 1, 'vote': True, 'voter_id': 2, 'voter_username': 'u'}
+
+
+def test_push_schedules_first_vote_of_window(settings):
+    """Test that only the vote that sets the window flag asks for a flush."""
+    settings.VOTE_BATCH_WINDOW = 0.2
+    client = MagicMock()
+    pipe = client.pipeline.return_value
+    pipe.execute.side_effect = [[1, True], [2, None]]
+    buffer = VoteBuffer(client)
+
+    assert buffer.push(VOTE) is True
+    assert buffer.push(VOTE) is False
+
+    pipe.rpush.assert_called_with(VOTE_BUFFER_KEY, json.dumps(VOTE))
+    pipe.set.assert_called_with(VOTE_FLUSH_FLAG_KEY, 1, nx=True, px=2000)
+
+
+def test_pop_clears_flag_before_reading():
+    client = MagicMock()
+    client.register_script.return_value.return_value = [json.dumps(VOTE).encode()]
+    buffer = VoteBuffer(client)
+
+    assert buffer.pop(100) == [VOTE]
+    client.delete.assert_called_once_with(VOTE_FLUSH_FLAG_KEY)
+    client.register_script.return_value.assert_called_once_with(keys=[VOTE_BUFFER_KEY], args=[100])
+
+
+def test_requeue_keeps_order_and_counts_attempts(settings):
+    """Test that a failed batch goes back to the head of the buffer in arrival order."""
+    settings.VOTE_BATCH_WINDOW = 0.2
+    settings.VOTE_FLUSH_MAX_ATTEMPTS = 3
+    client = MagicMock()
+    pipe = client.pipeline.return_value
+    pipe.execute.return_value = [2, True]
+    second = {**VOTE, 'voter_id': 3}
+
+    assert VoteBuffer(client).requeue([VOTE, second]) is True
+
+    pipe.lpush.assert_called_once_with(
+        VOTE_BUFFER_KEY,
+        json.dumps({**second, 'attempts': 1}),
+        json.dumps({**VOTE, 'attempts': 1})
+    )
+    pipe.set.assert_called_once_with(VOTE_FLUSH_FLAG_KEY, 1, nx=True, px=2000)
+
+
+def test_requeue_drops_exhausted_votes(settings):
+    settings.VOTE_FLUSH_MAX_ATTEMPTS = 3
+    client = MagicMock()
+
+    assert VoteBuffer(client).requeue([{**VOTE, 'attempts': 2}]) is False
+
+    client.pipeline.assert_not_called()
+
+
+def test_pop_script_keeps_arrival_order(redis_client, settings):
+    """Test the pop script against Redis, including a batch pushed back after a failure."""
+    settings.VOTE_FLUSH_MAX_ATTEMPTS = 3
+    buffer = VoteBuffer(redis_client)
+    votes = [{**VOTE, 'voter_id': voter_id} for voter_id in (1, 2, 3)]
+    for vote in votes:
+        buffer.push(vote)
+
+    first = buffer.pop(2)
+    assert first == votes[:2]
+    assert not redis_client.exists(VOTE_FLUSH_FLAG_KEY)
+
+    assert buffer.requeue(first) is True
+    assert [vote['voter_id'] for vote in buffer.pop(10)] == [1, 2, 3]
+    assert len(buffer) == 0
@@ -0,0 +1,175 @@
+import atexit
+import json
+from io import StringIO
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from telegram import Update
+from telegram.request import HTTPXRequest
+
+from bot import webhook
+
+SECRET = 'webhook-secret'
+
+# Апдейт в том виде, в каком его присылает Telegram
+RECORDED_UPDATE = {
+    'update_id': 1001,
+    'message': {
+        'message_id': 42,
+        'date': 1700000000,
+        'chat': {'id': 111, 'type': 'private', 'first_name': 'Test'},
+        'from': {'id': 111, 'is_bot': False, 'first_name': 'Test'},
+        'text': '/start',
+        'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_application(settings):
+    """Каждый тест создаёт Application процесса заново и закрывает его."""
+    settings.TELEGRAM_WEBHOOK_SECRET = SECRET
+    yield
+    if webhook._application is not None:
+        webhook._shutdown(webhook._application, webhook._loop)
+        atexit.unregister(webhook._shutdown)
+    webhook._application = webhook._loop = None
+
+
+@pytest.fixture
+def mock_application():
+    """Подменяет Application бота; process_update записывает апдейты."""
+    application = MagicMock()
+    application.bot = None
+    application.initialize = AsyncMock()
+    application.shutdown = AsyncMock()
+    application.process_update = AsyncMock()
+    with patch('bot.webhook.build_webhook_application', return_value=application):
+        yield application
+
+
+def post_update(client, data, secret=SECRET):
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    return client.post(
+        reverse('telegram-webhook'),
+        data=json.dumps(data),
+        content_type='application/json',
+        headers=headers
+    )
+
+
+class TestTelegramWebhook:
+    def test_update_is_processed(self, client, mock_application):
+        """Test that a recorded update is parsed and handed to the application."""
+        response = post_update(client, RECORDED_UPDATE)
+
+        assert response.status_code == 200
+        mock_application.process_update.assert_awaited_once()
+        update = mock_application.process_update.await_args.args[0]
+        assert isinstance(update, Update)
+        assert update.update_id == 1001
+        assert update.message.text == '/start'
+        assert update.effective_chat.id == 111
+
+    @pytest.mark.parametrize('secret', [None, 'wrong-secret'])
+    def test_bad_secret_is_rejected(self, client, mock_application, secret):
+        """Test that updates without the configured secret are rejected."""
+        response = post_update(client, RECORDED_UPDATE, secret=secret)
+
+        assert response.status_code == 403
+        mock_application.process_update.assert_not_awaited()
+
+    def test_rejected_when_secret_not_configured(self, client, mock_application, settings):
+        """Test that the webhook is closed while no secret is configured."""
+        settings.TELEGRAM_WEBHOOK_SECRET = None
+
+        response = post_update(client, RECORDED_UPDATE, secret='')
+
+        assert response.status_code == 403
+        mock_application.process_update.assert_not_awaited()
+
+    def test_application_is_initialized_once(self, client, mock_application):
+        """Test that the application is built and initialized once, not per update."""
+        post_update(client, RECORDED_UPDATE)
+        post_update(client, {**RECORDED_UPDATE, 'update_id': 1002})
+
+        assert mock_application.process_update.await_count == 2
+        mock_application.initialize.assert_awaited_once()
+        mock_application.shutdown.assert_not_awaited()
+
+    def test_failure_is_redelivered(self, client, mock_application):
+        """Test that a failed update answers 5xx and is processed again on redelivery."""
+        mock_application.process_update.side_effect = [RuntimeError('boom'), None]
+        client.raise_request_exception = False
+
+        response = post_update(client, RECORDED_UPDATE)
+        assert response.status_code == 500
+
+        response = post_update(client, RECORDED_UPDATE)
+        assert response.status_code == 200
+        assert mock_application.process_update.await_count == 2
+
+    def test_redelivered_update_is_processed_once(self, client, mock_application):
+        """Test that Telegram retrying the same update_id does not reprocess it."""
+        post_update(client, RECORDED_UPDATE)
+        response = post_update(client, RECORDED_UPDATE)
+
+        assert response.status_code == 200
+        mock_application.process_update.assert_awaited_once()
+
+    def test_handler_failure_is_redelivered(self, client):
+        """Test that a handler error in a real Application answers 5xx and is retried.
+
+        PTB passes handler exceptions to the error handlers instead of
+        raising them from process_update.
+        """
+        start = AsyncMock(side_effect=[RuntimeError('boom'), None])
+        # Единственный запрос к Bot API здесь — getMe из Bot.initialize
+        get_me = {'ok': True, 'result': {
+            'id': 123, 'is_bot': True, 'first_name': 'SciArticle', 'username': 'sci_bot'
+        }}
+        do_request = AsyncMock(return_value=(200, json.dumps(get_me).encode()))
+        client.raise_request_exception = False
+
+        with patch('bot.bot.start', start), \
+                patch.object(HTTPXRequest, 'do_request', do_request):
+            response = post_update(client, RECORDED_UPDATE)
+            assert response.status_code == 500
+
+            response = post_update(client, RECORDED_UPDATE)
+            assert response.status_code == 200
+
+        assert start.await_count == 2
+        do_request.assert_awaited_once()
+        assert do_request.await_args.kwargs['url'].endswith('/getMe')
+
+    def test_get_not_allowed(self, client, mock_application):
+        response = client.get(reverse('telegram-webhook'))
+
+        assert response.status_code == 405
+
+
+@patch('bot.management.commands.set_webhook.Bot')
+def test_set_webhook_command(mock_bot_class, settings):
+    """Test that the one-off command registers the configured webhook."""
+    settings.TELEGRAM_WEBHOOK_URL = 'https://example.com/telegram/webhook/'
+    settings.TELEGRAM_WEBHOOK_SECRET = SECRET
+    bot = mock_bot_class.return_value.__aenter__.return_value
+    bot.set_webhook = AsyncMock()
+
+    call_command('set_webhook', stdout=StringIO())
+
+    bot.set_webhook.assert_awaited_once_with(
+        url='https://example.com/telegram/webhook/',
+        secret_token=SECRET,
+        allowed_updates=Update.ALL_TYPES
+    )
+
+
+def test_set_webhook_command_requires_url(settings):
+    settings.TELEGRAM_WEBHOOK_URL = None
+
+    with pytest.raises(CommandError):
+        call_command('set_webhook')